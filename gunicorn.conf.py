@@ -0,0 +1,16 @@
+"""Gunicorn settings for serving the API with supervised worker processes.
+
+    gunicorn src.api.app:app --config gunicorn.conf.py
+"""
+import os
+from src.config.settings import settings
+
+bind = f"{settings.API_HOST}:{settings.API_PORT}"
+# Each worker runs its own event loop (uvloop and httptools when installed)
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.environ.get("WEB_CONCURRENCY", (os.cpu_count() or 1) * 2 + 1))
+loglevel = settings.LOG_LEVEL.lower()
+# Replace workers periodically so slow leaks in long-lived agents cannot build up
+max_requests = 1000
+max_requests_jitter = 100
+graceful_timeout = 30
@@ -1,7 +1,10 @@
-from typing import Dict, Any, Optional, List
+from typing import AsyncIterator, Dict, Any, Optional, List, Union
 from datetime import datetime
+import asyncio
+import hashlib
 import json
 import logging
+import time
 from pathlib import Path
 from ..api.openrouter_client import OpenRouterClient
 from ..config.settings import settings
@@ -31,15 +34,37 @@ class BaseAgent(CoreBaseAgent):
         """Postprocess result after execution"""
         return result
 
+    @staticmethod
+    def _text_block(text: str, cacheable: bool = False) -> Dict[str, Any]:
+        """Build a message content block; cacheable blocks are marked for provider prompt caching"""
+        block = {"type": "text", "text": text}
+        if cacheable:
+            block["cache_control"] = {"type": "ephemeral"}
+        return block
+
+    async def analyze_batch(
+        self,
+        items: List[Dict[str, Any]],
+        batch_size: int = 16
+    ) -> List[Dict[str, Any]]:
+        """Run analyze_content for each item's keyword arguments, with up to batch_size requests in flight"""
+        semaphore = asyncio.Semaphore(batch_size)
+
+        async def analyze(item: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.analyze_content(**item)
+
+        return await asyncio.gather(*(analyze(item) for item in items))
+
     async def _get_analysis(
         self,
         content: str,
-        system_prompt: str,
+        system_prompt: Union[str, List[Dict[str, Any]]],
         model: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: Optional[int] = None,
     ) -> Dict[str, Any]:
-        cache_key = f"{self.agent_type}_{hash(content)}"
+        cache_key = self._analysis_cache_key(content, system_prompt, model, temperature, max_tokens)
         cached_result = self._get_cached_analysis(cache_key)
         if cached_result:
             logger.info(f"Using cached result for {self.agent_type} analysis")
@@ -60,17 +85,61 @@ class BaseAgent(CoreBaseAgent):
             )
             logger.info(f"Successfully received response from {model or self.client.default_model}")
             logger.debug(f"Response details: {json.dumps(result, indent=2)}")
+            if settings.CACHE_ENABLED:
+                self._cache_analysis(cache_key, result)
             return result
         except Exception as e:
             logger.error(f"Error in API request to {model or self.client.default_model}: {str(e)}")
             raise
 
+    async def _stream_analysis(
+        self,
+        content: str,
+        system_prompt: Union[str, List[Dict[str, Any]]],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+    ) -> AsyncIterator[str]:
+        """Yield the analysis text as it is generated; streamed answers are not cached"""
+        logger.info(f"Streaming API request with model: {model or self.client.default_model}")
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": content}
+        ]
+        async for text in self.client.chat_completion_stream(
+            messages=messages,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens
+        ):
+            yield text
+
+    def _analysis_cache_key(
+        self,
+        content: str,
+        system_prompt: Union[str, List[Dict[str, Any]]],
+        model: Optional[str],
+        temperature: float,
+        max_tokens: Optional[int]
+    ) -> str:
+        """Stable cache key for a request; hash() is salted per process so it cannot key a disk cache"""
+        request = json.dumps(
+            [system_prompt, content, model or self.client.default_model, temperature, max_tokens],
+            sort_keys=True
+        )
+        return f"{self.agent_type}_{hashlib.sha256(request.encode()).hexdigest()}"
+
     def _get_cached_analysis(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        if not settings.CACHE_ENABLED:
+            return None
         cache_file = self.cache_dir / f"{cache_key}.json"
-        if cache_file.exists():
+        try:
+            if time.time() - cache_file.stat().st_mtime >= settings.CACHE_TTL:
+                return None
             with open(cache_file, "r") as f:
                 return json.load(f)
-        return None
+        except FileNotFoundError:
+            return None
 
     def _cache_analysis(self, cache_key: str, analysis: Dict[str, Any]):
         cache_file = self.cache_dir / f"{cache_key}.json"
@@ -1,4 +1,4 @@
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, Optional
 from .base_agent import BaseAgent
 
 class ComicsAgent(BaseAgent):
@@ -45,6 +45,19 @@ Provide detailed analysis while maintaining a professional and insightful tone."
             
         return analysis
 
+    async def stream_content(
+        self,
+        content: str,
+        model: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """Yield the comics analysis text as it is generated"""
+        async for text in self._stream_analysis(
+            content=content,
+            system_prompt=self.system_prompt,
+            model=model
+        ):
+            yield text
+
     async def get_recommendations(
         self,
         based_on: str,
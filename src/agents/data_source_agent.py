@@ -21,6 +21,7 @@ class DataSourceAgent(BaseAgent):
         )
         self.cache = {}
         self.cache_ttl = 3600  # 1 hour cache TTL
+        self.negative_cache_ttl = 900  # 15 minute TTL for "not found" results
         
         # Initialize API clients
         self.goodreads_api_key = config.get('goodreads_api_key') if config else None
@@ -39,16 +40,20 @@ class DataSourceAgent(BaseAgent):
         cache_key = f"wiki_{title}_{enhanced}"
         if cache_key in self.cache:
             cached_data, timestamp = self.cache[cache_key]
-            if (datetime.now() - timestamp).total_seconds() < self.cache_ttl:
+            ttl = self.cache_ttl if cached_data.get("exists", True) else self.negative_cache_ttl
+            if (datetime.now() - timestamp).total_seconds() < ttl:
                 return cached_data
         
         try:
             page = self.wiki.page(title)
             if not page.exists():
-                return {
+                result = {
                     "error": f"Wikipedia page not found for title: {title}",
                     "exists": False
                 }
+                # Cache misses too, so repeated lookups of unknown titles stay cheap
+                self.cache[cache_key] = (result, datetime.now())
+                return result
             
             result = {
                 "title": page.title,
@@ -266,7 +271,8 @@ class DataSourceAgent(BaseAgent):
         cache_key = f"openlibrary_{title}_{author}"
         if cache_key in self.cache:
             cached_data, timestamp = self.cache[cache_key]
-            if (datetime.now() - timestamp).total_seconds() < self.cache_ttl:
+            ttl = self.cache_ttl if cached_data.get("exists", True) else self.negative_cache_ttl
+            if (datetime.now() - timestamp).total_seconds() < ttl:
                 return cached_data
                 
         try:
@@ -321,7 +327,8 @@ class DataSourceAgent(BaseAgent):
         cache_key = f"isfdb_{title}_{author}"
         if cache_key in self.cache:
             cached_data, timestamp = self.cache[cache_key]
-            if (datetime.now() - timestamp).total_seconds() < self.cache_ttl:
+            ttl = self.cache_ttl if cached_data.get("exists", True) else self.negative_cache_ttl
+            if (datetime.now() - timestamp).total_seconds() < ttl:
                 return cached_data
                 
         try:
@@ -400,6 +407,11 @@ class DataSourceAgent(BaseAgent):
                         book_info["awards"] = awards
                         
                         result.update(book_info)
+            else:
+                result = {
+                    "error": "Book not found",
+                    "exists": False
+                }
             
             self.cache[cache_key] = (result, datetime.now())
             return result
@@ -1,9 +1,18 @@
 from typing import Optional, Dict, Any
+from datetime import datetime
+import copy
+import hashlib
 from .analysis_agent import AnalysisAgent
 
 class MCPEnabledAnalysisAgent(AnalysisAgent):
     """MCP-enabled version of the analysis agent"""
     
+    def __init__(self, agent_type: Optional[str] = None):
+        super().__init__(agent_type)
+        self.analysis_cache = {}
+        self.analysis_cache_ttl = 3600  # 1 hour cache TTL
+        self.analysis_cache_size = 512
+    
     async def analyze_content(
         self,
         content: str,
@@ -13,6 +22,19 @@ class MCPEnabledAnalysisAgent(AnalysisAgent):
         model: Optional[str] = None
     ) -> Dict[str, Any]:
         """Enhanced content analysis with MCP features"""
+        # Hash the content so cache keys stay small for large inputs
+        cache_key = (
+            hashlib.blake2b(content.encode(), digest_size=16).digest(),
+            title, author, year, model
+        )
+        if cache_key in self.analysis_cache:
+            cached_analysis, timestamp = self.analysis_cache[cache_key]
+            if (datetime.now() - timestamp).total_seconds() < self.analysis_cache_ttl:
+                # Mark as recently used and hand out a copy so callers can't corrupt the cache
+                self.analysis_cache[cache_key] = self.analysis_cache.pop(cache_key)
+                return copy.deepcopy(cached_analysis)
+            del self.analysis_cache[cache_key]
+        
         # First get the base analysis
         base_analysis = await super().analyze_content(
             content=content,
@@ -32,6 +54,11 @@ class MCPEnabledAnalysisAgent(AnalysisAgent):
             }
         }
         
+        # Evict the least recently used entry once the cache is full
+        if len(self.analysis_cache) >= self.analysis_cache_size:
+            del self.analysis_cache[next(iter(self.analysis_cache))]
+        self.analysis_cache[cache_key] = (copy.deepcopy(enhanced_analysis), datetime.now())
+        
         return enhanced_analysis
     
     def _calculate_confidence(self, analysis: Dict[str, Any]) -> float:
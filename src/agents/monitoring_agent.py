@@ -1,24 +1,240 @@
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple
+import asyncio
+import itertools
+import json
 import logging
+import sqlite3
+import sys
+import time
+from collections import Counter, deque
+from collections.abc import MutableMapping
 from datetime import datetime, timedelta
 import aiohttp
+import numpy as np
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from .base_agent import BaseAgent
 from .data_source_agent import DataSourceAgent
+from ..config.settings import settings
+
+try:
+    import ahocorasick  # Optional: single-pass multi-keyword matching
+except ImportError:
+    ahocorasick = None
+
+try:
+    import orjson  # Optional: faster webhook payload serialization
+except ImportError:
+    orjson = None
+
+try:
+    import aiosmtplib  # Optional: SMTP on the event loop instead of a worker thread
+except ImportError:
+    aiosmtplib = None
+
+# Source name -> (label, DataSourceAgent method, profile field, query parameter, extra kwargs)
+SOURCE_LOOKUPS = {
+    'isfdb': ('ISFDB', 'get_isfdb_data', 'keywords', 'title', {}),
+    'goodreads': ('Goodreads', 'get_goodreads_data', 'authors', 'title', {}),
+    'wikipedia': ('Wikipedia', 'search_wikipedia', 'keywords', 'query', {}),
+    'rpggeek': ('RPGGeek', 'get_rpggeek_data', 'keywords', 'title', {}),
+    'gcd': ('GCD', 'get_gcd_data', 'keywords', 'title', {}),
+    'openlibrary': ('OpenLibrary', 'get_openlibrary_data', 'keywords', 'title', {}),
+    'librarything': ('LibraryThing', 'get_librarything_data', 'keywords', 'title', {}),
+    'doaj': ('DOAJ', 'search_doaj', 'keywords', 'query', {}),
+    'imdb': ('IMDb', 'search_imdb', 'keywords', 'query', {'type': 'movie,tvSeries'}),
+    'tmdb': ('TMDB', 'search_tmdb', 'keywords', 'query', {'media_type': 'movie,tv'}),
+    'tvdb': ('TVDB', 'search_tvdb', 'keywords', 'query', {}),
+    'trakt': ('Trakt', 'search_trakt', 'keywords', 'query', {'type': 'movie,show'}),
+}
+
+def _build_keyword_automaton(keywords: List[str]) -> Optional[Any]:
+    """Build an Aho-Corasick automaton over lowercased keywords, if available."""
+    if ahocorasick is None or not keywords:
+        return None
+    automaton = ahocorasick.Automaton()
+    for keyword in keywords:
+        automaton.add_word(keyword, keyword)
+    automaton.make_automaton()
+    return automaton
+
+def _compile_matcher(profile: Dict[str, Any]) -> Callable[[Dict[str, Any]], bool]:
+    """Build a matcher with the profile's criteria bound as local variables."""
+    keywords = tuple(profile['_keywords_lower'])
+    automaton = profile['_keyword_automaton']
+    authors = frozenset(profile.get('authors', []))
+    year_range = profile.get('year_range')
+    genres = frozenset(profile.get('genres') or ())
+    min_rating = profile.get('min_rating')
+    
+    def match(item: Dict[str, Any]) -> bool:
+        # Check keywords with fuzzy matching
+        blob = _search_text(item)
+        if automaton is not None:
+            if next(automaton.iter(blob), None) is not None:
+                return True
+        elif any(keyword in blob for keyword in keywords):
+            return True
+            
+        # Check authors with exact matching; some sources list several authors
+        item_author = item.get('author') if authors else None
+        if item_author:
+            if isinstance(item_author, str):
+                if item_author in authors:
+                    return True
+            elif not authors.isdisjoint(item_author):
+                return True
+            
+        # Check publication year range if specified
+        if year_range is not None and 'year' in item:
+            min_year, max_year = year_range
+            if min_year <= item['year'] <= max_year:
+                return True
+                
+        # Check genres if specified
+        item_genres = item.get('genres') if genres else None
+        if item_genres:
+            if isinstance(item_genres, str):
+                item_genres = (item_genres,)
+            if not genres.isdisjoint(item_genres):
+                return True
+                
+        # Check ratings if specified
+        if min_rating is not None and 'rating' in item:
+            if item['rating'] >= min_rating:
+                return True
+                
+        return False
+        
+    return match
+
+def _dump_json(payload: Dict[str, Any]) -> bytes:
+    """Serialize a payload to JSON bytes, using orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode()
+
+def _item_key(item: Dict[str, Any]) -> tuple:
+    """History key for an item; most sources return no id, so fall back to url or title."""
+    return (item.get('source'), item.get('id') or item.get('url') or item.get('title'))
+
+_SEARCH_FIELDS = ('title', 'name', 'author', 'summary', 'description', 'tags', 'genres')
+
+def _search_text(item: Dict[str, Any]) -> str:
+    """Lowercased text of the item fields that keywords are matched against."""
+    return ' '.join(str(item[field]) for field in _SEARCH_FIELDS if field in item).lower()
+
+class SqliteNotificationHistory(MutableMapping):
+    """Notification history kept in SQLite instead of process memory.
+    
+    Behaves like the in-memory ``{(source, id): datetime}`` dict, and adds
+    ``expire`` for index-backed range deletes.
+    """
+    
+    def __init__(self, path: str):
+        self._db = sqlite3.connect(str(path), isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS notif (key TEXT PRIMARY KEY, source TEXT, ts REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS notif_ts ON notif(ts)")
+        
+    @staticmethod
+    def _encode(key: tuple) -> str:
+        return json.dumps(list(key))
+        
+    def __getitem__(self, key: tuple) -> datetime:
+        row = self._db.execute("SELECT ts FROM notif WHERE key = ?", (self._encode(key),)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return datetime.fromtimestamp(row[0])
+        
+    def __setitem__(self, key: tuple, value: datetime) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO notif (key, source, ts) VALUES (?, ?, ?)",
+            (self._encode(key), key[0], value.timestamp())
+        )
+        
+    def __delitem__(self, key: tuple) -> None:
+        if self._db.execute("DELETE FROM notif WHERE key = ?", (self._encode(key),)).rowcount == 0:
+            raise KeyError(key)
+            
+    def __contains__(self, key: object) -> bool:
+        return self._db.execute(
+            "SELECT 1 FROM notif WHERE key = ?", (self._encode(key),)
+        ).fetchone() is not None
+        
+    def __iter__(self) -> Iterator[tuple]:
+        for (key,) in self._db.execute("SELECT key FROM notif"):
+            yield tuple(json.loads(key))
+            
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM notif").fetchone()[0]
+        
+    def source_counts(self) -> Counter:
+        """Number of stored notifications per source."""
+        return Counter(dict(self._db.execute("SELECT source, COUNT(*) FROM notif GROUP BY source")))
+        
+    def expire(self, cutoff: datetime) -> Counter:
+        """Delete entries notified at or before the cutoff.
+        
+        Returns:
+            Number of deleted entries per source
+        """
+        cutoff_ts = cutoff.timestamp()
+        self._db.execute("BEGIN")
+        try:
+            dropped = Counter(dict(self._db.execute(
+                "SELECT source, COUNT(*) FROM notif WHERE ts <= ? GROUP BY source", (cutoff_ts,)
+            )))
+            self._db.execute("DELETE FROM notif WHERE ts <= ?", (cutoff_ts,))
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+        return dropped
+        
+    def close(self) -> None:
+        self._db.close()
 
 class MonitoringAgent(BaseAgent):
     """Agent responsible for monitoring and detecting new content of interest."""
     
-    def __init__(self):
+    def __init__(self, history_path: Optional[str] = None):
+        """Create the agent.
+        
+        Args:
+            history_path: SQLite file for notification history; defaults to
+                          MONITORING_HISTORY_DB, and to memory when neither is set
+        """
         super().__init__(agent_type="monitoring")
         self.data_source_agent = DataSourceAgent()
-        self.last_check_time = datetime.now()
+        self._started_at = time.time()
+        self._last_checked = np.zeros(1024, dtype=np.float64)  # Epoch seconds by profile id, 0 = never checked
         self.interest_profiles = {}  # Store user interest profiles
-        self.notification_history = {}  # Track what's been notified
+        self._profile_ids = itertools.count(1)  # Never reuses the id of a deleted profile
+        history_path = history_path or settings.MONITORING_HISTORY_DB
+        if history_path:
+            # Expiry is an indexed range delete, so no in-memory order is kept
+            self.notification_history = SqliteNotificationHistory(history_path)
+            self._history_order = None
+            self._source_counts = self.notification_history.source_counts()
+        else:
+            self.notification_history = {}  # (source, id) -> time notified
+            self._history_order = deque()  # (time notified, key) oldest first, for expiry
+            self._source_counts = Counter()  # Notification history size per source
         self.webhooks = {}  # Store webhook configurations
         self.email_config = None  # Store email configuration
+        self._http: Optional[aiohttp.ClientSession] = None  # Shared session for webhook delivery
+        self.source_concurrency = dict(settings.MONITORING_SOURCE_CONCURRENCY)
+        self._source_semaphores: Dict[str, asyncio.Semaphore] = {}  # Caps in-flight lookups per source
+        self._fetch_cache: Dict[tuple, tuple] = {}  # (source, method, kwargs) -> (results, fetched at)
+        self.fetch_cache_ttl = 300  # 5 minute TTL for upstream lookups
+        self.min_poll_interval = timedelta(seconds=60)  # Default; profiles may set min_poll_interval
+        self._pending_emails: List[MIMEMultipart] = []  # Sent together by flush_email_queue
+        self._email_lock = asyncio.Lock()
         
     async def configure_email(self, config: Dict[str, str]) -> None:
         """Configure email notifications.
@@ -50,12 +266,14 @@ class MonitoringAgent(BaseAgent):
         """
         self.webhooks[webhook_id] = config
         
-    async def send_notification(self, profile_id: int, items: List[Dict[str, Any]]) -> None:
+    async def send_notification(self, profile_id: int, items: List[Dict[str, Any]], flush: bool = True) -> None:
         """Send notifications for new items.
         
         Args:
             profile_id: ID of the interest profile
             items: List of new items to notify about
+            flush: Send queued emails now; pass False when notifying many
+                   profiles and call flush_email_queue once afterwards
         """
         if profile_id not in self.interest_profiles:
             return
@@ -63,16 +281,23 @@ class MonitoringAgent(BaseAgent):
         profile = self.interest_profiles[profile_id]
         prefs = profile['notification_preferences']
         
+        deliveries = []
+        
         # Send email notification
         if 'email' in prefs['channels'] and self.email_config:
             await self._send_email_notification(profile, items)
+            if flush:
+                deliveries.append(self.flush_email_queue())
             
         # Send webhook notifications
         if 'webhook' in prefs['channels']:
-            await self._send_webhook_notifications(profile, items)
+            deliveries.append(self._send_webhook_notifications(profile, items))
+            
+        # Email and webhook delivery overlap rather than running back to back
+        await asyncio.gather(*deliveries)
             
     async def _send_email_notification(self, profile: Dict[str, Any], items: List[Dict[str, Any]]) -> None:
-        """Send email notification.
+        """Queue an email notification for the next flush.
         
         Args:
             profile: Interest profile
@@ -95,15 +320,54 @@ class MonitoringAgent(BaseAgent):
             body += "\n"
             
         msg.attach(MIMEText(body, 'plain'))
+        self._pending_emails.append(msg)
         
-        # Send email
-        try:
-            with smtplib.SMTP(self.email_config['smtp_server'], self.email_config['smtp_port']) as server:
-                server.starttls()
-                server.login(self.email_config['username'], self.email_config['password'])
-                server.send_message(msg)
-        except Exception as e:
-            logging.error(f"Error sending email notification: {e}")
+    async def flush_email_queue(self) -> None:
+        """Send all queued emails over a single SMTP connection."""
+        async with self._email_lock:
+            if not self._pending_emails or not self.email_config:
+                return
+            messages, self._pending_emails = self._pending_emails, []
+            try:
+                if aiosmtplib is not None:
+                    await self._deliver_emails_async(messages)
+                else:
+                    await asyncio.to_thread(self._deliver_emails, messages)
+            except Exception as e:
+                logging.error(f"Error sending email notification: {e}")
+                
+    async def _deliver_emails_async(self, messages: List[MIMEMultipart]) -> None:
+        """Send messages through one aiosmtplib session.
+        
+        Args:
+            messages: Email messages to send
+        """
+        async with aiosmtplib.SMTP(
+            hostname=self.email_config['smtp_server'],
+            port=self.email_config['smtp_port'],
+            start_tls=True
+        ) as server:
+            await server.login(self.email_config['username'], self.email_config['password'])
+            for msg in messages:
+                try:
+                    await server.send_message(msg)
+                except aiosmtplib.SMTPException as e:
+                    logging.error(f"Error sending email notification to {msg['To']}: {e}")
+                    
+    def _deliver_emails(self, messages: List[MIMEMultipart]) -> None:
+        """Send messages through one blocking SMTP session.
+        
+        Args:
+            messages: Email messages to send
+        """
+        with smtplib.SMTP(self.email_config['smtp_server'], self.email_config['smtp_port']) as server:
+            server.starttls()
+            server.login(self.email_config['username'], self.email_config['password'])
+            for msg in messages:
+                try:
+                    server.send_message(msg)
+                except smtplib.SMTPException as e:
+                    logging.error(f"Error sending email notification to {msg['To']}: {e}")
             
     async def _send_webhook_notifications(self, profile: Dict[str, Any], items: List[Dict[str, Any]]) -> None:
         """Send webhook notifications.
@@ -112,34 +376,59 @@ class MonitoringAgent(BaseAgent):
             profile: Interest profile
             items: List of new items
         """
-        for webhook_id, config in self.webhooks.items():
+        matching = [
+            (webhook_id, config) for webhook_id, config in self.webhooks.items()
             # Check if webhook is interested in these events
-            if not any(event in config['events'] for event in ['new_book', 'new_author']):
-                continue
-                
-            payload = {
-                'profile_id': profile['profile_id'],
-                'profile_name': profile['name'],
-                'items': items,
-                'timestamp': datetime.now().isoformat()
-            }
+            if any(event in config['events'] for event in ['new_book', 'new_author'])
+        ]
+        if not matching:
+            return
             
-            headers = config.get('headers', {})
-            if 'secret' in config:
-                headers['X-Webhook-Secret'] = config['secret']
-                
-            try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(
-                        config['url'],
-                        json=payload,
-                        headers=headers
-                    ) as response:
-                        if response.status != 200:
-                            logging.error(f"Webhook {webhook_id} returned status {response.status}")
-            except Exception as e:
-                logging.error(f"Error sending webhook {webhook_id}: {e}")
+        payload = {
+            'profile_id': profile['profile_id'],
+            'profile_name': profile['name'],
+            'items': items,
+            'timestamp': datetime.now().isoformat()
+        }
+        # Serialize once rather than once per webhook
+        body = _dump_json(payload)
+        
+        session = await self._session()
+        results = await asyncio.gather(
+            *(self._post_webhook(session, config, body) for _, config in matching),
+            return_exceptions=True
+        )
+        
+        for (webhook_id, _), result in zip(matching, results):
+            if isinstance(result, Exception):
+                logging.error(f"Error sending webhook {webhook_id}: {result}")
+            elif result != 200:
+                logging.error(f"Webhook {webhook_id} returned status {result}")
                 
+    async def _post_webhook(self, session: aiohttp.ClientSession, config: Dict[str, Any], body: bytes) -> int:
+        """Deliver a serialized JSON payload to a single webhook and return the response status."""
+        headers = {'Content-Type': 'application/json', **(config.get('headers') or {})}
+        if config.get('secret'):
+            headers['X-Webhook-Secret'] = config['secret']
+            
+        async with session.post(config['url'], data=body, headers=headers) as response:
+            return response.status
+            
+    async def _session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on first use."""
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=100, limit_per_host=10, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=10)
+            )
+        return self._http
+        
+    async def close(self) -> None:
+        """Close the shared HTTP session."""
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+            
     def _matches_profile(self, item: Dict[str, Any], profile: Dict[str, Any]) -> bool:
         """Enhanced profile matching with multiple criteria.
         
@@ -150,59 +439,8 @@ class MonitoringAgent(BaseAgent):
         Returns:
             True if item matches profile criteria
         """
-        # Check keywords with fuzzy matching
-        if any(keyword.lower() in str(item).lower() 
-               for keyword in profile['keywords']):
-            return True
-            
-        # Check authors with exact matching
-        if 'author' in item and item['author'] in profile['authors']:
-            return True
-            
-        # Check publication year range if specified
-        if 'year_range' in profile:
-            min_year, max_year = profile['year_range']
-            if 'year' in item and min_year <= item['year'] <= max_year:
-                return True
-                
-        # Check genres if specified
-        if 'genres' in profile and 'genres' in item:
-            if any(genre in item['genres'] for genre in profile['genres']):
-                return True
-                
-        # Check ratings if specified
-        if 'min_rating' in profile and 'rating' in item:
-            if item['rating'] >= profile['min_rating']:
-                return True
-                
-        return False
-        
-    async def cleanup_old_notifications(self, days: int = 30) -> None:
-        """Clean up old notifications and optimize storage.
-        
-        Args:
-            days: Number of days to keep notifications (default: 30)
-        """
-        cutoff_date = datetime.now() - timedelta(days=days)
-        
-        # Clean up notification history
-        self.notification_history = {
-            k: v for k, v in self.notification_history.items()
-            if v > cutoff_date
-        }
-        
-        # Clean up old webhook configurations
-        self.webhooks = {
-            k: v for k, v in self.webhooks.items()
-            if v.get('last_used', datetime.now()) > cutoff_date
-        }
+        return profile['_matcher'](item)
         
-        # Optimize interest profiles
-        for profile_id, profile in self.interest_profiles.items():
-            if 'last_checked' in profile and profile['last_checked'] < cutoff_date:
-                # Archive inactive profiles
-                profile['status'] = 'archived'
-                
     async def get_statistics(self) -> Dict[str, Any]:
         """Get monitoring statistics.
         
@@ -215,14 +453,12 @@ class MonitoringAgent(BaseAgent):
                                  if p.get('status') != 'archived'),
             'total_notifications': len(self.notification_history),
             'webhook_count': len(self.webhooks),
-            'last_check_time': self.last_check_time,
+            'last_check_time': datetime.fromtimestamp(max(self._last_checked.max(), self._started_at)),
             'source_stats': {
-                'isfdb': sum(1 for k in self.notification_history.keys() 
-                            if k.startswith('isfdb_')),
-                'goodreads': sum(1 for k in self.notification_history.keys() 
-                               if k.startswith('goodreads_')),
-                'wikipedia': sum(1 for k in self.notification_history.keys() 
-                               if k.startswith('wikipedia_'))
+                'isfdb': 0,
+                'goodreads': 0,
+                'wikipedia': 0,
+                **self._source_counts
             }
         }
     
@@ -245,12 +481,21 @@ class MonitoringAgent(BaseAgent):
         Returns:
             Dict containing the created profile
         """
-        profile_id = len(self.interest_profiles) + 1
-        self.interest_profiles[profile_id] = {
+        profile_id = next(self._profile_ids)
+        keywords_lower = [k.lower() for k in profile.get('keywords', [])]
+        now = datetime.now()
+        self._mark_checked(profile_id, now.timestamp())
+        stored = {
             **profile,
-            'created_at': datetime.now(),
-            'last_checked': datetime.now()
+            'profile_id': profile_id,
+            'created_at': now,
+            'last_checked': now,
+            # Matching inputs prepared once instead of per item
+            '_keywords_lower': keywords_lower,
+            '_keyword_automaton': _build_keyword_automaton(keywords_lower)
         }
+        stored['_matcher'] = _compile_matcher(stored)
+        self.interest_profiles[profile_id] = stored
         return {'profile_id': profile_id, **profile}
     
     async def check_for_updates(self, profile_id: int) -> List[Dict[str, Any]]:
@@ -266,185 +511,135 @@ class MonitoringAgent(BaseAgent):
             raise ValueError(f"Profile {profile_id} not found")
             
         profile = self.interest_profiles[profile_id]
-        new_items = []
         
-        # Check each source in the profile
+        # Repeat checks within the poll interval reuse the previous result
+        interval = profile.get('min_poll_interval', self.min_poll_interval)
+        if not isinstance(interval, timedelta):
+            interval = timedelta(seconds=interval)
+        if '_last_result' in profile and datetime.now() - profile['last_checked'] < interval:
+            return list(profile['_last_result'])
+        
+        # Build one lookup per (source, query) pair so they can run concurrently
+        lookups = []
         for source in profile['sources']:
-            if source == 'isfdb':
-                # Check ISFDB for new entries matching keywords/authors
-                for keyword in profile['keywords']:
-                    try:
-                        results = await self.data_source_agent.get_isfdb_data(
-                            title=keyword,
-                            enhanced=True
-                        )
-                        new_items.extend(self._filter_new_items(results, profile))
-                    except Exception as e:
-                        logging.error(f"Error checking ISFDB: {e}")
-                        
-            elif source == 'goodreads':
-                # Check Goodreads for new releases
-                for author in profile['authors']:
-                    try:
-                        results = await self.data_source_agent.get_goodreads_data(
-                            author=author
-                        )
-                        new_items.extend(self._filter_new_items(results, profile))
-                    except Exception as e:
-                        logging.error(f"Error checking Goodreads: {e}")
-                        
-            elif source == 'wikipedia':
-                # Check Wikipedia for new articles
-                for keyword in profile['keywords']:
-                    try:
-                        results = await self.data_source_agent.search_wikipedia(
-                            query=keyword
-                        )
-                        new_items.extend(self._filter_new_items(results, profile))
-                    except Exception as e:
-                        logging.error(f"Error checking Wikipedia: {e}")
-
-            elif source == 'rpggeek':
-                # Check RPGGeek for new RPG content
-                for keyword in profile['keywords']:
-                    try:
-                        results = await self.data_source_agent.get_rpggeek_data(
-                            title=keyword
-                        )
-                        new_items.extend(self._filter_new_items(results, profile))
-                    except Exception as e:
-                        logging.error(f"Error checking RPGGeek: {e}")
-
-            elif source == 'gcd':
-                # Check Grand Comics Database for new comics
-                for keyword in profile['keywords']:
-                    try:
-                        results = await self.data_source_agent.get_gcd_data(
-                            title=keyword
-                        )
-                        new_items.extend(self._filter_new_items(results, profile))
-                    except Exception as e:
-                        logging.error(f"Error checking GCD: {e}")
-
-            elif source == 'openlibrary':
-                # Check OpenLibrary for new books
-                for keyword in profile['keywords']:
-                    try:
-                        results = await self.data_source_agent.get_openlibrary_data(
-                            title=keyword
-                        )
-                        new_items.extend(self._filter_new_items(results, profile))
-                    except Exception as e:
-                        logging.error(f"Error checking OpenLibrary: {e}")
-
-            elif source == 'librarything':
-                # Check LibraryThing for new books
-                for keyword in profile['keywords']:
-                    try:
-                        results = await self.data_source_agent.get_librarything_data(
-                            title=keyword
-                        )
-                        new_items.extend(self._filter_new_items(results, profile))
-                    except Exception as e:
-                        logging.error(f"Error checking LibraryThing: {e}")
-
-            elif source == 'arxiv':
-                # Check arXiv for scientific papers
-                for keyword in profile['keywords']:
-                    try:
-                        results = await self.data_source_agent.search_arxiv(
-                            query=keyword
-                        )
-                        new_items.extend(self._filter_new_items(results, profile))
-                    except Exception as e:
-                        logging.error(f"Error checking arXiv: {e}")
-
-            elif source == 'doaj':
-                # Check Directory of Open Access Journals
-                for keyword in profile['keywords']:
-                    try:
-                        results = await self.data_source_agent.search_doaj(
-                            query=keyword
-                        )
-                        new_items.extend(self._filter_new_items(results, profile))
-                    except Exception as e:
-                        logging.error(f"Error checking DOAJ: {e}")
-
-            elif source == 'imdb':
-                # Check IMDb for new movies/TV shows
-                for keyword in profile['keywords']:
-                    try:
-                        results = await self.data_source_agent.search_imdb(
-                            query=keyword,
-                            type="movie,tvSeries"
-                        )
-                        new_items.extend(self._filter_new_items(results, profile))
-                    except Exception as e:
-                        logging.error(f"Error checking IMDb: {e}")
-
-            elif source == 'tmdb':
-                # Check The Movie Database
-                for keyword in profile['keywords']:
-                    try:
-                        results = await self.data_source_agent.search_tmdb(
-                            query=keyword,
-                            media_type="movie,tv"
-                        )
-                        new_items.extend(self._filter_new_items(results, profile))
-                    except Exception as e:
-                        logging.error(f"Error checking TMDB: {e}")
-
-            elif source == 'tvdb':
-                # Check The TV Database
-                for keyword in profile['keywords']:
-                    try:
-                        results = await self.data_source_agent.search_tvdb(
-                            query=keyword
-                        )
-                        new_items.extend(self._filter_new_items(results, profile))
-                    except Exception as e:
-                        logging.error(f"Error checking TVDB: {e}")
-
-            elif source == 'trakt':
-                # Check Trakt for trending sci-fi content
-                for keyword in profile['keywords']:
-                    try:
-                        results = await self.data_source_agent.search_trakt(
-                            query=keyword,
-                            type="movie,show"
-                        )
-                        new_items.extend(self._filter_new_items(results, profile))
-                    except Exception as e:
-                        logging.error(f"Error checking Trakt: {e}")
+            if source not in SOURCE_LOOKUPS:
+                continue
+            label, method_name, field, param, extra = SOURCE_LOOKUPS[source]
+            source = sys.intern(source)  # Shared by every history key for this source
+            for query in profile.get(field, []):
+                lookups.append((label, self._fetch_source(source, method_name, **{param: query}, **extra)))
+        
+        results = await asyncio.gather(*(lookup for _, lookup in lookups), return_exceptions=True)
+        
+        # Keyed by item so overlapping lookups contribute each item once
+        new_items: Dict[tuple, Dict[str, Any]] = {}
+        seen = set()
+        for (label, _), result in zip(lookups, results):
+            if isinstance(result, Exception):
+                logging.error(f"Error checking {label}: {result}")
+                continue
+            for item_key, item in self._filter_new_items(result, profile, seen):
+                new_items.setdefault(item_key, item)
         
         # Update last checked time
-        self.interest_profiles[profile_id]['last_checked'] = datetime.now()
+        now = datetime.now()
+        profile['last_checked'] = now
+        self._mark_checked(profile_id, now.timestamp())
+        profile['_last_result'] = list(new_items.values())
+        
+        return list(profile['_last_result'])
+    
+    async def _fetch_source(self, source: str, method_name: str, **kwargs) -> List[Dict[str, Any]]:
+        """Run a single data source lookup without blocking the event loop.
         
-        return new_items
+        Args:
+            source: Name of the source being queried
+            method_name: DataSourceAgent method to call
+            **kwargs: Arguments for the data source method
+            
+        Returns:
+            List of items tagged with their source
+        """
+        # Profiles sharing a keyword reuse one upstream lookup within the TTL
+        cache_key = (source, method_name, tuple(sorted(kwargs.items())))
+        if cache_key in self._fetch_cache:
+            results, timestamp = self._fetch_cache[cache_key]
+            if (datetime.now() - timestamp).total_seconds() >= self.fetch_cache_ttl:
+                results = None
+        else:
+            results = None
+            
+        if results is None:
+            method = getattr(self.data_source_agent, method_name)
+            async with self._source_semaphore(source):
+                if asyncio.iscoroutinefunction(method):
+                    results = await method(**kwargs)
+                else:
+                    # Most data source lookups use blocking requests calls
+                    results = await asyncio.to_thread(method, **kwargs)
+                    
+            # Single-record lookups return one dict rather than a list
+            if isinstance(results, dict):
+                results = [results]
+            self._fetch_cache[cache_key] = (results, datetime.now())
+            
+        # Tag fresh copies so callers never share cached item dicts
+        return [
+            {'source': source, **item} for item in results
+            if isinstance(item, dict) and 'error' not in item and item.get('exists', True)
+        ]
     
-    def _filter_new_items(self, results: List[Dict[str, Any]], profile: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _mark_checked(self, profile_id: int, timestamp: float) -> None:
+        """Record a profile's last check time in the timestamp index."""
+        if profile_id >= len(self._last_checked):
+            grown = np.zeros(max(profile_id + 1, 2 * len(self._last_checked)), dtype=np.float64)
+            grown[:len(self._last_checked)] = self._last_checked
+            self._last_checked = grown
+        self._last_checked[profile_id] = timestamp
+        
+    def _source_semaphore(self, source: str) -> asyncio.Semaphore:
+        """Get the semaphore limiting concurrent lookups against a source."""
+        if source not in self._source_semaphores:
+            limit = self.source_concurrency.get(source, settings.MONITORING_DEFAULT_CONCURRENCY)
+            self._source_semaphores[source] = asyncio.Semaphore(limit)
+        return self._source_semaphores[source]
+        
+    def _filter_new_items(
+        self,
+        results: List[Dict[str, Any]],
+        profile: Dict[str, Any],
+        seen: Optional[set] = None
+    ) -> Iterator[Tuple[tuple, Dict[str, Any]]]:
         """Filter results to find new items of interest.
         
         Args:
             results: List of items from data source
             profile: Interest profile to match against
+            seen: Item keys already evaluated during this check, shared across sources
             
-        Returns:
-            List of new items matching the profile
+        Yields:
+            (item key, item) for each new item matching the profile
         """
-        new_items = []
         for item in results:
             # Check if item is new (not in notification history)
-            item_key = f"{item.get('source')}_{item.get('id')}"
+            item_key = _item_key(item)
             if item_key in self.notification_history:
                 continue
+            
+            # Skip items another lookup in this check already evaluated
+            if seen is not None:
+                if item_key in seen:
+                    continue
+                seen.add(item_key)
                 
             # Check if item matches profile criteria
             if self._matches_profile(item, profile):
-                new_items.append(item)
-                self.notification_history[item_key] = datetime.now()
-                
-        return new_items
+                now = datetime.now()
+                self.notification_history[item_key] = now
+                if self._history_order is not None:
+                    self._history_order.append((now, item_key))
+                self._source_counts[item.get('source')] += 1
+                yield item_key, item
     
     async def get_notification_summary(self, profile_id: int) -> Dict[str, Any]:
         """Get a summary of notifications for a profile.
@@ -471,13 +666,32 @@ class MonitoringAgent(BaseAgent):
         }
     
     async def cleanup_old_notifications(self, days: int = 30) -> None:
-        """Clean up old notifications from history.
+        """Clean up old notifications from history and archive inactive profiles.
         
         Args:
             days: Number of days to keep notifications (default: 30)
         """
         cutoff_date = datetime.now() - timedelta(days=days)
-        self.notification_history = {
-            k: v for k, v in self.notification_history.items()
-            if v > cutoff_date
+        if self._history_order is None:
+            self._source_counts -= self.notification_history.expire(cutoff_date)
+        else:
+            # History order is oldest first, so only expired entries are visited
+            while self._history_order and self._history_order[0][0] <= cutoff_date:
+                timestamp, key = self._history_order.popleft()
+                if self.notification_history.get(key) == timestamp:
+                    del self.notification_history[key]
+                    self._source_counts[key[0]] -= 1
+            self._source_counts += Counter()  # Drop sources that reached zero
+        
+        # Archive profiles that have not been checked since the cutoff
+        stale_ids = np.flatnonzero((self._last_checked > 0) & (self._last_checked < cutoff_date.timestamp()))
+        for profile_id in stale_ids.tolist():
+            if profile_id in self.interest_profiles:
+                self.interest_profiles[profile_id]['status'] = 'archived'
+                
+        # Drop expired upstream lookups
+        now = datetime.now()
+        self._fetch_cache = {
+            k: v for k, v in self._fetch_cache.items()
+            if (now - v[1]).total_seconds() < self.fetch_cache_ttl
         } 
\ No newline at end of file
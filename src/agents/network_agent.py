@@ -1,34 +1,182 @@
-from typing import Dict, Any, List, Optional, Set
+from typing import Dict, Any, List, NamedTuple, Optional, Set
 from .base_agent import BaseAgent
 from collections import defaultdict
+from datetime import datetime
+import copy
+import hashlib
+import heapq
+import itertools
+import json
 import logging
+import sys
+import networkx as nx
+import numpy as np
+
+try:
+    import orjson  # Optional: faster serialization of analysis results
+except ImportError:
+    orjson = None
+
+try:
+    from numba import njit
+except ImportError:  # Optional: kernels run as plain Python without numba
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
 
 logger = logging.getLogger(__name__)
 
+def _json_default(value: Any) -> Any:
+    """Serialize the sets and numpy values in an analysis; anything else as a string."""
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+def _dump_json(payload: Any, sort_keys: bool = False) -> bytes:
+    """Serialize a payload to JSON bytes, using orjson when installed."""
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(payload, default=_json_default, option=option)
+    return json.dumps(payload, sort_keys=sort_keys, default=_json_default).encode()
+
+@njit(cache=True)
+def _bfs_components(indptr: np.ndarray, indices: np.ndarray, n: int) -> np.ndarray:
+    """Label every node of a CSR graph with the id of its connected component."""
+    labels = np.full(n, -1, dtype=np.int32)
+    queue = np.empty(n, dtype=np.int32)
+    component = 0
+    for seed in range(n):
+        if labels[seed] != -1:
+            continue
+        labels[seed] = component
+        queue[0] = seed
+        head = 0
+        tail = 1
+        while head < tail:
+            node = queue[head]
+            head += 1
+            for k in range(indptr[node], indptr[node + 1]):
+                neighbor = indices[k]
+                if labels[neighbor] == -1:
+                    labels[neighbor] = component
+                    queue[tail] = neighbor
+                    tail += 1
+        component += 1
+    return labels
+
+@njit(cache=True)
+def _reverse_cuthill_mckee(indptr: np.ndarray, indices: np.ndarray, n: int) -> np.ndarray:
+    """Bandwidth-reducing node order: BFS from low-degree seeds, neighbours by degree, reversed."""
+    degrees = indptr[1:] - indptr[:-1]
+    order = np.empty(n, dtype=np.int32)
+    visited = np.zeros(n, dtype=np.bool_)
+    tail = 0
+    for seed in np.argsort(degrees, kind="mergesort"):
+        if visited[seed]:
+            continue
+        visited[seed] = True
+        order[tail] = seed
+        head = tail
+        tail += 1
+        while head < tail:
+            node = order[head]
+            head += 1
+            neighbors = indices[indptr[node]:indptr[node + 1]]
+            for neighbor in neighbors[np.argsort(degrees[neighbors], kind="mergesort")]:
+                if not visited[neighbor]:
+                    visited[neighbor] = True
+                    order[tail] = neighbor
+                    tail += 1
+    return order[::-1].copy()
+
+class CSRNetwork(NamedTuple):
+    """Compressed sparse row adjacency of a character network.
+    
+    Neighbours of node ``i`` are ``indices[indptr[i]:indptr[i + 1]]``; ``names[i]``
+    is its character name and ``index`` maps names back to node ids.
+    """
+    names: List[str]
+    index: Dict[str, int]
+    indptr: np.ndarray
+    indices: np.ndarray
+    
+    def neighbors(self, node: int) -> np.ndarray:
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+    
+    def edges(self) -> tuple:
+        """Each undirected edge once, as (source ids, target ids) with source < target."""
+        sources = np.repeat(np.arange(len(self.names), dtype=np.int32), np.diff(self.indptr))
+        upper = sources < self.indices
+        return sources[upper], self.indices[upper]
+    
+    def permute(self, order: np.ndarray) -> "CSRNetwork":
+        """Renumber nodes so that new node ``i`` is old node ``order[i]``."""
+        relabel = np.empty(len(order), dtype=np.int32)
+        relabel[order] = np.arange(len(order), dtype=np.int32)
+        degrees = np.diff(self.indptr)[order]
+        indptr = np.zeros(len(order) + 1, dtype=np.int64)
+        np.cumsum(degrees, out=indptr[1:])
+        
+        # Position of every new slot in the old indices array
+        source = np.repeat(self.indptr[order] - indptr[:-1], degrees) + np.arange(indptr[-1])
+        names = [self.names[node] for node in order]
+        index = {name: i for i, name in enumerate(names)}
+        return CSRNetwork(names, index, indptr, relabel[self.indices[source]])
+
 class NetworkAnalysisAgent(BaseAgent):
     """Agent for analyzing character networks and relationships using both algorithmic analysis and LLM insights."""
     
+    PROMPT_FOCUS = (
+        "1. Main character relationships",
+        "2. Community structure",
+        "3. Character roles",
+        "4. Network patterns"
+    )
+    ENHANCED_PROMPT_FOCUS = (
+        "1. Key character relationships and their significance",
+        "2. Community dynamics and interactions",
+        "3. Character roles and their impact on the network",
+        "4. Network evolution across works",
+        "5. Recommendations for further analysis"
+    )
+    
     def __init__(self):
         super().__init__("network")
         self.system_prompt = """You are an expert in analyzing character networks and relationships in science fiction, comics, and RPG content.
 Your task is to provide insights about character interactions, relationship patterns, and network dynamics."""
+        # "louvain" finds modularity communities; "components" groups connected characters
+        self.community_method = "louvain"
+        self.community_seed = 42  # Fixed so repeated analyses agree
+        self.betweenness_sample_size = 500  # Sample pivots above this many characters
+        self.network_cache = {}  # works digest -> ((network, csr, algorithmic analysis), timestamp)
+        self.network_cache_ttl = 3600  # 1 hour cache TTL
+        self.network_cache_size = 128
     
     async def analyze_network(
         self,
         works: List[Dict[str, Any]],
         analysis_type: str = "relationships",
         model: Optional[str] = None,
-        enhanced: bool = False
+        enhanced: bool = False,
+        visualization: bool = False
     ) -> Dict[str, Any]:
-        """Analyze character networks using both algorithmic analysis and LLM insights."""
+        """Analyze character networks using both algorithmic analysis and LLM insights.
+        
+        Nodes, edges and community members are only included in the visualization
+        data when ``visualization`` is set; otherwise it carries just the metrics.
+        """
         if not works:
             raise ValueError("At least one work is required for network analysis")
         
-        # Build the network
-        network = self._build_network(works)
-        
-        # Perform algorithmic analysis
-        algorithmic_analysis = self._perform_algorithmic_analysis(network)
+        # Build the network and perform algorithmic analysis, reusing identical inputs
+        network, csr, algorithmic_analysis = self._analyze_structure(works)
         
         # Generate LLM insights
         llm_analysis = await self._generate_llm_insights(
@@ -44,11 +192,39 @@ Your task is to provide insights about character interactions, relationship patt
         analysis = {
             "algorithmic_analysis": algorithmic_analysis,
             "llm_insights": llm_analysis,
-            "visualization_data": self._prepare_visualization_data(network, algorithmic_analysis)
+            "visualization_data": self._prepare_visualization_data(
+                network, algorithmic_analysis, csr, visualization=visualization
+            )
         }
         
         return analysis
     
+    def serialize_analysis(self, analysis: Dict[str, Any]) -> bytes:
+        """Serialize an analyze_network result to JSON bytes, converting community sets."""
+        return _dump_json(analysis)
+    
+    def _analyze_structure(self, works: List[Dict[str, Any]]) -> tuple:
+        """Build the network and its algorithmic analysis, cached by the content of the works."""
+        cache_key = hashlib.blake2b(_dump_json(works, sort_keys=True), digest_size=16).digest()
+        if cache_key in self.network_cache:
+            (network, csr, algorithmic_analysis), timestamp = self.network_cache[cache_key]
+            if (datetime.now() - timestamp).total_seconds() < self.network_cache_ttl:
+                # Mark as recently used; the analysis is returned to callers, so hand out a copy
+                self.network_cache[cache_key] = self.network_cache.pop(cache_key)
+                return network, csr, copy.deepcopy(algorithmic_analysis)
+            del self.network_cache[cache_key]
+        
+        network = self._build_network(works)
+        csr = self._build_csr(network)
+        algorithmic_analysis = self._perform_algorithmic_analysis(network, csr)
+        
+        # Evict the least recently used entry once the cache is full
+        if len(self.network_cache) >= self.network_cache_size:
+            del self.network_cache[next(iter(self.network_cache))]
+        self.network_cache[cache_key] = ((network, csr, copy.deepcopy(algorithmic_analysis)), datetime.now())
+        
+        return network, csr, algorithmic_analysis
+    
     def _build_network(self, works: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
         """Build a character network from the works."""
         network = defaultdict(lambda: {"connections": set(), "attributes": {}})
@@ -58,36 +234,75 @@ Your task is to provide insights about character interactions, relationship patt
                 continue
                 
             characters = work["characters"]
+            work_attributes = {
+                "work": work.get("title", "Unknown"),
+                "year": work.get("year", "Unknown")
+            }
             for character in characters:
-                char_name = character.get("name", "Unknown")
+                # Interned names make dict and set probes identity compares
+                char_name = sys.intern(character.get("name", "Unknown"))
                 
                 # Add character attributes
-                network[char_name]["attributes"].update({
-                    "role": character.get("role", "Unknown"),
-                    "work": work.get("title", "Unknown"),
-                    "year": work.get("year", "Unknown")
-                })
+                attributes = network[char_name]["attributes"]
+                attributes["role"] = character.get("role", "Unknown")
+                attributes.update(work_attributes)
                 
                 # Add connections
                 if "relationships" in character:
                     for rel in character["relationships"]:
-                        target = rel.get("target", "Unknown")
+                        target = sys.intern(rel.get("target", "Unknown"))
                         if target != char_name:  # Avoid self-connections
                             network[char_name]["connections"].add(target)
                             network[target]["connections"].add(char_name)
         
         return network
     
+    def _build_csr(self, network: Dict[str, Dict[str, Any]]) -> CSRNetwork:
+        """Flatten the dict-of-sets network into CSR arrays for array-based passes."""
+        names = list(network)
+        index = {name: i for i, name in enumerate(names)}
+        
+        degrees = np.fromiter((len(data["connections"]) for data in network.values()), dtype=np.int64, count=len(names))
+        indptr = np.zeros(len(names) + 1, dtype=np.int64)
+        np.cumsum(degrees, out=indptr[1:])
+        
+        # Rows are filled in node order, so the edge list is already sorted by source
+        indices = np.fromiter(
+            (index[target] for data in network.values() for target in data["connections"]),
+            dtype=np.int32,
+            count=int(indptr[-1])
+        )
+        csr = CSRNetwork(names, index, indptr, indices)
+        
+        # Renumber so neighbours sit close together and traversals stay cache-local
+        return csr.permute(_reverse_cuthill_mckee(indptr, indices, len(names)))
+    
+    def _build_graph(self, network: Dict[str, Dict[str, Any]]) -> nx.Graph:
+        """Build a NetworkX graph from the character network."""
+        graph = nx.Graph()
+        graph.add_nodes_from(network)
+        graph.add_edges_from(
+            (char, target)
+            for char, data in network.items()
+            for target in data["connections"]
+        )
+        return graph
+    
     def _perform_algorithmic_analysis(
         self,
-        network: Dict[str, Dict[str, Any]]
+        network: Dict[str, Dict[str, Any]],
+        csr: Optional[CSRNetwork] = None,
+        top_k: int = 5
     ) -> Dict[str, Any]:
         """Perform algorithmic analysis of the network."""
+        if csr is None:
+            csr = self._build_csr(network)
+        graph = self._build_graph(network)
         analysis = {
-            "network_metrics": self._calculate_network_metrics(network),
-            "central_characters": self._identify_central_characters(network),
-            "communities": self._identify_communities(network),
-            "relationship_patterns": self._analyze_relationship_patterns(network)
+            "network_metrics": self._calculate_network_metrics(csr),
+            "central_characters": self._identify_central_characters(graph, top_k),
+            "communities": self._identify_communities(csr, graph),
+            "relationship_patterns": self._analyze_relationship_patterns(network, csr)
         }
         
         return analysis
@@ -127,45 +342,38 @@ Your task is to provide insights about character interactions, relationship patt
         enhanced: bool
     ) -> str:
         """Create a prompt for LLM analysis."""
-        prompt_parts = [
-            "Analyze the following character network:",
-            "\nWorks:",
-            *[f"- {work.get('title', 'Untitled')}" for work in works],
-            "\nNetwork Metrics:",
-            f"- Total Characters: {algorithmic_analysis['network_metrics']['total_characters']}",
-            f"- Average Connections: {algorithmic_analysis['network_metrics']['avg_connections']:.2f}",
-            f"- Network Density: {algorithmic_analysis['network_metrics']['density']:.2f}",
-            "\nCentral Characters:",
-            *[f"- {char}" for char in algorithmic_analysis['central_characters'][:5]],
-            "\nCommunities:",
-            *[f"- Community {i+1}: {len(comm)} characters" for i, comm in enumerate(algorithmic_analysis['communities'][:3])],
-            "\nPlease provide insights about:"
-        ]
+        metrics = algorithmic_analysis['network_metrics']
+        lines = itertools.chain(
+            ("Analyze the following character network:", "\nWorks:"),
+            (f"- {work.get('title', 'Untitled')}" for work in works),
+            (
+                "\nNetwork Metrics:",
+                f"- Total Characters: {metrics['total_characters']}",
+                f"- Average Connections: {metrics['avg_connections']:.2f}",
+                f"- Network Density: {metrics['density']:.2f}",
+                "\nCentral Characters:"
+            ),
+            (f"- {char}" for char in algorithmic_analysis['central_characters'][:5]),
+            ("\nCommunities:",),
+            (f"- Community {i+1}: {len(comm)} characters" for i, comm in enumerate(algorithmic_analysis['communities'][:3])),
+            ("\nPlease provide insights about:",),
+            self.ENHANCED_PROMPT_FOCUS if enhanced else self.PROMPT_FOCUS
+        )
         
-        if enhanced:
-            prompt_parts.extend([
-                "1. Key character relationships and their significance",
-                "2. Community dynamics and interactions",
-                "3. Character roles and their impact on the network",
-                "4. Network evolution across works",
-                "5. Recommendations for further analysis"
-            ])
-        else:
-            prompt_parts.extend([
-                "1. Main character relationships",
-                "2. Community structure",
-                "3. Character roles",
-                "4. Network patterns"
-            ])
-        
-        return "\n".join(prompt_parts)
+        return "\n".join(lines)
     
     def _prepare_visualization_data(
         self,
         network: Dict[str, Dict[str, Any]],
-        analysis: Dict[str, Any]
+        analysis: Dict[str, Any],
+        csr: Optional[CSRNetwork] = None,
+        visualization: bool = True
     ) -> Dict[str, Any]:
-        """Prepare data for visualization."""
+        """Prepare data for visualization, or only the metrics when visualization is off."""
+        if not visualization:
+            return {"metrics": analysis["network_metrics"]}
+        if csr is None:
+            csr = self._build_csr(network)
         visualization_data = {
             "nodes": [],
             "edges": [],
@@ -173,125 +381,136 @@ Your task is to provide insights about character interactions, relationship patt
             "metrics": analysis["network_metrics"]
         }
         
-        # Prepare node data
+        # Prepare node data; community ids are looked up rather than searched for
+        community_ids = self._community_ids(analysis["communities"])
         for char, data in network.items():
+            attributes = data["attributes"]
             visualization_data["nodes"].append({
                 "id": char,
                 "connections": len(data["connections"]),
-                "role": data["attributes"].get("role", "Unknown"),
-                "work": data["attributes"].get("work", "Unknown"),
-                "community": self._get_character_community(char, analysis["communities"])
+                "role": attributes.get("role", "Unknown"),
+                "work": attributes.get("work", "Unknown"),
+                "community": community_ids.get(char, 0)
             })
         
         # Prepare edge data
-        for char, data in network.items():
-            for target in data["connections"]:
-                if char < target:  # Avoid duplicate edges
-                    visualization_data["edges"].append({
-                        "source": char,
-                        "target": target
-                    })
+        names = csr.names
+        sources, targets = csr.edges()
+        visualization_data["edges"] = [
+            {"source": names[source], "target": names[target]}
+            for source, target in zip(sources.tolist(), targets.tolist())
+        ]
         
         # Prepare community data
+        densities = self._calculate_community_densities(analysis["communities"], csr)
         for i, community in enumerate(analysis["communities"]):
             visualization_data["communities"].append({
                 "id": i + 1,
                 "size": len(community),
-                "density": self._calculate_community_density(community, network),
-                "characters": list(community)
+                "density": densities[i],
+                "characters": tuple(community)
             })
         
         return visualization_data
     
-    def _calculate_network_metrics(
-        self,
-        network: Dict[str, Dict[str, Any]]
-    ) -> Dict[str, Any]:
-        """Calculate network metrics."""
-        total_characters = len(network)
-        total_connections = sum(len(data["connections"]) for data in network.values()) // 2
-        max_possible_connections = total_characters * (total_characters - 1) // 2
+    def _calculate_network_metrics(self, csr: CSRNetwork) -> Dict[str, Any]:
+        """Calculate network metrics from the edge count recorded while building the CSR."""
+        total_characters = len(csr.names)
+        total_connections = int(csr.indptr[-1]) // 2  # Each edge is stored in both rows
+        possible_connections = total_characters * (total_characters - 1) / 2
         
         return {
             "total_characters": total_characters,
             "total_connections": total_connections,
             "avg_connections": total_connections / total_characters if total_characters > 0 else 0,
-            "density": total_connections / max_possible_connections if max_possible_connections > 0 else 0
+            "density": total_connections / possible_connections if possible_connections > 0 else 0
         }
     
-    def _identify_central_characters(
-        self,
-        network: Dict[str, Dict[str, Any]]
-    ) -> List[str]:
-        """Identify the most central characters in the network."""
-        centrality = {
-            char: len(data["connections"])
-            for char, data in network.items()
-        }
+    def _identify_central_characters(self, graph: nx.Graph, top_k: int = 5) -> List[str]:
+        """Identify the top_k most central characters in the network by betweenness."""
+        k = self.betweenness_sample_size if graph.number_of_nodes() > self.betweenness_sample_size else None
+        centrality = nx.betweenness_centrality(graph, k=k, seed=self.community_seed)
         
-        return sorted(
-            centrality.keys(),
-            key=lambda x: centrality[x],
-            reverse=True
+        # Degree breaks ties, e.g. between characters in fully connected groups
+        return heapq.nlargest(
+            top_k,
+            centrality,
+            key=lambda x: (centrality[x], graph.degree(x))
         )
     
     def _identify_communities(
         self,
-        network: Dict[str, Dict[str, Any]]
+        csr: CSRNetwork,
+        graph: nx.Graph
     ) -> List[Set[str]]:
         """Identify communities in the network."""
-        communities = []
-        visited = set()
-        
-        for char in network:
-            if char not in visited:
-                community = self._find_community(char, network, visited)
-                if len(community) > 1:  # Only include communities with more than one character
-                    communities.append(community)
+        if self.community_method == "louvain":
+            # Dispatches to an installed NetworkX backend such as nx-cugraph when configured
+            communities = nx.community.louvain_communities(graph, seed=self.community_seed)
+        else:
+            communities = self._find_components(csr)
         
-        return sorted(communities, key=len, reverse=True)
+        # Only include communities with more than one character
+        return sorted(
+            (community for community in communities if len(community) > 1),
+            key=len,
+            reverse=True
+        )
     
-    def _find_community(
-        self,
-        start_char: str,
-        network: Dict[str, Dict[str, Any]],
-        visited: Set[str]
-    ) -> Set[str]:
-        """Find all characters connected to a starting character."""
-        community = set()
-        to_visit = {start_char}
-        
-        while to_visit:
-            char = to_visit.pop()
-            if char not in visited:
-                visited.add(char)
-                community.add(char)
-                to_visit.update(network[char]["connections"] - visited)
-        
-        return community
+    def _find_components(self, csr: CSRNetwork) -> List[Set[str]]:
+        """Group characters into connected components."""
+        n = len(csr.names)
+        if n == 0:
+            return []
+        labels = _bfs_components(csr.indptr, csr.indices, n)
+        
+        # Group node ids by label with one stable sort
+        order = np.argsort(labels, kind="stable")
+        boundaries = np.cumsum(np.bincount(labels))[:-1]
+        return [
+            {csr.names[node] for node in members}
+            for members in np.split(order, boundaries)
+        ]
     
     def _calculate_community_density(
         self,
         community: Set[str],
-        network: Dict[str, Dict[str, Any]]
+        csr: CSRNetwork
     ) -> float:
         """Calculate the density of connections within a community."""
         size = len(community)
         if size < 2:
             return 0.0
         
-        connections = sum(
-            1 for char in community
-            for target in network[char]["connections"]
-            if target in community
-        ) // 2
+        return self._calculate_community_densities([community], csr)[0]
+    
+    def _calculate_community_densities(
+        self,
+        communities: List[Set[str]],
+        csr: CSRNetwork
+    ) -> List[float]:
+        """Calculate the density of every (disjoint) community in one pass over the edges."""
+        if not communities:
+            return []
+        
+        labels = np.full(len(csr.names), -1, dtype=np.int64)
+        for i, community in enumerate(communities):
+            labels[[csr.index[char] for char in community]] = i
+        
+        # An edge is internal when both endpoints carry the same community label
+        source_labels = np.repeat(labels, np.diff(csr.indptr))
+        internal = (source_labels >= 0) & (source_labels == labels[csr.indices])
+        connections = np.bincount(source_labels[internal], minlength=len(communities)) // 2
         
-        max_possible = size * (size - 1) // 2
-        return connections / max_possible if max_possible > 0 else 0.0
+        sizes = np.array([len(community) for community in communities])
+        max_possible = sizes * (sizes - 1) // 2
+        densities = np.divide(connections, max_possible, out=np.zeros(len(communities)), where=max_possible > 0)
+        return densities.tolist()
     
     def _analyze_relationship_patterns(
         self,
-        network: Dict[str, Dict[str, Any]]
+        network: Dict[str, Dict[str, Any]],
+        csr: CSRNetwork
     ) -> Dict[str, Any]:
         """Analyze patterns in character relationships."""
         patterns = {
@@ -299,25 +518,21 @@ Your task is to provide insights about character interactions, relationship patt
             "common_roles": defaultdict(int)
         }
         
-        for char, data in network.items():
-            # Count role occurrences
+        # Count role occurrences
+        for data in network.values():
             role = data["attributes"].get("role", "Unknown")
             patterns["common_roles"][role] += 1
-            
-            # Count relationship types
-            for target in data["connections"]:
-                if char < target:  # Avoid counting twice
-                    patterns["relationship_types"]["connection"] += 1
+        
+        # Count relationship types; each undirected edge is stored twice in the CSR
+        if len(csr.indices):
+            patterns["relationship_types"]["connection"] = len(csr.indices) // 2
         
         return patterns
     
-    def _get_character_community(
-        self,
-        character: str,
-        communities: List[Set[str]]
-    ) -> int:
-        """Get the community ID for a character."""
-        for i, community in enumerate(communities):
-            if character in community:
-                return i + 1
-        return 0 
\ No newline at end of file
+    def _community_ids(self, communities: List[Set[str]]) -> Dict[str, int]:
+        """Map each character to its 1-based community ID."""
+        return {
+            character: i + 1
+            for i, community in enumerate(communities)
+            for character in community
+        }
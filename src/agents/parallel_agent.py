@@ -1,7 +1,12 @@
-from typing import Type, Any, Dict, List, Optional
+from typing import Awaitable, Callable, Type, Any, Dict, List, Optional
+from collections import OrderedDict
 from datetime import datetime
 import asyncio
+import copy
+import hashlib
+import pickle
 import logging
+import time
 from ..core.parallel_monitor import ParallelMonitor
 from ..core.result_comparator import ResultComparator
 from .base_agent import BaseAgent
@@ -10,25 +15,36 @@ logger = logging.getLogger(__name__)
 
 class ParallelConfig:
     """Configuration for parallel execution"""
+    __slots__ = ("max_retries", "timeout", "cache_ttl", "cache_size", "max_instances", "decision_interval")
+
     def __init__(
         self,
         max_retries: int = 3,
         timeout: int = 30,
-        cache_ttl: int = 3600
+        cache_ttl: int = 3600,
+        cache_size: int = 1024,
+        max_instances: int = 32,
+        decision_interval: int = 10
     ):
         self.max_retries = max_retries
         self.timeout = timeout
         self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.max_instances = max_instances
+        self.decision_interval = decision_interval
 
 class ParallelAgentFactory:
     """Factory for managing parallel agent instances"""
     def __init__(self, config: ParallelConfig):
         self.config = config
         self.agent_classes: Dict[str, tuple[Type[BaseAgent], Type[BaseAgent]]] = {}
-        self.instances: Dict[str, tuple[BaseAgent, BaseAgent]] = {}
+        self.instances: OrderedDict[str, tuple[BaseAgent, BaseAgent]] = OrderedDict()
         self.monitor = ParallelMonitor()
         self.comparator = ResultComparator()
-        self.cache: Dict[str, tuple[datetime, Any]] = {}
+        self.cache: OrderedDict[tuple, tuple[datetime, Any]] = OrderedDict()
+        # Cached _should_use_mcp answer and the call count it was computed at
+        self._use_mcp: Optional[bool] = None
+        self._use_mcp_calls = 0
         logger.info("Initialized ParallelAgentFactory")
 
     def register_agent_class(
@@ -38,25 +54,34 @@ class ParallelAgentFactory:
         mcp_class: Type[BaseAgent]
     ):
         """Register agent classes for parallel execution"""
-        logger.info(f"Registering agent classes for {name}")
-        logger.info(f"Original class: {original_class.__name__}")
-        logger.info(f"MCP class: {mcp_class.__name__}")
+        logger.info(
+            "Registering agent classes for %s: original %s, MCP %s",
+            name, original_class.__name__, mcp_class.__name__
+        )
         self.agent_classes[name] = (original_class, mcp_class)
 
     def _get_instances(self, name: str) -> tuple[BaseAgent, BaseAgent]:
-        """Get or create agent instances"""
-        logger.info(f"Getting instances for {name}")
-        if name not in self.instances:
-            logger.info(f"Creating new instances for {name}")
-            original_class, mcp_class = self.agent_classes[name]
-            try:
-                original_instance = original_class()
-                mcp_instance = mcp_class()
-                logger.info(f"Created instances with types: {original_instance.agent_type}, {mcp_instance.agent_type}")
-                self.instances[name] = (original_instance, mcp_instance)
-            except Exception as e:
-                logger.error(f"Error creating instances: {str(e)}")
-                raise
+        """Get or lazily create agent instances, keeping only the most recently used pairs"""
+        if name in self.instances:
+            self.instances.move_to_end(name)
+            return self.instances[name]
+
+        logger.debug("Creating new instances for %s", name)
+        original_class, mcp_class = self.agent_classes[name]
+        try:
+            original_instance = original_class()
+            mcp_instance = mcp_class()
+            logger.debug(
+                "Created instances with types: %s, %s",
+                original_instance.agent_type, mcp_instance.agent_type
+            )
+        except Exception as e:
+            logger.error("Error creating instances: %s", e)
+            raise
+        self.instances[name] = (original_instance, mcp_instance)
+        # Evicted pairs stay alive for any call still holding them
+        if len(self.instances) > self.config.max_instances:
+            self.instances.popitem(last=False)
         return self.instances[name]
 
     async def execute_parallel(
@@ -67,43 +92,110 @@ class ParallelAgentFactory:
         **kwargs
     ) -> Dict[str, Any]:
         """Execute both versions in parallel"""
-        logger.info(f"Executing parallel for {agent_name}.{method_name}")
+        logger.debug("Executing parallel for %s.%s", agent_name, method_name)
+        cache_key = self._cache_key("parallel", agent_name, method_name, args, kwargs)
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
         original_agent, mcp_agent = self._get_instances(agent_name)
-        
-        async def run_original():
-            try:
-                logger.info(f"Running original version of {agent_name}")
-                result = await getattr(original_agent, method_name)(*args, **kwargs)
-                self.monitor.track_call("original", True)
-                return result
-            except Exception as e:
-                logger.error(f"Error in original version: {str(e)}")
-                self.monitor.track_call("original", False, str(e))
-                return None
-
-        async def run_mcp():
-            try:
-                logger.info(f"Running MCP version of {agent_name}")
-                result = await getattr(mcp_agent, method_name)(*args, **kwargs)
-                self.monitor.track_call("mcp", True)
-                return result
-            except Exception as e:
-                logger.error(f"Error in MCP version: {str(e)}")
-                self.monitor.track_call("mcp", False, str(e))
-                return None
+        original_method = getattr(original_agent, method_name)
+        mcp_method = getattr(mcp_agent, method_name)
 
         # Run both versions in parallel
-        logger.info("Starting parallel execution")
-        original_result, mcp_result = await asyncio.gather(
-            run_original(),
-            run_mcp(),
-            return_exceptions=False
-        )
+        async with asyncio.TaskGroup() as group:
+            original_task = group.create_task(
+                self._run_version("original", original_method, *args, **kwargs)
+            )
+            mcp_task = group.create_task(
+                self._run_version("mcp", mcp_method, *args, **kwargs)
+            )
 
-        return {
-            "original": original_result,
-            "mcp": mcp_result
+        results = {
+            "original": original_task.result(),
+            "mcp": mcp_task.result()
         }
+        # Only complete A/B runs are worth replaying
+        if None not in results.values():
+            self._set_cached(cache_key, results)
+        return results
+
+    def _cache_key(
+        self,
+        mode: str,
+        agent_name: str,
+        method_name: str,
+        args: tuple,
+        kwargs: Dict[str, Any]
+    ) -> Optional[tuple]:
+        """Build a result cache key, or None when the arguments cannot be pickled"""
+        try:
+            digest = hashlib.blake2b(pickle.dumps((args, kwargs)), digest_size=16).digest()
+        except Exception:
+            return None
+        return (mode, agent_name, method_name, digest)
+
+    def _get_cached(self, key: Optional[tuple]) -> Any:
+        """Return a copy of a fresh cached result, or None"""
+        if key is None or key not in self.cache:
+            return None
+        timestamp, result = self.cache[key]
+        if (datetime.now() - timestamp).total_seconds() >= self.config.cache_ttl:
+            del self.cache[key]
+            return None
+        self.cache.move_to_end(key)
+        return copy.deepcopy(result)
+
+    def _set_cached(self, key: Optional[tuple], result: Any) -> None:
+        """Store a result, evicting the least recently used entry when full"""
+        if key is None:
+            return
+        self.cache[key] = (datetime.now(), copy.deepcopy(result))
+        self.cache.move_to_end(key)
+        if len(self.cache) > self.config.cache_size:
+            self.cache.popitem(last=False)
+
+    async def _run_version(
+        self,
+        version: str,
+        method: Callable[..., Awaitable[Any]],
+        *args,
+        **kwargs
+    ) -> Any:
+        """Run one version's bound method with the configured timeout, tracking success and latency"""
+        track = self.monitor.track_call
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(method(*args, **kwargs), timeout=self.config.timeout)
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            logger.error("Error in %s version: %s", version, error)
+            track(version, False, error, time.perf_counter() - start)
+            return None
+        track(version, True, execution_time=time.perf_counter() - start)
+        return result
+
+    async def _execute_hedged(
+        self,
+        agent_name: str,
+        method_name: str,
+        *args,
+        **kwargs
+    ) -> Any:
+        """Start both versions, return the preferred one's result and cancel the other"""
+        original_agent, mcp_agent = self._get_instances(agent_name)
+        original = ("original", getattr(original_agent, method_name))
+        mcp = ("mcp", getattr(mcp_agent, method_name))
+        preferred, fallback = (mcp, original) if self._should_use_mcp(agent_name) else (original, mcp)
+
+        async with asyncio.TaskGroup() as group:
+            preferred_task = group.create_task(self._run_version(*preferred, *args, **kwargs))
+            fallback_task = group.create_task(self._run_version(*fallback, *args, **kwargs))
+            result = await preferred_task
+            if result is not None:
+                fallback_task.cancel()
+
+        # The fallback only answers when the preferred version failed or timed out
+        return result if result is not None else fallback_task.result()
 
     async def execute_smart(
         self,
@@ -113,32 +205,46 @@ class ParallelAgentFactory:
         mode: str = "parallel",
         **kwargs
     ) -> Any:
-        """Execute using specified mode"""
+        """Execute using specified mode
+        
+        Modes: "original" or "mcp" run one version, "auto" races both and
+        returns the version preferred by _should_use_mcp, and "parallel"
+        returns both results.
+        """
+        if mode not in ("original", "mcp", "auto"):  # parallel mode caches itself
+            return await self.execute_parallel(agent_name, method_name, *args, **kwargs)
+        
+        cache_key = self._cache_key(mode, agent_name, method_name, args, kwargs)
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
         original_agent, mcp_agent = self._get_instances(agent_name)
         
         if mode == "original":
-            try:
-                result = await getattr(original_agent, method_name)(*args, **kwargs)
-                self.monitor.track_call("original", True)
-                return result
-            except Exception as e:
-                self.monitor.track_call("original", False, str(e))
-                return None
+            result = await self._run_version("original", getattr(original_agent, method_name), *args, **kwargs)
         elif mode == "mcp":
-            try:
-                result = await getattr(mcp_agent, method_name)(*args, **kwargs)
-                self.monitor.track_call("mcp", True)
-                return result
-            except Exception as e:
-                self.monitor.track_call("mcp", False, str(e))
-                return None
-        else:  # parallel mode
-            return await self.execute_parallel(agent_name, method_name, *args, **kwargs)
+            result = await self._run_version("mcp", getattr(mcp_agent, method_name), *args, **kwargs)
+        else:
+            result = await self._execute_hedged(agent_name, method_name, *args, **kwargs)
+        
+        if result is not None:
+            self._set_cached(cache_key, result)
+        return result
 
     def _should_use_mcp(self, agent_name: str) -> bool:
-        """Determine whether to use MCP version based on performance metrics"""
-        metrics = self.monitor.get_metrics()
+        """Determine whether to use MCP version, re-deciding every decision_interval tracked calls"""
+        calls = self.monitor.metrics["calls"]
+        total_calls = calls["original"] + calls["mcp"]
+        # A negative gap means the monitor was reset
+        if self._use_mcp is not None and 0 <= total_calls - self._use_mcp_calls < self.config.decision_interval:
+            return self._use_mcp
         
+        self._use_mcp = self._decide_use_mcp(self.monitor.metrics)
+        self._use_mcp_calls = total_calls
+        return self._use_mcp
+
+    def _decide_use_mcp(self, metrics: Dict[str, Any]) -> bool:
+        """Determine whether to use MCP version based on performance metrics"""
         # If no data, prefer MCP version
         if not metrics["calls"]["original"] and not metrics["calls"]["mcp"]:
             return True
@@ -1,10 +1,8 @@
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, Optional
 from .base_agent import BaseAgent
 
-class RPGAgent(BaseAgent):
-    def __init__(self):
-        super().__init__("rpg")
-        self.system_prompt = """You are an expert in tabletop role-playing games (RPGs). 
+# Shared by every instance rather than rebuilt in each __init__
+_SYSTEM_PROMPT = """You are an expert in tabletop role-playing games (RPGs). 
 Your task is to analyze RPG content and provide insights about:
 1. Game mechanics and systems
 2. World-building and setting
@@ -21,6 +19,30 @@ Your task is to analyze RPG content and provide insights about:
 
 Provide detailed analysis while maintaining a professional and insightful tone."""
 
+_MCP_SYSTEM_PROMPT = """You are an expert in role-playing games with enhanced analytical capabilities. 
+Your task is to analyze RPG content and provide detailed insights about:
+1. Game mechanics and system design
+2. Character creation and progression systems
+3. Combat and conflict resolution mechanics
+4. World-building and setting development
+5. Narrative structure and storytelling techniques
+6. Player agency and choice impact
+7. Balance and game economy
+8. Rules clarity and accessibility
+9. Innovation and unique mechanics
+10. Integration of theme and mechanics
+11. Technical execution and production quality
+12. Player experience and engagement
+13. Community impact and reception
+14. Historical context and evolution
+
+Provide comprehensive analysis while maintaining a professional and insightful tone. Include specific examples and references where relevant."""
+
+class RPGAgent(BaseAgent):
+    def __init__(self):
+        super().__init__("rpg")
+        self.system_prompt = _SYSTEM_PROMPT
+
     async def analyze_content(
         self,
         content: str,
@@ -50,6 +72,19 @@ Provide detailed analysis while maintaining a professional and insightful tone."
             
         return analysis
 
+    async def stream_content(
+        self,
+        content: str,
+        model: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """Yield the RPG analysis text as it is generated"""
+        async for text in self._stream_analysis(
+            content=content,
+            system_prompt=self.system_prompt,
+            model=model
+        ):
+            yield text
+
     async def get_recommendations(
         self,
         based_on: str,
@@ -102,21 +137,4 @@ class MCPEnabledRPGAgent(RPGAgent):
     def __init__(self):
         super().__init__()
         self.agent_type = "rpg_mcp"
-        self.system_prompt = """You are an expert in role-playing games with enhanced analytical capabilities. 
-Your task is to analyze RPG content and provide detailed insights about:
-1. Game mechanics and system design
-2. Character creation and progression systems
-3. Combat and conflict resolution mechanics
-4. World-building and setting development
-5. Narrative structure and storytelling techniques
-6. Player agency and choice impact
-7. Balance and game economy
-8. Rules clarity and accessibility
-9. Innovation and unique mechanics
-10. Integration of theme and mechanics
-11. Technical execution and production quality
-12. Player experience and engagement
-13. Community impact and reception
-14. Historical context and evolution
-
-Provide comprehensive analysis while maintaining a professional and insightful tone. Include specific examples and references where relevant.""" 
\ No newline at end of file
+        self.system_prompt = _MCP_SYSTEM_PROMPT 
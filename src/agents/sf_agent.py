@@ -1,4 +1,4 @@
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, Optional
 from .base_agent import BaseAgent
 
 class ScienceFictionAgent(BaseAgent):
@@ -18,6 +18,8 @@ Your task is to analyze science fiction content and provide insights about:
 10. Potential influences and inspirations
 
 Provide detailed analysis while maintaining a professional and insightful tone."""
+        # Static prefix, marked so providers can cache it across calls
+        self._system_blocks = [self._text_block(self.system_prompt, cacheable=True)]
 
     async def analyze_content(
         self,
@@ -29,7 +31,7 @@ Provide detailed analysis while maintaining a professional and insightful tone."
     ) -> Dict[str, Any]:
         analysis = await self._get_analysis(
             content=content,
-            system_prompt=self.system_prompt,
+            system_prompt=self._system_blocks,
             model=model
         )
         
@@ -42,6 +44,19 @@ Provide detailed analysis while maintaining a professional and insightful tone."
             
         return analysis
 
+    async def stream_content(
+        self,
+        content: str,
+        model: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """Yield the science fiction analysis text as it is generated"""
+        async for text in self._stream_analysis(
+            content=content,
+            system_prompt=self._system_blocks,
+            model=model
+        ):
+            yield text
+
     async def get_recommendations(
         self,
         based_on: str,
@@ -80,6 +95,8 @@ class MCPEnabledScienceFictionAgent(BaseAgent):
 10. Historical context and influence tracing
 
 Provide comprehensive, data-driven analysis while maintaining a professional and insightful tone."""
+        # Static prefix, marked so providers can cache it across calls
+        self._system_blocks = [self._text_block(self.system_prompt, cacheable=True)]
 
     async def analyze_content(
         self,
@@ -89,18 +106,21 @@ Provide comprehensive, data-driven analysis while maintaining a professional and
         year: Optional[int] = None,
         model: Optional[str] = None,
     ) -> Dict[str, Any]:
-        # Enhanced analysis with additional context
-        enhanced_prompt = self.system_prompt
+        # Enhanced analysis with additional context, kept after the cached static prefix
+        context = []
         if title:
-            enhanced_prompt += f"\nTitle: {title}"
+            context.append(f"Title: {title}")
         if author:
-            enhanced_prompt += f"\nAuthor: {author}"
+            context.append(f"Author: {author}")
         if year:
-            enhanced_prompt += f"\nYear: {year}"
+            context.append(f"Year: {year}")
+        system_blocks = self._system_blocks
+        if context:
+            system_blocks = [*system_blocks, self._text_block("\n".join(context))]
             
         analysis = await self._get_analysis(
             content=content,
-            system_prompt=enhanced_prompt,
+            system_prompt=system_blocks,
             model=model
         )
         
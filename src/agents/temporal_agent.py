@@ -1,7 +1,11 @@
 from typing import Dict, Any, List, Optional
 from .base_agent import BaseAgent
 from ..context.historical_context import HistoricalContext
+from collections import Counter, defaultdict
+import asyncio
+import json
 import logging
+import numpy as np
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -12,6 +16,9 @@ class TemporalAnalysisAgent(BaseAgent):
     def __init__(self):
         super().__init__("temporal")
         self.historical_context = HistoricalContext()
+        self.historical_context_cache: Dict[int, tuple] = {}  # decade -> (historical context, timestamp)
+        self.historical_context_cache_ttl = 86400  # 24 hour cache TTL
+        self._historical_context_lookups: Dict[int, asyncio.Task] = {}  # decade -> lookup in flight
         self.system_prompt = """You are an expert in analyzing the evolution of science fiction, comics, and RPG content across time periods.
 Your task is to provide insights about how works evolve over time, identifying patterns, trends, and significant changes in themes, styles, and innovations."""
     
@@ -27,7 +34,7 @@ Your task is to provide insights about how works evolve over time, identifying p
             raise ValueError("At least one work is required for temporal analysis")
         
         # Perform algorithmic analysis
-        algorithmic_analysis = self._perform_algorithmic_analysis(works)
+        algorithmic_analysis = await self._perform_algorithmic_analysis(works)
         
         # Generate LLM insights
         llm_analysis = await self._generate_llm_insights(
@@ -47,26 +54,20 @@ Your task is to provide insights about how works evolve over time, identifying p
         
         return analysis
     
-    def _perform_algorithmic_analysis(self, works: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def _perform_algorithmic_analysis(self, works: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Perform algorithmic analysis of temporal patterns."""
-        # Sort works by year
-        sorted_works = sorted(
-            [w for w in works if w.get("year")],
-            key=lambda x: x.get("year", 0)
-        )
-        
-        if not sorted_works:
+        dated_works = [w for w in works if w.get("year")]
+        if not dated_works:
             raise ValueError("No works with valid years found for temporal analysis")
         
-        # Group works by decade
-        works_by_decade = {}
-        for work in sorted_works:
-            year = work.get("year")
-            if year:
-                decade = (year // 10) * 10
-                if decade not in works_by_decade:
-                    works_by_decade[decade] = []
-                works_by_decade[decade].append(work)
+        # Sort works by year, then group them by decade with one split of the sorted order
+        years = np.fromiter((w["year"] for w in dated_works), dtype=np.int64, count=len(dated_works))
+        order = np.argsort(years, kind="stable")
+        decades, starts = np.unique((years[order] // 10) * 10, return_index=True)
+        works_by_decade = {
+            decade: [dated_works[i] for i in members]
+            for decade, members in zip(decades.tolist(), np.split(order, starts[1:]))
+        }
         
         # Analyze patterns
         patterns = {
@@ -75,18 +76,41 @@ Your task is to provide insights about how works evolve over time, identifying p
             "historical_context": {}
         }
         
-        # Analyze each decade
+        # Analyze each decade while the historical context lookups run concurrently
+        contexts = asyncio.gather(*(
+            self._get_historical_context(decade) for decade in works_by_decade
+        ))
         for decade, decade_works in works_by_decade.items():
             patterns["decade_analysis"][decade] = self._analyze_decade(decade_works)
-            patterns["historical_context"][decade] = self.historical_context.get_historical_context(
-                year=decade
-            )
+        patterns["historical_context"] = dict(zip(works_by_decade, await contexts))
         
         # Identify evolution trends
         patterns["evolution_trends"] = self._identify_evolution_trends(patterns["decade_analysis"])
         
         return patterns
     
+    async def _get_historical_context(self, decade: int) -> Any:
+        """Get the historical context of a decade; concurrent requests for a decade share one lookup."""
+        if decade in self.historical_context_cache:
+            context, timestamp = self.historical_context_cache[decade]
+            if (datetime.now() - timestamp).total_seconds() < self.historical_context_cache_ttl:
+                return context
+            del self.historical_context_cache[decade]
+        
+        lookup = self._historical_context_lookups.get(decade)
+        if lookup is None:
+            lookup = asyncio.create_task(self._lookup_historical_context(decade))
+            self._historical_context_lookups[decade] = lookup
+            lookup.add_done_callback(lambda _: self._historical_context_lookups.pop(decade, None))
+        # Shielded so one cancelled caller does not cancel the lookup for the others
+        return await asyncio.shield(lookup)
+    
+    async def _lookup_historical_context(self, decade: int) -> Any:
+        """Look up and cache the historical context of a decade."""
+        context = await asyncio.to_thread(self.historical_context.get_historical_context, year=decade)
+        self.historical_context_cache[decade] = (context, datetime.now())
+        return context
+    
     async def _generate_llm_insights(
         self,
         works: List[Dict[str, Any]],
@@ -119,14 +143,23 @@ Your task is to provide insights about how works evolve over time, identifying p
         enhanced: bool
     ) -> str:
         """Create a prompt for LLM analysis."""
+        # Summaries are sent as compact JSON rather than dict reprs to keep the prompt short
+        decade_summary = {
+            decade: {"works": data["work_count"], "themes": data["common_themes"]}
+            for decade, data in algorithmic_analysis["decade_analysis"].items()
+        }
+        context_summary = {
+            decade: context.splitlines()[0] if isinstance(context, str) and context else context
+            for decade, context in algorithmic_analysis["historical_context"].items()
+        }
         prompt_parts = [
             "Analyze the following works and their evolution over time:",
             "\nWorks:",
             *[f"- {work.get('title', 'Untitled')} ({work.get('year', 'Unknown')})" for work in works],
             "\nAlgorithmic Analysis:",
-            f"- Decade Analysis: {algorithmic_analysis['decade_analysis']}",
-            f"- Evolution Trends: {algorithmic_analysis['evolution_trends']}",
-            f"- Historical Context: {algorithmic_analysis['historical_context']}",
+            f"- Decade Analysis: {self._compact_json(decade_summary)}",
+            f"- Evolution Trends: {self._compact_json(algorithmic_analysis['evolution_trends'])}",
+            f"- Historical Context: {self._compact_json(context_summary)}",
             "\nPlease provide insights about:"
         ]
         
@@ -148,6 +181,11 @@ Your task is to provide insights about how works evolve over time, identifying p
         
         return "\n".join(prompt_parts)
     
+    @staticmethod
+    def _compact_json(value: Any) -> str:
+        """Serialize a prompt section as JSON without optional whitespace."""
+        return json.dumps(value, separators=(",", ":"), default=str)
+    
     def _prepare_visualization_data(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
         """Prepare data for visualization."""
         visualization_data = {
@@ -156,41 +194,37 @@ Your task is to provide insights about how works evolve over time, identifying p
             "metrics": {}
         }
         
-        # Prepare timeline data
+        # Prepare timeline data, totalling works and themes in the same pass
+        total_works = 0
+        themes_seen = set()
         for decade, decade_data in analysis["decade_analysis"].items():
+            decade_themes = [theme[0] for theme in decade_data["common_themes"]]
             visualization_data["timeline"].append({
                 "decade": decade,
                 "work_count": decade_data["work_count"],
-                "themes": [theme[0] for theme in decade_data["common_themes"]],
+                "themes": decade_themes,
                 "historical_context": analysis["historical_context"][decade]
             })
+            total_works += decade_data["work_count"]
+            themes_seen.update(decade_themes)
         
         # Prepare theme evolution data
-        theme_evolution = {}
+        theme_evolution = defaultdict(list)
         for trend in analysis["evolution_trends"]:
             period = trend["period"]
             for theme_type, themes in trend["theme_evolution"].items():
-                if theme_type not in theme_evolution:
-                    theme_evolution[theme_type] = []
                 theme_evolution[theme_type].append({
                     "period": period,
                     "themes": themes
                 })
         
-        visualization_data["themes"] = theme_evolution
+        visualization_data["themes"] = dict(theme_evolution)
         
         # Calculate metrics
         visualization_data["metrics"] = {
-            "total_works": sum(
-                data["work_count"]
-                for data in analysis["decade_analysis"].values()
-            ),
+            "total_works": total_works,
             "decade_count": len(analysis["decade_analysis"]),
-            "theme_count": len(set(
-                theme
-                for decade_data in analysis["decade_analysis"].values()
-                for theme, _ in decade_data["common_themes"]
-            ))
+            "theme_count": len(themes_seen)
         }
         
         return visualization_data
@@ -205,17 +239,13 @@ Your task is to provide insights about how works evolve over time, identifying p
         }
         
         # Extract common themes
-        themes = {}
-        for work in works:
-            if "themes" in work:
-                for theme in work["themes"]:
-                    themes[theme] = themes.get(theme, 0) + 1
-        
-        analysis["common_themes"] = sorted(
-            themes.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:5]
+        themes = Counter(
+            theme
+            for work in works
+            if "themes" in work
+            for theme in work["themes"]
+        )
+        analysis["common_themes"] = themes.most_common(5)
         
         return analysis
     
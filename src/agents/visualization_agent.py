@@ -1,18 +1,37 @@
-from typing import Dict, Any, List, Optional
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
 from .base_agent import BaseAgent
 import logging
 import json
 import base64
+import hashlib
 from io import BytesIO
-import matplotlib.pyplot as plt
-import networkx as nx
-import seaborn as sns
+import asyncio
+import functools
+import threading
 import numpy as np
 import os
 from datetime import datetime
 
+# matplotlib, seaborn and networkx are slow to import, so they load on first render
+if TYPE_CHECKING:
+    import networkx as nx
+    from matplotlib.figure import Figure
+
 logger = logging.getLogger(__name__)
 
+@functools.lru_cache(maxsize=None)
+def _load_matplotlib():
+    """Import matplotlib, rendering headless; no GUI toolkit is needed server-side."""
+    import matplotlib
+    matplotlib.use("Agg")
+    return matplotlib
+
+def _new_figure(figsize: tuple) -> "Figure":
+    """Create a standalone figure; pyplot's global state is not thread-safe."""
+    _load_matplotlib()
+    from matplotlib.figure import Figure
+    return Figure(figsize=figsize)
+
 class VisualizationAgent(BaseAgent):
     """Agent for generating visualizations from analysis data."""
     
@@ -22,6 +41,11 @@ class VisualizationAgent(BaseAgent):
 Your task is to generate clear and informative visual representations of character networks, temporal patterns, and comparative analysis results."""
         self.output_dir = "visualizations"
         os.makedirs(self.output_dir, exist_ok=True)
+        self.layout_seed = 42  # Fixed so a cached layout matches a fresh one
+        self.layout_cache = {}  # graph digest -> node positions
+        self.layout_cache_size = 128
+        self._layout_lock = threading.Lock()  # Renders run in worker threads
+        self.rasterize_threshold = 500  # Draw larger networks as bitmaps rather than vector paths
     
     async def generate_visualization(
         self,
@@ -31,15 +55,20 @@ Your task is to generate clear and informative visual representations of charact
         enhanced: bool = False,
         save_to_disk: bool = False
     ) -> Dict[str, Any]:
-        """Generate a visualization based on the data and type."""
+        """Generate a visualization based on the data and type.
+        
+        Rendering runs in a worker thread, so several visualizations can be
+        generated concurrently with asyncio.gather.
+        """
         if visualization_type == "network":
-            result = await self._generate_network_visualization(data, format, enhanced)
+            render = self._render_network
         elif visualization_type == "temporal":
-            result = await self._generate_temporal_visualization(data, format, enhanced)
+            render = self._render_temporal
         elif visualization_type == "comparative":
-            result = await self._generate_comparative_visualization(data, format, enhanced)
+            render = self._render_comparative
         else:
             raise ValueError(f"Unsupported visualization type: {visualization_type}")
+        result = await asyncio.to_thread(render, data, format, enhanced)
         
         if save_to_disk:
             self._save_visualization(result, visualization_type)
@@ -61,68 +90,69 @@ Your task is to generate clear and informative visual representations of charact
         logger.info(f"Saved visualization to {filepath}")
         return filepath
     
-    async def _generate_network_visualization(
+    def _render_network(
         self,
         data: Dict[str, Any],
         format: str,
         enhanced: bool
     ) -> Dict[str, Any]:
         """Generate a network visualization."""
-        # Create the graph
-        G = nx.Graph()
+        import networkx as nx
         
-        # Add nodes
-        for node in data["nodes"]:
-            G.add_node(
-                node["id"],
-                connections=node["connections"],
-                role=node["role"],
-                work=node["work"],
-                community=node["community"]
-            )
+        nodes = data["nodes"]
         
-        # Add edges
-        for edge in data["edges"]:
-            G.add_edge(edge["source"], edge["target"])
+        # Create the graph
+        G = nx.Graph()
+        G.add_nodes_from(
+            (node["id"], {
+                "connections": node["connections"],
+                "role": node["role"],
+                "work": node["work"],
+                "community": node["community"]
+            })
+            for node in nodes
+        )
+        G.add_edges_from((edge["source"], edge["target"]) for edge in data["edges"])
         
         # Set up the plot
-        plt.figure(figsize=(12, 8))
+        fig = _new_figure(figsize=(12, 8))
+        ax = fig.subplots()
         
         # Get node colors based on community
-        node_colors = [data["nodes"][i]["community"] for i in range(len(data["nodes"]))]
+        node_colors = np.fromiter((node["community"] for node in nodes), dtype=np.int32, count=len(nodes))
         
         # Get node sizes based on connections
-        node_sizes = [data["nodes"][i]["connections"] * 100 for i in range(len(data["nodes"]))]
+        node_sizes = np.fromiter((node["connections"] for node in nodes), dtype=np.float32, count=len(nodes)) * 100.0
         
         # Draw the network
-        pos = nx.spring_layout(G, k=1, iterations=50)
-        nx.draw_networkx_nodes(
+        pos = self._get_layout(G)
+        node_artist = nx.draw_networkx_nodes(
             G, pos,
             node_color=node_colors,
             node_size=node_sizes,
-            cmap=plt.cm.Set3
+            cmap=_load_matplotlib().colormaps["Set3"],
+            ax=ax
         )
-        nx.draw_networkx_edges(G, pos, alpha=0.2)
+        edge_artist = nx.draw_networkx_edges(G, pos, alpha=0.2, ax=ax)
+        if G.number_of_nodes() > self.rasterize_threshold:
+            node_artist.set_rasterized(True)
+            edge_artist.set_rasterized(True)
         
         if enhanced:
-            # Add labels for central nodes
+            # Add labels for central nodes, those with above-average degree
+            degrees = np.fromiter((d for _, d in G.degree()), dtype=np.int32, count=G.number_of_nodes())
+            mean_degree = degrees.mean() if degrees.size else 0
             labels = {
                 node: node
-                for node in G.nodes()
-                if G.degree(node) > np.mean([d for n, d in G.degree()])
+                for node, degree in zip(G.nodes(), degrees)
+                if degree > mean_degree
             }
-            nx.draw_networkx_labels(G, pos, labels, font_size=8)
-        
-        plt.title("Character Network Analysis")
-        plt.axis("off")
+            nx.draw_networkx_labels(G, pos, labels, font_size=8, ax=ax)
         
-        # Save to buffer
-        buffer = BytesIO()
-        plt.savefig(buffer, format=format, bbox_inches="tight")
-        plt.close()
+        ax.set_title("Character Network Analysis")
+        ax.set_axis_off()
         
-        # Convert to base64
-        image_data = base64.b64encode(buffer.getvalue()).decode()
+        image_data = self._encode_figure(fig, format, dpi=100)
         
         return {
             "image": image_data,
@@ -135,24 +165,58 @@ Your task is to generate clear and informative visual representations of charact
             }
         }
     
-    async def _generate_temporal_visualization(
+    def _encode_figure(self, fig: "Figure", format: str, **savefig_kwargs) -> str:
+        """Render a figure and return it base64-encoded."""
+        buffer = BytesIO()
+        fig.savefig(buffer, format=format, bbox_inches="tight", **savefig_kwargs)
+        # Encode from a view of the buffer rather than a copy of its bytes
+        with buffer.getbuffer() as image:
+            return base64.b64encode(image).decode()
+    
+    def _get_layout(self, G: "nx.Graph") -> Dict[Any, np.ndarray]:
+        """Spring layout of a graph, reused for graphs with the same nodes and edges."""
+        import networkx as nx
+        
+        key = hashlib.blake2b(
+            json.dumps(
+                [sorted(G.nodes(), key=str), sorted((sorted((u, v), key=str) for u, v in G.edges()), key=str)],
+                default=str
+            ).encode(),
+            digest_size=16
+        ).digest()
+        with self._layout_lock:
+            if key in self.layout_cache:
+                # Mark as recently used
+                self.layout_cache[key] = self.layout_cache.pop(key)
+                return self.layout_cache[key]
+        
+        pos = nx.spring_layout(G, k=1, iterations=50, seed=self.layout_seed)
+        
+        with self._layout_lock:
+            # Evict the least recently used layout once the cache is full
+            if key not in self.layout_cache and len(self.layout_cache) >= self.layout_cache_size:
+                del self.layout_cache[next(iter(self.layout_cache))]
+            self.layout_cache[key] = pos
+        return pos
+    
+    def _render_temporal(
         self,
         data: Dict[str, Any],
         format: str,
         enhanced: bool
     ) -> Dict[str, Any]:
         """Generate a temporal visualization."""
-        plt.figure(figsize=(12, 8))
-        
         # Prepare timeline data
         years = [int(entry["year"]) for entry in data["timeline"]]
         metrics = [entry["metrics"] for entry in data["timeline"]]
         
         # Create subplots
         if enhanced:
-            fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 12))
+            fig = _new_figure(figsize=(12, 12))
+            ax1, ax2 = fig.subplots(2, 1)
         else:
-            fig, ax1 = plt.subplots(1, 1, figsize=(12, 6))
+            fig = _new_figure(figsize=(12, 6))
+            ax1 = fig.subplots(1, 1)
         
         # Plot metrics over time
         for metric in metrics[0].keys():
@@ -188,15 +252,9 @@ Your task is to generate clear and informative visual representations of charact
             ax2.legend()
             ax2.grid(True)
         
-        plt.tight_layout()
+        fig.tight_layout()
         
-        # Save to buffer
-        buffer = BytesIO()
-        plt.savefig(buffer, format=format, bbox_inches="tight")
-        plt.close()
-        
-        # Convert to base64
-        image_data = base64.b64encode(buffer.getvalue()).decode()
+        image_data = self._encode_figure(fig, format)
         
         return {
             "image": image_data,
@@ -208,24 +266,24 @@ Your task is to generate clear and informative visual representations of charact
             }
         }
     
-    async def _generate_comparative_visualization(
+    def _render_comparative(
         self,
         data: Dict[str, Any],
         format: str,
         enhanced: bool
     ) -> Dict[str, Any]:
         """Generate a comparative visualization."""
-        plt.figure(figsize=(12, 8))
-        
         # Prepare data
         works = data["works"]
         metrics = data["metrics"]
         
         # Create subplots
         if enhanced:
-            fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 12))
+            fig = _new_figure(figsize=(12, 12))
+            ax1, ax2 = fig.subplots(2, 1)
         else:
-            fig, ax1 = plt.subplots(1, 1, figsize=(12, 6))
+            fig = _new_figure(figsize=(12, 6))
+            ax1 = fig.subplots(1, 1)
         
         # Plot metrics comparison
         x = np.arange(len(works))
@@ -245,6 +303,8 @@ Your task is to generate clear and informative visual representations of charact
             # Plot similarity matrix
             similarity = data.get("similarity_matrix", [])
             if similarity:
+                import seaborn as sns
+                
                 sns.heatmap(
                     similarity,
                     annot=True,
@@ -255,15 +315,9 @@ Your task is to generate clear and informative visual representations of charact
                 )
                 ax2.set_title("Work Similarity Matrix")
         
-        plt.tight_layout()
-        
-        # Save to buffer
-        buffer = BytesIO()
-        plt.savefig(buffer, format=format, bbox_inches="tight")
-        plt.close()
+        fig.tight_layout()
         
-        # Convert to base64
-        image_data = base64.b64encode(buffer.getvalue()).decode()
+        image_data = self._encode_figure(fig, format)
         
         return {
             "image": image_data,
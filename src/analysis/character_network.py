@@ -1,14 +1,75 @@
 from typing import Dict, Any, List, Optional, Set
 import logging
-from collections import defaultdict
+from collections import Counter
+import numpy as np
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:  # Optional: communities fall back to a set-based search without numba
+    HAS_NUMBA = False
+
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
 
 logger = logging.getLogger(__name__)
 
+@njit(inline="always")
+def _find(parent: np.ndarray, node: int) -> int:
+    """Root of a node's set, halving the path on the way up."""
+    while parent[node] != node:
+        parent[node] = parent[parent[node]]
+        node = parent[node]
+    return node
+
+@njit(inline="always")
+def _union(parent: np.ndarray, rank: np.ndarray, a: int, b: int) -> None:
+    """Merge the sets of two nodes, attaching the shallower tree under the deeper one."""
+    root_a = _find(parent, a)
+    root_b = _find(parent, b)
+    if root_a == root_b:
+        return
+    if rank[root_a] < rank[root_b]:
+        root_a, root_b = root_b, root_a
+    parent[root_b] = root_a
+    if rank[root_a] == rank[root_b]:
+        rank[root_a] += 1
+
+@njit(cache=True)
+def _ccl(indptr: np.ndarray, indices: np.ndarray, parent: np.ndarray, rank: np.ndarray) -> np.ndarray:
+    """Label connected components of a CSR graph; returns each node's component root."""
+    n = len(parent)
+    for node in range(n):
+        for k in range(indptr[node], indptr[node + 1]):
+            _union(parent, rank, node, indices[k])
+    for node in range(n):
+        parent[node] = _find(parent, node)
+    return parent
+
+@njit(cache=True)
+def _intra_edges(indptr: np.ndarray, indices: np.ndarray, members: np.ndarray, bitmap: np.ndarray) -> int:
+    """Count directed edges between members, testing neighbors against a membership bitmap."""
+    count = 0
+    for node in members:
+        for k in range(indptr[node], indptr[node + 1]):
+            neighbor = indices[k]
+            count += (bitmap[neighbor >> 6] >> np.uint64(neighbor & 63)) & np.uint64(1)
+    return count
+
 class CharacterNetwork:
     """Analyzes character relationships and interactions in works."""
     
     def __init__(self):
-        self.network = defaultdict(lambda: {"connections": set(), "attributes": {}})
+        # Characters are keyed by integer id, in the order they were added; _names maps ids back
+        self.network: Dict[int, Dict[str, Any]] = {}
+        self._names: List[str] = []
+        self._name_to_id: Dict[str, int] = {}
+        # Characters named in relationships before being added, mapped to the ids that named them
+        self._pending_connections: Dict[str, Set[int]] = {}
+        # The fallback search turns bottom-up once its frontier exceeds 1/bottom_up_divisor of the network
+        self.bottom_up_divisor = 20
     
     def analyze_network(
         self,
@@ -23,6 +84,7 @@ class CharacterNetwork:
         for work in works:
             if "characters" in work:
                 self._add_work_characters(work["characters"])
+        self._build_csr()
         
         # Analyze the network
         analysis = {
@@ -35,14 +97,32 @@ class CharacterNetwork:
         return analysis
     
     def _add_work_characters(self, characters: List[Dict[str, Any]]) -> None:
-        """Add characters and their relationships to the network."""
+        """Add characters and their relationships to the network.
+        
+        Relationships only connect characters that have been added themselves;
+        a relationship to a character not seen yet is held until it is added.
+        """
+        network = self.network
+        name_to_id = self._name_to_id
+        pending = self._pending_connections
         for char in characters:
             char_name = char.get("name")
             if not char_name:
                 continue
             
+            char_id = name_to_id.get(char_name)
+            if char_id is None:
+                char_id = name_to_id[char_name] = len(self._names)
+                self._names.append(char_name)
+                data = network[char_id] = {"connections": set(), "attributes": {}}
+                for source in pending.pop(char_name, ()):
+                    data["connections"].add(source)
+                    network[source]["connections"].add(char_id)
+            else:
+                data = network[char_id]
+            
             # Add character attributes
-            self.network[char_name]["attributes"].update({
+            data["attributes"].update({
                 k: v for k, v in char.items() if k != "relationships"
             })
             
@@ -50,9 +130,29 @@ class CharacterNetwork:
             if "relationships" in char:
                 for rel in char["relationships"]:
                     target = rel.get("target")
-                    if target:
-                        self.network[char_name]["connections"].add(target)
-                        self.network[target]["connections"].add(char_name)
+                    if not target:
+                        continue
+                    target_id = name_to_id.get(target)
+                    if target_id is not None:
+                        data["connections"].add(target_id)
+                        network[target_id]["connections"].add(char_id)
+                    else:
+                        pending.setdefault(target, set()).add(char_id)
+    
+    def _build_csr(self) -> None:
+        """Flatten character connections into CSR arrays indexed by character id."""
+        self._degrees = np.fromiter(
+            (len(data["connections"]) for data in self.network.values()),
+            dtype=np.int64,
+            count=len(self._names)
+        )
+        self._indptr = np.zeros(len(self._names) + 1, dtype=np.int64)
+        np.cumsum(self._degrees, out=self._indptr[1:])
+        self._indices = np.fromiter(
+            (target for data in self.network.values() for target in data["connections"]),
+            dtype=np.int32,
+            count=int(self._indptr[-1])
+        )
     
     def _calculate_network_metrics(self) -> Dict[str, Any]:
         """Calculate network metrics."""
@@ -66,115 +166,168 @@ class CharacterNetwork:
         if not self.network:
             return metrics
         
+        total_connections = int(self._indptr[-1])
+        max_degree = int(self._degrees.max())
+        
+        n = len(self.network)
         # Calculate average connections
-        total_connections = sum(len(data["connections"]) for data in self.network.values())
-        metrics["average_connections"] = total_connections / len(self.network)
+        metrics["average_connections"] = total_connections / n
         
         # Calculate network density
-        max_possible_connections = len(self.network) * (len(self.network) - 1)
+        max_possible_connections = n * (n - 1)
         if max_possible_connections > 0:
             metrics["density"] = total_connections / max_possible_connections
         
-        # Calculate centralization
-        max_degree = max(len(data["connections"]) for data in self.network.values())
-        if max_degree > 0:
-            metrics["centralization"] = sum(
-                max_degree - len(data["connections"])
-                for data in self.network.values()
-            ) / ((len(self.network) - 1) * (len(self.network) - 2))
+        # Calculate centralization; sum(max_degree - degree) == max_degree * n - total_connections
+        if max_degree > 0 and n > 2:
+            metrics["centralization"] = (max_degree * n - total_connections) / ((n - 1) * (n - 2))
         
         return metrics
     
     def _identify_central_characters(self) -> List[Dict[str, Any]]:
         """Identify the most central characters in the network."""
-        centrality_scores = []
-        
-        for char, data in self.network.items():
-            score = len(data["connections"])
-            centrality_scores.append({
-                "character": char,
-                "centrality_score": score,
-                "attributes": data["attributes"]
-            })
+        degrees = self._degrees
+        k = min(10, len(degrees))
+        if not k:
+            return []
         
-        return sorted(
-            centrality_scores,
-            key=lambda x: x["centrality_score"],
-            reverse=True
-        )[:10]
+        # Characters at least as connected as the tenth best, ranked with ties kept in first-seen order
+        kth_degree = np.partition(degrees, len(degrees) - k)[len(degrees) - k]
+        candidates = np.flatnonzero(degrees >= kth_degree)
+        top = candidates[np.argsort(-degrees[candidates], kind="stable")[:k]]
+        return [
+            {
+                "character": self._names[node],
+                "centrality_score": int(degrees[node]),
+                "attributes": self.network[node]["attributes"]
+            }
+            for node in top
+        ]
     
     def _identify_communities(self) -> List[Dict[str, Any]]:
         """Identify character communities using connected components."""
-        visited = set()
-        communities = []
-        
-        for char in self.network:
-            if char not in visited:
-                community = self._find_community(char, visited)
-                if len(community) > 1:  # Only include communities with multiple characters
-                    communities.append({
-                        "size": len(community),
-                        "characters": list(community),
-                        "density": self._calculate_community_density(community)
-                    })
+        if HAS_NUMBA:
+            components = self._connected_components()
+        else:
+            visited = set()
+            components = []
+            total = len(self.network)
+            for char in self.network:
+                remaining = total - len(visited)
+                if not remaining:  # Every character is already in a community
+                    break
+                if char not in visited:
+                    components.append(self._find_community(char, visited, remaining))
+        
+        communities = [
+            {
+                "size": len(community),
+                "characters": [self._names[char] for char in community],
+                "density": self._calculate_community_density(community)
+            }
+            for community in components
+            if len(community) > 1  # Only include communities with multiple characters
+        ]
         
         return sorted(communities, key=lambda x: x["size"], reverse=True)
     
-    def _find_community(self, start: str, visited: Set[str]) -> Set[str]:
-        """Find all characters connected to the start character."""
-        community = set()
-        to_visit = {start}
-        
-        while to_visit:
-            current = to_visit.pop()
-            if current not in visited:
-                visited.add(current)
-                community.add(current)
-                to_visit.update(self.network[current]["connections"] - visited)
+    def _connected_components(self) -> List[Set[int]]:
+        """Find connected components with the compiled union-find over the CSR arrays."""
+        n = len(self._names)
+        if n == 0:
+            return []
+        roots = _ccl(self._indptr, self._indices, np.arange(n, dtype=np.int32), np.zeros(n, dtype=np.int32))
+        _, labels = np.unique(roots, return_inverse=True)
+        
+        # Group node ids by label with one stable sort; each group then starts at its first node
+        order = np.argsort(labels, kind="stable")
+        groups = np.split(order, np.cumsum(np.bincount(labels))[:-1])
+        groups.sort(key=lambda members: members[0])  # Same order as a scan over the network
+        return [set(members.tolist()) for members in groups]
+    
+    def _find_community(self, start: int, visited: Set[int], remaining: Optional[int] = None) -> Set[int]:
+        """Find all characters connected to the start character.
+        
+        ``remaining`` is the number of unvisited characters; the search stops
+        as soon as the community has claimed all of them.
+        """
+        network = self.network
+        threshold = max(len(network) // self.bottom_up_divisor, 1)
+        community = {start}
+        frontier = [start]
+        visited.add(start)
+        seen_add = visited.add
+        
+        while frontier and len(community) != remaining:
+            if len(frontier) > threshold:
+                # Bottom-up: unvisited characters look for a neighbor in the frontier
+                members = set(frontier)
+                frontier = [
+                    char for char, data in network.items()
+                    if char not in visited and not members.isdisjoint(data["connections"])
+                ]
+                visited.update(frontier)
+            else:
+                # Top-down: claim each unvisited neighbor the first time it is reached
+                next_frontier = []
+                append = next_frontier.append
+                for char in frontier:
+                    for neighbor in network[char]["connections"]:
+                        if neighbor not in visited:
+                            seen_add(neighbor)
+                            append(neighbor)
+                frontier = next_frontier
+            community.update(frontier)
         
         return community
     
-    def _calculate_community_density(self, community: Set[str]) -> float:
+    def _calculate_community_density(self, community: Set[int]) -> float:
         """Calculate the density of connections within a community."""
         if len(community) < 2:
             return 0.0
         
-        connections = sum(
-            len(self.network[char]["connections"] & community)
-            for char in community
-        )
+        if HAS_NUMBA:
+            members = np.fromiter(community, dtype=np.int64, count=len(community))
+            bitmap = np.zeros((len(self._names) + 63) // 64, dtype=np.uint64)
+            np.bitwise_or.at(bitmap, members >> 6, np.left_shift(np.uint64(1), (members & 63).astype(np.uint64)))
+            connections = int(_intra_edges(self._indptr, self._indices, members, bitmap))
+        else:
+            connections = sum(
+                len(self.network[char]["connections"] & community)
+                for char in community
+            )
         max_possible = len(community) * (len(community) - 1)
         
         return connections / max_possible if max_possible > 0 else 0.0
     
     def _analyze_relationship_patterns(self) -> Dict[str, Any]:
         """Analyze patterns in character relationships."""
-        patterns = {
-            "relationship_types": defaultdict(int),
-            "common_roles": defaultdict(int),
-            "interaction_patterns": []
-        }
+        relationship_types = Counter()
+        common_roles = Counter()
         
-        for char, data in self.network.items():
+        for data in self.network.values():
+            attributes = data.get("attributes", {})
             # Count relationship types
-            for rel in data.get("attributes", {}).get("relationships", []):
-                rel_type = rel.get("type")
-                if rel_type:
-                    patterns["relationship_types"][rel_type] += 1
+            relationship_types.update(
+                rel["type"] for rel in attributes.get("relationships", []) if rel.get("type")
+            )
             
             # Count character roles
-            role = data.get("attributes", {}).get("role")
+            role = attributes.get("role")
             if role:
-                patterns["common_roles"][role] += 1
+                common_roles[role] += 1
         
         # Convert to lists for JSON serialization
-        patterns["relationship_types"] = [
-            {"type": k, "count": v}
-            for k, v in patterns["relationship_types"].items()
-        ]
-        patterns["common_roles"] = [
-            {"role": k, "count": v}
-            for k, v in patterns["common_roles"].items()
-        ]
+        patterns = {
+            "relationship_types": [
+                {"type": k, "count": v}
+                for k, v in relationship_types.items()
+            ],
+            "common_roles": [
+                {"role": k, "count": v}
+                for k, v in common_roles.items()
+            ],
+            "interaction_patterns": []
+        }
         
         return patterns 
\ No newline at end of file
@@ -1,16 +1,69 @@
 from typing import Dict, Any, List, Optional, Set
 import logging
-from collections import defaultdict
+from collections import Counter, defaultdict
+from itertools import combinations
 from datetime import datetime
+import numpy as np
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:  # Optional: thematic evolution falls back to numpy set routines without numba
+    HAS_NUMBA = False
+
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
 
 logger = logging.getLogger(__name__)
 
+@njit(cache=True)
+def _fuse_evolution(indptr: np.ndarray, themes: np.ndarray):
+    """New theme ids per year and ids present in every year, over sorted per-year id rows."""
+    emerging = np.empty(len(themes), dtype=themes.dtype)
+    count = 0
+    persistent = themes[indptr[0]:indptr[1]].copy()
+    n_persistent = len(persistent)
+    
+    for year in range(1, len(indptr) - 1):
+        prev = indptr[year - 1]
+        prev_end = indptr[year]
+        kept = 0
+        p = 0
+        for k in range(indptr[year], indptr[year + 1]):
+            theme = themes[k]
+            # Both arrays are sorted, so each walk only moves forward
+            while prev < prev_end and themes[prev] < theme:
+                prev += 1
+            if prev == prev_end or themes[prev] != theme:
+                emerging[count] = theme
+                count += 1
+            while p < n_persistent and persistent[p] < theme:
+                p += 1
+            if p < n_persistent and persistent[p] == theme:
+                persistent[kept] = theme
+                kept += 1
+        n_persistent = kept
+    
+    return emerging[:count], persistent[:n_persistent]
+
 class CommunityAnalysis:
     """Analyzes patterns and trends across works and their communities."""
     
     def __init__(self):
-        self.works_by_community = defaultdict(list)
+        # Communities hold integer work ids; the works themselves live in _works_by_id
+        self.works_by_community: Dict[str, List[int]] = defaultdict(list)
+        self._works_by_id: List[Dict[str, Any]] = []
+        # Each work's themes as sorted ids into _theme_names, indexed like _works_by_id
+        self._work_themes: List[np.ndarray] = []
+        self._theme_ids: Dict[str, int] = {}
+        self._theme_names: List[str] = []
         self.community_metrics = defaultdict(dict)
+        # Decade communities keyed by their decade, kept alongside works_by_community
+        self.decade_to_communities: Dict[int, Set[str]] = defaultdict(set)
+        # Overlaps for the current analyze_communities call, shared by patterns and recommendations
+        self._overlap_cache: Optional[List[Dict[str, Any]]] = None
     
     def analyze_communities(
         self,
@@ -20,12 +73,11 @@ class CommunityAnalysis:
         """Analyze works across different communities."""
         if not works:
             raise ValueError("At least one work is required for community analysis")
+        self._overlap_cache = None
         
         # Group works by community
         for work in works:
-            communities = self._extract_communities(work)
-            for community in communities:
-                self.works_by_community[community].append(work)
+            self._add_work(work)
         
         # Analyze each community
         analysis = {
@@ -35,37 +87,73 @@ class CommunityAnalysis:
             "recommendations": self._generate_recommendations()
         }
         
-        for community, community_works in self.works_by_community.items():
-            analysis["community_metrics"][community] = self._analyze_community(community_works)
+        analysis["community_metrics"] = self._analyze_all_communities()
         
         analysis["cross_community_patterns"] = self._analyze_cross_community_patterns()
         
         return analysis
     
+    def _add_work(self, work: Dict[str, Any]) -> None:
+        """Assign a work the next integer id and add it to its communities."""
+        work_id = len(self._works_by_id)
+        self._works_by_id.append(work)
+        self._work_themes.append(np.unique(np.fromiter(
+            (self._theme_id(theme) for theme in work.get("themes") or ()),
+            dtype=np.int32
+        )))
+        for community in self._extract_communities(work):
+            self.works_by_community[community].append(work_id)
+    
+    def _theme_id(self, theme: str) -> int:
+        """Intern a theme name as a small integer id."""
+        theme_id = self._theme_ids.get(theme)
+        if theme_id is None:
+            theme_id = self._theme_ids[theme] = len(self._theme_names)
+            self._theme_names.append(theme)
+        return theme_id
+    
+    def _community_works(self, community: str) -> List[Dict[str, Any]]:
+        """Look up the works in a community."""
+        works_by_id = self._works_by_id
+        return [works_by_id[work_id] for work_id in self.works_by_community[community]]
+    
     def _extract_communities(self, work: Dict[str, Any]) -> Set[str]:
         """Extract communities from a work."""
         communities = set()
         
+        get = work.get
         # Add genre-based communities
-        if "genres" in work:
-            communities.update(work["genres"])
+        genres = get("genres")
+        if genres is not None:
+            communities.update(genres)
         
         # Add theme-based communities
-        if "themes" in work:
-            communities.update(work["themes"])
+        themes = get("themes")
+        if themes is not None:
+            communities.update(themes)
         
         # Add author-based communities
         if "author" in work:
             communities.add(f"author:{work['author']}")
         
         # Add temporal communities
-        if "year" in work:
-            decade = (work["year"] // 10) * 10
-            communities.add(f"decade:{decade}s")
+        year = get("year")
+        if year is not None:
+            decade = (year // 10) * 10
+            community = f"decade:{decade}s"
+            communities.add(community)
+            self.decade_to_communities[decade].add(community)
         
         return communities
     
-    def _analyze_community(self, works: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _analyze_all_communities(self) -> Dict[str, Dict[str, Any]]:
+        """Analyze every community in insertion order."""
+        communities = list(self.works_by_community)
+        community_works = map(self._community_works, communities)
+        return dict(zip(communities, map(self._analyze_community, community_works)))
+    
+    @staticmethod
+    def _analyze_community(works: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Analyze a specific community of works."""
         metrics = {
             "work_count": len(works),
@@ -78,50 +166,62 @@ class CommunityAnalysis:
         if not works:
             return metrics
         
-        # Calculate average rating
-        ratings = [w.get("rating", 0) for w in works if w.get("rating")]
-        if ratings:
-            metrics["average_rating"] = sum(ratings) / len(ratings)
-        
-        # Extract common themes
-        themes = defaultdict(int)
+        # Gather ratings, themes and years in a single pass over the works
+        rating_sum = 0
+        rating_count = 0
+        themes = Counter()
+        min_year = max_year = None
         for work in works:
-            if "themes" in work:
-                for theme in work["themes"]:
-                    themes[theme] += 1
-        
-        metrics["common_themes"] = sorted(
-            themes.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:5]
+            rating = work.get("rating")
+            if rating:
+                rating_sum += rating
+                rating_count += 1
+            work_themes = work.get("themes")
+            if work_themes is not None:
+                themes.update(work_themes)
+            year = work.get("year")
+            if year:
+                if min_year is None:
+                    min_year = max_year = year
+                elif year < min_year:
+                    min_year = year
+                elif year > max_year:
+                    max_year = year
+        
+        if rating_count:
+            metrics["average_rating"] = rating_sum / rating_count
+        
+        metrics["common_themes"] = themes.most_common(5)
         
         # Calculate innovation score
-        metrics["innovation_score"] = self._calculate_innovation_score(works)
+        metrics["innovation_score"] = CommunityAnalysis._calculate_innovation_score(
+            len(works),
+            len(themes),
+            None if min_year is None else max_year - min_year
+        )
         
         return metrics
     
-    def _calculate_innovation_score(self, works: List[Dict[str, Any]]) -> float:
-        """Calculate an innovation score for a community of works."""
-        if not works:
+    @staticmethod
+    def _calculate_innovation_score(
+        work_count: int,
+        unique_theme_count: int,
+        year_range: Optional[int]
+    ) -> float:
+        """Calculate an innovation score for a community from its aggregates."""
+        if not work_count:
             return 0.0
         
         score = 0.0
         total_weight = 0
         
         # Consider thematic novelty
-        if len(works) > 1:
-            unique_themes = set()
-            for work in works:
-                if "themes" in work:
-                    unique_themes.update(work["themes"])
-            score += len(unique_themes) / len(works)
+        if work_count > 1:
+            score += unique_theme_count / work_count
             total_weight += 1
         
         # Consider temporal spread
-        years = [w.get("year") for w in works if w.get("year")]
-        if years:
-            year_range = max(years) - min(years)
+        if year_range is not None:
             score += year_range / 100  # Normalize by 100 years
             total_weight += 1
         
@@ -139,25 +239,39 @@ class CommunityAnalysis:
     
     def _find_overlapping_communities(self) -> List[Dict[str, Any]]:
         """Find communities that share significant overlap."""
-        overlaps = []
-        communities = list(self.works_by_community.keys())
+        if self._overlap_cache is not None:
+            return self._overlap_cache
         
-        for i in range(len(communities)):
-            for j in range(i + 1, len(communities)):
-                comm1, comm2 = communities[i], communities[j]
-                overlap = self._calculate_community_overlap(comm1, comm2)
-                
-                if overlap > 0.3:  # Threshold for significant overlap
-                    overlaps.append({
-                        "communities": [comm1, comm2],
-                        "overlap_score": overlap,
-                        "shared_works": len(
-                            set(self.works_by_community[comm1]) &
-                            set(self.works_by_community[comm2])
-                        )
-                    })
+        # Invert membership so only communities that share a work are ever paired
+        communities_by_work = defaultdict(list)
+        for community, work_ids in self.works_by_community.items():
+            for work_id in work_ids:
+                communities_by_work[work_id].append(community)
         
-        return sorted(overlaps, key=lambda x: x["overlap_score"], reverse=True)
+        shared = defaultdict(int)
+        for communities in communities_by_work.values():
+            for pair in combinations(communities, 2):
+                shared[pair] += 1
+        
+        overlaps = []
+        for (comm1, comm2), shared_works in shared.items():
+            union = len(self.works_by_community[comm1]) + len(self.works_by_community[comm2]) - shared_works
+            overlap = shared_works / union
+            
+            if overlap > 0.3:  # Threshold for significant overlap
+                overlaps.append({
+                    "communities": [comm1, comm2],
+                    "overlap_score": overlap,
+                    "shared_works": shared_works
+                })
+        
+        # Ties keep the order of a pairwise scan over the communities
+        rank = {community: i for i, community in enumerate(self.works_by_community)}
+        self._overlap_cache = sorted(
+            overlaps,
+            key=lambda x: (-x["overlap_score"], rank[x["communities"][0]], rank[x["communities"][1]])
+        )
+        return self._overlap_cache
     
     def _calculate_community_overlap(self, comm1: str, comm2: str) -> float:
         """Calculate the overlap between two communities."""
@@ -175,20 +289,11 @@ class CommunityAnalysis:
     def _analyze_community_evolution(self) -> List[Dict[str, Any]]:
         """Analyze how communities evolve over time."""
         evolution = []
-        
-        # Group communities by decade
-        decade_communities = defaultdict(set)
-        for community in self.works_by_community:
-            if community.startswith("decade:"):
-                decade = int(community.split(":")[1].rstrip("s"))
-                decade_communities[decade].add(community)
+        decade_communities = self.decade_to_communities
         
         # Analyze evolution between decades
-        decades = sorted(decade_communities.keys())
-        for i in range(1, len(decades)):
-            prev_decade = decades[i-1]
-            current_decade = decades[i]
-            
+        decades = sorted(decade_communities)
+        for prev_decade, current_decade in zip(decades, decades[1:]):
             evolution.append({
                 "period": f"{prev_decade}s-{current_decade}s",
                 "emerging_communities": list(
@@ -213,17 +318,23 @@ class CommunityAnalysis:
         
         # Analyze author-based influences
         author_communities = {
-            comm: works for comm, works in self.works_by_community.items()
+            comm: work_ids for comm, work_ids in self.works_by_community.items()
             if comm.startswith("author:")
         }
         
-        for author, works in author_communities.items():
-            if len(works) > 1:
+        for author, work_ids in author_communities.items():
+            if len(work_ids) > 1:
                 # Look for thematic evolution
-                themes_by_year = defaultdict(set)
-                for work in works:
-                    if "year" in work and "themes" in work:
-                        themes_by_year[work["year"]].update(work["themes"])
+                theme_arrays_by_year = defaultdict(list)
+                for work_id in work_ids:
+                    work = self._works_by_id[work_id]
+                    year = work.get("year")
+                    if year is not None and work.get("themes") is not None:
+                        theme_arrays_by_year[year].append(self._work_themes[work_id])
+                themes_by_year = {
+                    year: np.unique(np.concatenate(arrays))
+                    for year, arrays in theme_arrays_by_year.items()
+                }
                 
                 if len(themes_by_year) > 1:
                     influences.append({
@@ -234,25 +345,33 @@ class CommunityAnalysis:
         
         return influences
     
-    def _analyze_thematic_evolution(self, themes_by_year: Dict[int, Set[str]]) -> Dict[str, Any]:
-        """Analyze how themes evolve over time for an author."""
+    def _analyze_thematic_evolution(self, themes_by_year: Dict[int, np.ndarray]) -> Dict[str, Any]:
+        """Analyze how themes evolve over time for an author.
+        
+        ``themes_by_year`` maps each year to the sorted theme ids of its works.
+        """
         years = sorted(themes_by_year.keys())
-        evolution = {
+        
+        if HAS_NUMBA:
+            arrays = [themes_by_year[year] for year in years]
+            indptr = np.zeros(len(arrays) + 1, dtype=np.int64)
+            np.cumsum([len(array) for array in arrays], out=indptr[1:])
+            emerging, persistent = _fuse_evolution(indptr, np.concatenate(arrays))
+        else:
+            emerging = []
+            persistent = themes_by_year[years[0]]
+            for prev_year, current_year in zip(years, years[1:]):
+                current_themes = themes_by_year[current_year]
+                emerging.append(np.setdiff1d(current_themes, themes_by_year[prev_year], assume_unique=True))
+                persistent = np.intersect1d(persistent, current_themes, assume_unique=True)
+            emerging = np.concatenate(emerging)
+        
+        theme_names = self._theme_names
+        return {
             "period": f"{years[0]}-{years[-1]}",
-            "emerging_themes": [],
-            "persistent_themes": set(themes_by_year[years[0]])
+            "emerging_themes": [theme_names[i] for i in emerging],
+            "persistent_themes": [theme_names[i] for i in persistent]
         }
-        
-        for i in range(1, len(years)):
-            current_themes = themes_by_year[years[i]]
-            prev_themes = themes_by_year[years[i-1]]
-            
-            evolution["emerging_themes"].extend(list(current_themes - prev_themes))
-            evolution["persistent_themes"] &= current_themes
-        
-        evolution["persistent_themes"] = list(evolution["persistent_themes"])
-        
-        return evolution
     
     def _generate_recommendations(self) -> List[Dict[str, Any]]:
         """Generate recommendations based on community analysis."""
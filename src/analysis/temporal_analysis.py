@@ -1,6 +1,7 @@
 from typing import Dict, Any, List, Optional
 import logging
 from datetime import datetime
+import pandas as pd
 from ..context.historical_context import HistoricalContext
 
 logger = logging.getLogger(__name__)
@@ -20,35 +21,26 @@ class TemporalAnalysis:
         if not works:
             raise ValueError("At least one work is required for temporal analysis")
         
-        # Sort works by year
-        sorted_works = sorted(
-            [w for w in works if w.get("year")],
-            key=lambda x: x.get("year", 0)
-        )
-        
-        if not sorted_works:
+        dated_works = [w for w in works if w.get("year")]
+        if not dated_works:
             raise ValueError("No works with valid years found for temporal analysis")
         
-        # Group works by decade
-        works_by_decade = {}
-        for work in sorted_works:
-            year = work.get("year")
-            if year:
-                decade = (year // 10) * 10
-                if decade not in works_by_decade:
-                    works_by_decade[decade] = []
-                works_by_decade[decade].append(work)
+        # One row per work in year order, so ties between themes keep first-seen order
+        frame = pd.DataFrame({
+            "year": [w["year"] for w in dated_works],
+            "themes": [w["themes"] if "themes" in w else [] for w in dated_works]
+        }).sort_values("year", kind="stable")
+        frame["decade"] = frame["year"] // 10 * 10
         
         # Analyze patterns
         patterns = {
-            "decade_analysis": {},
+            "decade_analysis": self._analyze_decades(frame),
             "evolution_trends": [],
             "historical_context": {}
         }
         
         # Analyze each decade
-        for decade, decade_works in works_by_decade.items():
-            patterns["decade_analysis"][decade] = self._analyze_decade(decade_works)
+        for decade in patterns["decade_analysis"]:
             patterns["historical_context"][decade] = self.historical_context.get_historical_context(
                 year=decade
             )
@@ -58,29 +50,31 @@ class TemporalAnalysis:
         
         return patterns
     
-    def _analyze_decade(self, works: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Analyze works from a specific decade."""
-        analysis = {
-            "work_count": len(works),
-            "common_themes": [],
-            "style_characteristics": [],
-            "innovation_points": []
+    def _analyze_decades(self, frame: pd.DataFrame) -> Dict[int, Dict[str, Any]]:
+        """Analyze works from each decade, given one row per work with its year, decade and themes."""
+        work_counts = frame.groupby("decade", sort=False).size()
+        theme_counts = (
+            frame[["decade", "themes"]]
+            .explode("themes")
+            .dropna(subset=["themes"])
+            .groupby(["decade", "themes"], sort=False)
+            .size()
+        )
+        top_themes = theme_counts.groupby(level=0, sort=False, group_keys=False).nlargest(5)
+        
+        decade_analysis = {
+            int(decade): {
+                "work_count": int(count),
+                "common_themes": [],
+                "style_characteristics": [],
+                "innovation_points": []
+            }
+            for decade, count in work_counts.items()
         }
+        for (decade, theme), count in top_themes.items():
+            decade_analysis[int(decade)]["common_themes"].append((theme, int(count)))
         
-        # Extract common themes
-        themes = {}
-        for work in works:
-            if "themes" in work:
-                for theme in work["themes"]:
-                    themes[theme] = themes.get(theme, 0) + 1
-        
-        analysis["common_themes"] = sorted(
-            themes.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:5]
-        
-        return analysis
+        return decade_analysis
     
     def _identify_evolution_trends(
         self,
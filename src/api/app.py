@@ -1,7 +1,10 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import RedirectResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, RedirectResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, List, Any
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional, Dict, List, Any
+import json
+import logging
 from ..agents.sf_agent import ScienceFictionAgent
 from ..agents.comics_agent import ComicsAgent
 from ..agents.rpg_agent import RPGAgent, MCPEnabledRPGAgent
@@ -17,8 +20,38 @@ from ..agents.monitoring_agent import MonitoringAgent
 from ..agents.parallel_agent import ParallelAgentFactory, ParallelConfig
 from ..agents.sf_agent import MCPEnabledScienceFictionAgent
 from ..agents.comics_agent import MCPEnabledComicsAgent
+from .openrouter_client import OpenRouterClient
+from .cache import cached
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Create the agents and analyzers once the event loop is running, and release them on shutdown"""
+    state = app.state
+    state.sf_agent = ScienceFictionAgent()
+    state.comics_agent = ComicsAgent()
+    state.rpg_agent = RPGAgent()
+    state.comparative_agent = ComparativeAgent()
+    state.temporal_analyzer = TemporalAnalysis()
+    state.character_network = CharacterNetwork()
+    state.community_analyzer = CommunityAnalysis()
+    state.network_agent = NetworkAnalysisAgent()
+    state.visualization_agent = VisualizationAgent()
+    state.data_source_agent = DataSourceAgent()
+    state.monitoring_agent = MonitoringAgent()
+    # One factory keeps its agent pairs, result cache and metrics across requests
+    state.parallel_factory = ParallelAgentFactory(ParallelConfig())
+    state.parallel_factory.register_agent_class("science_fiction", ScienceFictionAgent, MCPEnabledScienceFictionAgent)
+    state.parallel_factory.register_agent_class("comics", ComicsAgent, MCPEnabledComicsAgent)
+    state.parallel_factory.register_agent_class("rpg", RPGAgent, MCPEnabledRPGAgent)
+    try:
+        yield
+    finally:
+        await state.monitoring_agent.close()
+        # Close the HTTP session shared by the agents' API clients
+        await OpenRouterClient.close()
 
 app = FastAPI(
+    lifespan=lifespan,
     title="SFMCP API",
     description="Science Fiction, Comics, and RPG Content Analysis API",
     version="0.1.0",
@@ -26,20 +59,6 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
-# Initialize agents and analyzers
-sf_agent = ScienceFictionAgent()
-comics_agent = ComicsAgent()
-rpg_agent = RPGAgent()
-comparative_agent = ComparativeAgent()
-temporal_analyzer = TemporalAnalysis()
-character_network = CharacterNetwork()
-community_analyzer = CommunityAnalysis()
-network_agent = NetworkAnalysisAgent()
-visualization_agent = VisualizationAgent()
-
-# Initialize monitoring agent
-monitoring_agent = MonitoringAgent()
-
 class AnalysisRequest(BaseModel):
     content: str
     title: Optional[str] = None
@@ -159,6 +178,25 @@ class ParallelAnalysisRequest(BaseModel):
     model: Optional[str] = None
     mode: Optional[str] = "parallel"  # 'parallel', 'original', or 'mcp'
 
+logger = logging.getLogger(__name__)
+
+@app.exception_handler(Exception)
+async def handle_unexpected_error(request: Request, exc: Exception) -> JSONResponse:
+    """Report any error a handler did not map itself as a 500 with its message"""
+    return JSONResponse(status_code=500, content={"detail": str(exc)})
+
+async def _event_stream(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Frame streamed analysis text as server-sent events, ending with [DONE] or an error event"""
+    try:
+        async for text in chunks:
+            yield f"data: {json.dumps({'text': text})}\n\n"
+    except Exception as e:
+        # Headers are already sent, so the failure is reported in-band
+        logger.error("Streaming analysis failed: %s", e)
+        yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+        return
+    yield "data: [DONE]\n\n"
+
 @app.get("/", include_in_schema=False)
 async def root():
     """Redirect to the API documentation"""
@@ -176,243 +214,212 @@ async def get_info() -> Dict[str, str]:
 
 # Science Fiction Endpoints
 @app.post("/analyze/sf", tags=["Science Fiction"])
+@cached("analyze/sf")
 async def analyze_science_fiction(request: AnalysisRequest):
     """Analyze science fiction content"""
-    try:
-        result = await sf_agent.analyze_content(
-            content=request.content,
-            title=request.title,
-            author=request.author,
-            year=request.year,
-            model=request.model
-        )
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await app.state.sf_agent.analyze_content(
+        content=request.content,
+        title=request.title,
+        author=request.author,
+        year=request.year,
+        model=request.model
+    )
+
+@app.post("/analyze/sf/stream", tags=["Science Fiction"])
+async def analyze_science_fiction_stream(request: AnalysisRequest):
+    """Analyze science fiction content, streaming the analysis as server-sent events"""
+    return StreamingResponse(
+        _event_stream(app.state.sf_agent.stream_content(content=request.content, model=request.model)),
+        media_type="text/event-stream"
+    )
 
 @app.post("/recommend/sf", tags=["Science Fiction"])
 async def recommend_science_fiction(request: RecommendationRequest):
     """Get science fiction recommendations"""
-    try:
-        result = await sf_agent.get_recommendations(
-            based_on=request.based_on,
-            limit=request.limit
-        )
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await app.state.sf_agent.get_recommendations(
+        based_on=request.based_on,
+        limit=request.limit
+    )
 
 # Comics Endpoints
 @app.post("/analyze/comics", tags=["Comics"])
+@cached("analyze/comics")
 async def analyze_comics(request: AnalysisRequest):
     """Analyze comics content"""
-    try:
-        result = await comics_agent.analyze_content(
-            content=request.content,
-            title=request.title,
-            publisher=request.publisher,
-            year=request.year,
-            creator=request.creator,
-            model=request.model
-        )
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await app.state.comics_agent.analyze_content(
+        content=request.content,
+        title=request.title,
+        publisher=request.publisher,
+        year=request.year,
+        creator=request.creator,
+        model=request.model
+    )
+
+@app.post("/analyze/comics/stream", tags=["Comics"])
+async def analyze_comics_stream(request: AnalysisRequest):
+    """Analyze comics content, streaming the analysis as server-sent events"""
+    return StreamingResponse(
+        _event_stream(app.state.comics_agent.stream_content(content=request.content, model=request.model)),
+        media_type="text/event-stream"
+    )
 
 @app.post("/recommend/comics", tags=["Comics"])
 async def recommend_comics(request: RecommendationRequest):
     """Get comics recommendations"""
-    try:
-        result = await comics_agent.get_recommendations(
-            based_on=request.based_on,
-            limit=request.limit
-        )
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await app.state.comics_agent.get_recommendations(
+        based_on=request.based_on,
+        limit=request.limit
+    )
 
 # RPG Endpoints
 @app.post("/analyze/rpg", tags=["RPG"])
+@cached("analyze/rpg")
 async def analyze_rpg(request: AnalysisRequest):
     """Analyze RPG content"""
-    try:
-        result = await rpg_agent.analyze_content(
-            content=request.content,
-            system=request.system,
-            source=request.source,
-            edition=request.edition,
-            publisher=request.publisher,
-            model=request.model
-        )
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await app.state.rpg_agent.analyze_content(
+        content=request.content,
+        system=request.system,
+        source=request.source,
+        edition=request.edition,
+        publisher=request.publisher,
+        model=request.model
+    )
+
+@app.post("/analyze/rpg/stream", tags=["RPG"])
+async def analyze_rpg_stream(request: AnalysisRequest):
+    """Analyze RPG content, streaming the analysis as server-sent events"""
+    return StreamingResponse(
+        _event_stream(app.state.rpg_agent.stream_content(content=request.content, model=request.model)),
+        media_type="text/event-stream"
+    )
 
 @app.post("/recommend/rpg", tags=["RPG"])
 async def recommend_rpg(request: RecommendationRequest):
     """Get RPG recommendations"""
-    try:
-        result = await rpg_agent.get_recommendations(
-            based_on=request.based_on,
-            limit=request.limit
-        )
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await app.state.rpg_agent.get_recommendations(
+        based_on=request.based_on,
+        limit=request.limit
+    )
 
 @app.post("/analyze/character", tags=["RPG"])
+@cached("analyze/character")
 async def analyze_character(request: CharacterAnalysisRequest):
     """Analyze RPG character sheet"""
-    try:
-        result = await rpg_agent.analyze_character(
-            character_sheet=request.character_sheet,
-            system=request.system
-        )
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await app.state.rpg_agent.analyze_character(
+        character_sheet=request.character_sheet,
+        system=request.system
+    )
 
 # Comparative Analysis Endpoints
 @app.post("/compare/works", tags=["Comparative Analysis"])
+@cached("compare/works")
 async def compare_works(request: ComparativeAnalysisRequest):
     """Compare multiple works based on specified analysis type"""
-    try:
-        result = await comparative_agent.compare_works(
-            works=request.works,
-            analysis_type=request.analysis_type,
-            model=request.model,
-            force_refresh=request.force_refresh,
-            enhanced=request.enhanced,
-            include_historical_context=request.include_historical_context
-        )
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await app.state.comparative_agent.compare_works(
+        works=request.works,
+        analysis_type=request.analysis_type,
+        model=request.model,
+        force_refresh=request.force_refresh,
+        enhanced=request.enhanced,
+        include_historical_context=request.include_historical_context
+    )
 
 @app.post("/compare/world_building", tags=["Comparative Analysis"])
+@cached("compare/world_building")
 async def compare_world_building(request: ComparativeAnalysisRequest):
     """Compare world-building elements across works"""
-    try:
-        result = await comparative_agent.compare_works(
-            works=request.works,
-            analysis_type="world_building",
-            model=request.model,
-            force_refresh=request.force_refresh,
-            enhanced=request.enhanced,
-            include_historical_context=request.include_historical_context
-        )
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await app.state.comparative_agent.compare_works(
+        works=request.works,
+        analysis_type="world_building",
+        model=request.model,
+        force_refresh=request.force_refresh,
+        enhanced=request.enhanced,
+        include_historical_context=request.include_historical_context
+    )
 
 @app.post("/compare/themes", tags=["Comparative Analysis"])
+@cached("compare/themes")
 async def compare_themes(request: ComparativeAnalysisRequest):
     """Compare themes and motifs across works"""
-    try:
-        result = await comparative_agent.compare_works(
-            works=request.works,
-            analysis_type="themes",
-            model=request.model,
-            force_refresh=request.force_refresh,
-            enhanced=request.enhanced,
-            include_historical_context=request.include_historical_context
-        )
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await app.state.comparative_agent.compare_works(
+        works=request.works,
+        analysis_type="themes",
+        model=request.model,
+        force_refresh=request.force_refresh,
+        enhanced=request.enhanced,
+        include_historical_context=request.include_historical_context
+    )
 
 @app.post("/compare/characters", tags=["Comparative Analysis"])
+@cached("compare/characters")
 async def compare_characters(request: ComparativeAnalysisRequest):
     """Compare character development and relationships across works"""
-    try:
-        result = await comparative_agent.compare_works(
-            works=request.works,
-            analysis_type="characters",
-            model=request.model,
-            force_refresh=request.force_refresh,
-            enhanced=request.enhanced,
-            include_historical_context=request.include_historical_context
-        )
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await app.state.comparative_agent.compare_works(
+        works=request.works,
+        analysis_type="characters",
+        model=request.model,
+        force_refresh=request.force_refresh,
+        enhanced=request.enhanced,
+        include_historical_context=request.include_historical_context
+    )
 
 @app.post("/compare/plot", tags=["Comparative Analysis"])
+@cached("compare/plot")
 async def compare_plot(request: ComparativeAnalysisRequest):
     """Compare plot structure and narrative techniques across works"""
-    try:
-        result = await comparative_agent.compare_works(
-            works=request.works,
-            analysis_type="plot",
-            model=request.model,
-            force_refresh=request.force_refresh,
-            enhanced=request.enhanced,
-            include_historical_context=request.include_historical_context
-        )
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await app.state.comparative_agent.compare_works(
+        works=request.works,
+        analysis_type="plot",
+        model=request.model,
+        force_refresh=request.force_refresh,
+        enhanced=request.enhanced,
+        include_historical_context=request.include_historical_context
+    )
 
 @app.get("/compare/analysis_types", tags=["Comparative Analysis"])
 async def get_analysis_types():
     """Get list of available analysis types"""
-    try:
-        return {"analysis_types": comparative_agent.get_available_analysis_types()}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return {"analysis_types": app.state.comparative_agent.get_available_analysis_types()}
 
 # Temporal Analysis Endpoints
 @app.post("/analyze/temporal", tags=["Temporal Analysis"])
 async def analyze_temporal(request: TemporalAnalysisRequest):
     """Analyze works across different time periods"""
-    try:
-        result = temporal_analyzer.analyze_temporal_patterns(
-            works=request.works,
-            analysis_type=request.analysis_type
-        )
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return app.state.temporal_analyzer.analyze_temporal_patterns(
+        works=request.works,
+        analysis_type=request.analysis_type
+    )
 
 # Character Network Analysis Endpoints
 @app.post("/analyze/network", tags=["Network Analysis"])
-async def analyze_network(works: List[Work]):
+async def analyze_network(works: List[Work], visualization: bool = True):
     """Analyze character networks across works."""
-    try:
-        result = await network_agent.analyze_network(works)
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    result = await app.state.network_agent.analyze_network(works, visualization=visualization)
+    # Pre-serialized, so the response skips FastAPI's recursive encoder
+    return Response(app.state.network_agent.serialize_analysis(result), media_type="application/json")
 
 # Community Analysis Endpoints
 @app.post("/analyze/community", tags=["Community Analysis"])
 async def analyze_community(request: CommunityAnalysisRequest):
     """Analyze works across different communities"""
-    try:
-        result = community_analyzer.analyze_communities(
-            works=request.works,
-            analysis_type=request.analysis_type
-        )
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return app.state.community_analyzer.analyze_communities(
+        works=request.works,
+        analysis_type=request.analysis_type
+    )
 
 @app.post("/visualize")
 async def generate_visualization(request: VisualizationRequest):
     """Generate a visualization from analysis data."""
     try:
-        result = await visualization_agent.generate_visualization(
+        return await app.state.visualization_agent.generate_visualization(
             data=request.data,
             visualization_type=request.visualization_type,
             format=request.format,
             enhanced=request.enhanced,
             save_to_disk=request.save_to_disk
         )
-        return result
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/visualization/types")
 async def get_visualization_types():
@@ -440,367 +447,268 @@ async def get_visualization_types():
 @app.post("/wikipedia/summary")
 async def get_wikipedia_summary(request: WikipediaRequest):
     """Get Wikipedia summary for a given title."""
-    try:
-        data_source_agent = DataSourceAgent()
-        result = data_source_agent.get_wikipedia_summary(
-            title=request.title,
-            enhanced=request.enhanced
-        )
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return app.state.data_source_agent.get_wikipedia_summary(
+        title=request.title,
+        enhanced=request.enhanced
+    )
 
 @app.post("/wikipedia/search")
 async def search_wikipedia(request: WikipediaSearchRequest):
     """Search Wikipedia for articles matching a query."""
-    try:
-        data_source_agent = DataSourceAgent()
-        results = data_source_agent.search_wikipedia(
-            query=request.query,
-            limit=request.limit
-        )
-        return results
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return app.state.data_source_agent.search_wikipedia(
+        query=request.query,
+        limit=request.limit
+    )
 
 @app.post("/wikipedia/related")
 async def get_related_articles(request: WikipediaRelatedRequest):
     """Get articles related to a given Wikipedia article."""
-    try:
-        data_source_agent = DataSourceAgent()
-        results = data_source_agent.get_related_articles(
-            title=request.title,
-            limit=request.limit
-        )
-        return results
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return app.state.data_source_agent.get_related_articles(
+        title=request.title,
+        limit=request.limit
+    )
 
 @app.post("/goodreads/data")
 async def get_goodreads_data(request: BookRequest):
     """Get book data from Goodreads."""
-    try:
-        data_source_agent = DataSourceAgent()
-        result = data_source_agent.get_goodreads_data(
-            title=request.title,
-            author=request.author
-        )
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return app.state.data_source_agent.get_goodreads_data(
+        title=request.title,
+        author=request.author
+    )
 
 @app.post("/librarything/data")
 async def get_librarything_data(request: BookRequest):
     """Get book data from LibraryThing."""
-    try:
-        data_source_agent = DataSourceAgent()
-        result = data_source_agent.get_librarything_data(
-            title=request.title,
-            author=request.author
-        )
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return app.state.data_source_agent.get_librarything_data(
+        title=request.title,
+        author=request.author
+    )
 
 @app.post("/openlibrary/data")
 async def get_openlibrary_data(request: BookRequest):
     """Get book data from OpenLibrary."""
-    try:
-        data_source_agent = DataSourceAgent()
-        result = data_source_agent.get_openlibrary_data(
-            title=request.title,
-            author=request.author
-        )
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return app.state.data_source_agent.get_openlibrary_data(
+        title=request.title,
+        author=request.author
+    )
 
 @app.post("/isfdb/data")
 async def get_isfdb_data(request: ISFDBRequest):
     """Get book data from the Internet Science Fiction Database."""
-    try:
-        data_source_agent = DataSourceAgent()
-        result = data_source_agent.get_isfdb_data(
-            title=request.title,
-            author=request.author
-        )
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return app.state.data_source_agent.get_isfdb_data(
+        title=request.title,
+        author=request.author
+    )
 
 @app.post("/isfdb/author")
 async def get_isfdb_author(request: ISFDBAuthorRequest):
     """Get author information from the Internet Science Fiction Database."""
-    try:
-        data_source_agent = DataSourceAgent()
-        result = data_source_agent.get_isfdb_author(
-            author_name=request.author_name
-        )
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return app.state.data_source_agent.get_isfdb_author(
+        author_name=request.author_name
+    )
 
 @app.post("/rpggeek/data")
 async def get_rpggeek_data(request: RPGGeekRequest):
     """Get RPG data from RPGGeek."""
-    try:
-        data_source_agent = DataSourceAgent()
-        result = data_source_agent.get_rpggeek_data(
-            title=request.title,
-            author=request.author
-        )
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return app.state.data_source_agent.get_rpggeek_data(
+        title=request.title,
+        author=request.author
+    )
 
 @app.post("/gcd/data")
 async def get_gcd_data(request: GCDRequest):
     """Get comic data from the Grand Comics Database."""
-    try:
-        data_source_agent = DataSourceAgent()
-        result = data_source_agent.get_gcd_data(
-            title=request.title,
-            publisher=request.publisher,
-            year=request.year
-        )
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return app.state.data_source_agent.get_gcd_data(
+        title=request.title,
+        publisher=request.publisher,
+        year=request.year
+    )
 
 @app.post("/monitoring/profile")
 async def create_interest_profile(profile: InterestProfile):
     """Create a new interest profile for monitoring."""
-    try:
-        result = await monitoring_agent.add_interest_profile(profile.dict())
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await app.state.monitoring_agent.add_interest_profile(profile.dict())
 
 @app.get("/monitoring/profile/{profile_id}")
 async def get_profile_updates(profile_id: int):
     """Get updates for a specific interest profile."""
     try:
-        result = await monitoring_agent.get_notification_summary(profile_id)
-        return result
+        return await app.state.monitoring_agent.get_notification_summary(profile_id)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/monitoring/profiles")
 async def list_profiles():
     """List all interest profiles."""
-    try:
-        return {
-            "profiles": [
-                {
-                    "profile_id": pid,
-                    "name": profile["name"],
-                    "last_checked": profile["last_checked"],
-                    "sources": profile["sources"]
-                }
-                for pid, profile in monitoring_agent.interest_profiles.items()
-            ]
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "profiles": [
+            {
+                "profile_id": pid,
+                "name": profile["name"],
+                "last_checked": profile["last_checked"],
+                "sources": profile["sources"]
+            }
+            for pid, profile in app.state.monitoring_agent.interest_profiles.items()
+        ]
+    }
 
 @app.delete("/monitoring/profile/{profile_id}")
 async def delete_profile(profile_id: int):
     """Delete an interest profile."""
-    try:
-        if profile_id not in monitoring_agent.interest_profiles:
-            raise HTTPException(status_code=404, detail="Profile not found")
-        del monitoring_agent.interest_profiles[profile_id]
-        return {"status": "success", "message": f"Profile {profile_id} deleted"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    if profile_id not in app.state.monitoring_agent.interest_profiles:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    del app.state.monitoring_agent.interest_profiles[profile_id]
+    return {"status": "success", "message": f"Profile {profile_id} deleted"}
 
 @app.post("/monitoring/email/config")
 async def configure_email(config: EmailConfig):
     """Configure email notifications."""
-    try:
-        await monitoring_agent.configure_email(config.dict())
-        return {"status": "success", "message": "Email configuration updated"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    await app.state.monitoring_agent.configure_email(config.dict())
+    return {"status": "success", "message": "Email configuration updated"}
 
 @app.post("/monitoring/webhook/{webhook_id}")
 async def add_webhook(webhook_id: str, config: WebhookConfig):
     """Add a new webhook configuration."""
-    try:
-        await monitoring_agent.add_webhook(webhook_id, config.dict())
-        return {"status": "success", "message": f"Webhook {webhook_id} added"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    await app.state.monitoring_agent.add_webhook(webhook_id, config.dict())
+    return {"status": "success", "message": f"Webhook {webhook_id} added"}
 
 @app.delete("/monitoring/webhook/{webhook_id}")
 async def delete_webhook(webhook_id: str):
     """Delete a webhook configuration."""
-    try:
-        if webhook_id in monitoring_agent.webhooks:
-            del monitoring_agent.webhooks[webhook_id]
-            return {"status": "success", "message": f"Webhook {webhook_id} deleted"}
-        raise HTTPException(status_code=404, detail="Webhook not found")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    if webhook_id in app.state.monitoring_agent.webhooks:
+        del app.state.monitoring_agent.webhooks[webhook_id]
+        return {"status": "success", "message": f"Webhook {webhook_id} deleted"}
+    raise HTTPException(status_code=404, detail="Webhook not found")
 
 @app.get("/monitoring/statistics")
 async def get_monitoring_statistics():
     """Get monitoring statistics."""
-    try:
-        return await monitoring_agent.get_statistics()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await app.state.monitoring_agent.get_statistics()
 
 @app.post("/monitoring/cleanup")
 async def cleanup_notifications(days: Optional[int] = 30):
     """Clean up old notifications."""
-    try:
-        await monitoring_agent.cleanup_old_notifications(days)
-        return {"status": "success", "message": f"Cleaned up notifications older than {days} days"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    await app.state.monitoring_agent.cleanup_old_notifications(days)
+    return {"status": "success", "message": f"Cleaned up notifications older than {days} days"}
 
 # Parallel Execution Endpoints
 @app.post("/analyze/parallel/sf", tags=["Parallel Execution"])
 async def analyze_science_fiction_parallel(request: ParallelAnalysisRequest):
     """Analyze science fiction content using parallel execution"""
-    try:
-        factory = ParallelAgentFactory(ParallelConfig())
-        # Register the agent classes with their proper names
-        factory.register_agent_class(
-            "science_fiction",
-            ScienceFictionAgent,
-            MCPEnabledScienceFictionAgent
+    factory = app.state.parallel_factory
+
+    if request.mode == "parallel":
+        results = await factory.execute_parallel(
+            "science_fiction",  # Use the registered name
+            "analyze_content",
+            request.content,
+            title=request.title,
+            author=request.author,
+            year=request.year,
+            model=request.model
+        )
+    else:
+        results = await factory.execute_smart(
+            "science_fiction",  # Use the registered name
+            "analyze_content",
+            request.content,
+            title=request.title,
+            author=request.author,
+            year=request.year,
+            model=request.model
         )
-        
-        if request.mode == "parallel":
-            results = await factory.execute_parallel(
-                "science_fiction",  # Use the registered name
-                "analyze_content",
-                request.content,
-                title=request.title,
-                author=request.author,
-                year=request.year,
-                model=request.model
-            )
-        else:
-            results = await factory.execute_smart(
-                "science_fiction",  # Use the registered name
-                "analyze_content",
-                request.content,
-                title=request.title,
-                author=request.author,
-                year=request.year,
-                model=request.model
-            )
-            
-        return {
-            "results": results,
-            "comparison": factory.get_comparison(results),
-            "metrics": factory.monitor.get_metrics()
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        "results": results,
+        "comparison": factory.get_comparison(results),
+        "metrics": factory.monitor.get_metrics()
+    }
 
 @app.post("/analyze/parallel/comics", tags=["Parallel Execution"])
 async def analyze_comics_parallel(request: ParallelAnalysisRequest):
     """Analyze comics content using parallel execution"""
-    try:
-        factory = ParallelAgentFactory(ParallelConfig())
-        # Register the agent classes with their proper names
-        factory.register_agent_class(
-            "comics",
-            ComicsAgent,
-            MCPEnabledComicsAgent
+    factory = app.state.parallel_factory
+
+    if request.mode == "parallel":
+        results = await factory.execute_parallel(
+            "comics",  # Use the registered name
+            "analyze_content",
+            request.content,
+            title=request.title,
+            publisher=request.publisher,
+            year=request.year,
+            creator=request.creator,
+            model=request.model
+        )
+    else:
+        results = await factory.execute_smart(
+            "comics",  # Use the registered name
+            "analyze_content",
+            request.content,
+            title=request.title,
+            publisher=request.publisher,
+            year=request.year,
+            creator=request.creator,
+            model=request.model
+        )
+
+    return {
+        "results": results,
+        "comparison": factory.get_comparison(results),
+        "metrics": factory.monitor.get_metrics()
+    }
+
+@app.post("/analyze/parallel/rpg", tags=["Parallel Execution"])
+async def analyze_rpg_parallel(request: ParallelAnalysisRequest):
+    """Analyze RPG content using parallel execution"""
+    factory = app.state.parallel_factory
+
+    if request.mode == "parallel":
+        results = await factory.execute_parallel(
+            "rpg",  # Use the registered name
+            "analyze_content",
+            request.content,
+            title=request.title,
+            system=request.system,
+            source=request.source,
+            edition=request.edition,
+            publisher=request.publisher,
+            model=request.model
         )
-        
-        if request.mode == "parallel":
-            results = await factory.execute_parallel(
-                "comics",  # Use the registered name
-                "analyze_content",
-                request.content,
-                title=request.title,
-                publisher=request.publisher,
-                year=request.year,
-                creator=request.creator,
-                model=request.model
-            )
-        else:
-            results = await factory.execute_smart(
-                "comics",  # Use the registered name
-                "analyze_content",
-                request.content,
-                title=request.title,
-                publisher=request.publisher,
-                year=request.year,
-                creator=request.creator,
-                model=request.model
-            )
-            
         return {
             "results": results,
             "comparison": factory.get_comparison(results),
             "metrics": factory.monitor.get_metrics()
         }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-@app.post("/analyze/parallel/rpg", tags=["Parallel Execution"])
-async def analyze_rpg_parallel(request: ParallelAnalysisRequest):
-    """Analyze RPG content using parallel execution"""
-    try:
-        factory = ParallelAgentFactory(ParallelConfig())
-        # Register the agent classes with their proper names
-        factory.register_agent_class(
-            "rpg",
-            RPGAgent,
-            MCPEnabledRPGAgent
+    else:
+        result = await factory.execute_smart(
+            "rpg",  # Use the registered name
+            "analyze_content",
+            request.content,
+            title=request.title,
+            system=request.system,
+            source=request.source,
+            edition=request.edition,
+            publisher=request.publisher,
+            model=request.model,
+            mode=request.mode
         )
-        
-        if request.mode == "parallel":
-            results = await factory.execute_parallel(
-                "rpg",  # Use the registered name
-                "analyze_content",
-                request.content,
-                title=request.title,
-                system=request.system,
-                source=request.source,
-                edition=request.edition,
-                publisher=request.publisher,
-                model=request.model
-            )
-            return {
-                "results": results,
-                "comparison": factory.get_comparison(results),
-                "metrics": factory.monitor.get_metrics()
-            }
-        else:
-            result = await factory.execute_smart(
-                "rpg",  # Use the registered name
-                "analyze_content",
-                request.content,
-                title=request.title,
-                system=request.system,
-                source=request.source,
-                edition=request.edition,
-                publisher=request.publisher,
-                model=request.model,
-                mode=request.mode
-            )
-            return {
-                "results": result,
-                "metrics": factory.monitor.get_metrics()
-            }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        return {
+            "results": result,
+            "metrics": factory.monitor.get_metrics()
+        }
 
 if __name__ == "__main__":
+    import os
     import uvicorn
+    # loop and http default to "auto", which picks uvloop and httptools from uvicorn[standard]
+    # where the platform supports them; reload and multiple workers cannot be combined
     uvicorn.run(
         "src.api.app:app",
         host=settings.API_HOST,
         port=settings.API_PORT,
-        reload=settings.DEBUG
+        reload=settings.DEBUG,
+        workers=1 if settings.DEBUG else (os.cpu_count() or 4),
+        access_log=settings.DEBUG,
+        log_level=settings.LOG_LEVEL.lower()
     ) 
\ No newline at end of file
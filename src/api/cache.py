@@ -0,0 +1,96 @@
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from collections import OrderedDict
+from datetime import datetime
+import functools
+import hashlib
+import json
+import logging
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from ..config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Request field that asks for a fresh answer; it never changes what the answer is
+REFRESH_FIELD = "force_refresh"
+
+class ResponseCache:
+    """In-process cache of rendered endpoint responses, keyed by endpoint and request payload"""
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self.entries: OrderedDict[str, Tuple[bytes, datetime]] = OrderedDict()
+
+    @staticmethod
+    def make_key(endpoint: str, arguments: Dict[str, Any]) -> str:
+        """Hash the endpoint with a canonical JSON form of the handler arguments"""
+        payload = {
+            name: (
+                value.model_dump(mode="json", exclude={REFRESH_FIELD})
+                if isinstance(value, BaseModel) else jsonable_encoder(value)
+            )
+            for name, value in arguments.items()
+        }
+        canonical = json.dumps([endpoint, payload], sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, ttl: int) -> Optional[bytes]:
+        """Return a cached body younger than ttl seconds, or None"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        body, timestamp = entry
+        if (datetime.now() - timestamp).total_seconds() >= ttl:
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return body
+
+    def set(self, key: str, body: bytes) -> None:
+        """Store a body, evicting the least recently used entry when full"""
+        self.entries[key] = (body, datetime.now())
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every cached response"""
+        self.entries.clear()
+
+response_cache = ResponseCache()
+
+def _render(result: Any) -> bytes:
+    """Encode a handler result the way FastAPI's default JSON response does"""
+    return json.dumps(
+        jsonable_encoder(result),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+def cached(endpoint: str, ttl: Optional[int] = None) -> Callable:
+    """Serve repeated requests to an endpoint from the response cache
+
+    Responses carry an X-Cache header of HIT or MISS. A request with
+    force_refresh set skips the lookup and replaces the cached entry.
+    Entries live for ttl seconds, or settings.CACHE_TTL when not given.
+    """
+    def decorator(handler: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Response]]:
+        @functools.wraps(handler)
+        async def wrapper(**kwargs) -> Response:
+            if not settings.CACHE_ENABLED:
+                return await handler(**kwargs)
+
+            key = response_cache.make_key(endpoint, kwargs)
+            refresh = any(getattr(value, REFRESH_FIELD, False) for value in kwargs.values())
+            body = None if refresh else response_cache.get(key, ttl or settings.CACHE_TTL)
+            status = "HIT"
+            if body is None:
+                body = _render(await handler(**kwargs))
+                response_cache.set(key, body)
+                status = "MISS"
+            logger.debug("Response cache %s for %s", status, endpoint)
+            return Response(body, media_type="application/json", headers={"X-Cache": status})
+        return wrapper
+    return decorator
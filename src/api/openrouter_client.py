@@ -1,8 +1,15 @@
-from typing import Dict, Any, Optional, List
+from typing import AsyncIterator, Dict, Any, Optional, List
+import asyncio
+import json
 import aiohttp
 from ..config.settings import settings
 
 class OpenRouterClient:
+    # One pooled session shared by every client, so agents reuse keep-alive connections
+    _session: Optional[aiohttp.ClientSession] = None
+    _session_loop: Optional[asyncio.AbstractEventLoop] = None
+    max_connections = 256
+
     def __init__(self):
         self.api_key = settings.OPENROUTER_API_KEY
         self.default_model = settings.OPENROUTER_DEFAULT_MODEL
@@ -23,26 +30,45 @@ class OpenRouterClient:
         params: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         url = f"{self.base_url}/{endpoint}"
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.request(
-                    method=method,
-                    url=url,
-                    headers=self.headers,
-                    json=data,
-                    params=params,
-                ) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        raise Exception(f"{response.status}, message='{error_text}', url='{url}'")
-                    return await response.json()
-            except Exception as e:
-                raise Exception(f"Request failed: {str(e)}")
+        session = self._get_session()
+        try:
+            async with session.request(
+                method=method,
+                url=url,
+                headers=self.headers,
+                json=data,
+                params=params,
+            ) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise Exception(f"{response.status}, message='{error_text}', url='{url}'")
+                return await response.json()
+        except Exception as e:
+            raise Exception(f"Request failed: {str(e)}")
 
-    async def chat_completion(
+    @classmethod
+    def _get_session(cls) -> aiohttp.ClientSession:
+        """Get the shared session, creating it for the running event loop if needed"""
+        loop = asyncio.get_running_loop()
+        if cls._session is None or cls._session.closed or cls._session_loop is not loop:
+            cls._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=cls.max_connections)
+            )
+            cls._session_loop = loop
+        return cls._session
+
+    @classmethod
+    async def close(cls):
+        """Close the shared session"""
+        if cls._session is not None and not cls._session.closed:
+            await cls._session.close()
+        cls._session = None
+        cls._session_loop = None
+
+    def _completion_request(
         self,
-        messages: List[Dict[str, str]],
-        model: Optional[str] = None,
+        messages: List[Dict[str, Any]],
+        model: Optional[str],
         **kwargs
     ) -> Dict[str, Any]:
         # Force model if configured
@@ -54,7 +80,7 @@ class OpenRouterClient:
             model = self.default_model
 
         # Add required parameters for the model
-        request_data = {
+        return {
             "model": model,
             "messages": messages,
             "temperature": 0.7,
@@ -62,13 +88,49 @@ class OpenRouterClient:
             **kwargs
         }
 
+    async def chat_completion(
+        self,
+        messages: List[Dict[str, Any]],
+        model: Optional[str] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
         response = await self._make_request(
             method="POST",
             endpoint="chat/completions",
-            data=request_data
+            data=self._completion_request(messages, model, **kwargs)
         )
         return response
 
+    async def chat_completion_stream(
+        self,
+        messages: List[Dict[str, Any]],
+        model: Optional[str] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Yield the completion's text as the server streams it"""
+        url = f"{self.base_url}/chat/completions"
+        request_data = self._completion_request(messages, model, stream=True, **kwargs)
+        session = self._get_session()
+        async with session.post(url, headers=self.headers, json=request_data) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"Request failed: {response.status}, message='{error_text}', url='{url}'")
+            # Server-sent events: one "data: {...}" line per chunk, ": comment" keep-alives in between
+            async for line in response.content:
+                line = line.strip()
+                if not line.startswith(b"data:"):
+                    continue
+                data = line[5:].strip()
+                if data == b"[DONE]":
+                    break
+                chunk = json.loads(data)
+                if "error" in chunk:
+                    raise Exception(f"Request failed: {chunk['error']}")
+                for choice in chunk.get("choices", ()):
+                    text = choice.get("delta", {}).get("content")
+                    if text:
+                        yield text
+
     async def analyze_content(
         self,
         content: str,
@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 from pydantic import Field
@@ -40,6 +40,16 @@ class Settings(BaseSettings):
     CACHE_ENABLED: bool = Field(default=True, env="CACHE_ENABLED")
     CACHE_TTL: int = Field(default=3600, env="CACHE_TTL")  # 1 hour in seconds
     
+    # Monitoring configuration: max in-flight lookups per data source,
+    # e.g. MONITORING_SOURCE_CONCURRENCY='{"isfdb": 8, "wikipedia": 16}'
+    MONITORING_SOURCE_CONCURRENCY: Dict[str, int] = Field(
+        default={'isfdb': 8, 'goodreads': 4, 'wikipedia': 16},
+        env="MONITORING_SOURCE_CONCURRENCY"
+    )
+    MONITORING_DEFAULT_CONCURRENCY: int = Field(default=8, env="MONITORING_DEFAULT_CONCURRENCY")
+    # SQLite file for notification history; kept in memory when unset
+    MONITORING_HISTORY_DB: Optional[Path] = Field(default=None, env="MONITORING_HISTORY_DB")
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
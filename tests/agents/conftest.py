@@ -0,0 +1,13 @@
+import os
+
+# Agents load settings at import time, which requires an API key
+os.environ.setdefault("OPENROUTER_API_KEY", "test-key")
+
+import pytest
+from src.config.settings import settings
+
+@pytest.fixture(autouse=True)
+def agent_cache_dir(tmp_path, monkeypatch):
+    """Keep agent disk caches out of the working tree and apart between tests"""
+    monkeypatch.setattr(settings, "CACHE_DIR", tmp_path)
+    return tmp_path
@@ -0,0 +1,69 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+from src.agents.data_source_agent import DataSourceAgent
+
+@pytest.fixture
+def agent():
+    return DataSourceAgent()
+
+def _expire(agent, cache_key, seconds):
+    """Age a cache entry by the given number of seconds"""
+    data, timestamp = agent.cache[cache_key]
+    agent.cache[cache_key] = (data, timestamp - timedelta(seconds=seconds))
+
+def test_wikipedia_miss_is_cached(agent):
+    """Test that a missing Wikipedia page is served from cache until the negative TTL expires"""
+    page = MagicMock()
+    page.exists.return_value = False
+    with patch.object(agent.wiki, "page", return_value=page) as mock_page:
+        result = agent.get_wikipedia_summary("No Such Book")
+        assert result["exists"] is False
+
+        agent.get_wikipedia_summary("No Such Book")
+        assert mock_page.call_count == 1
+
+        _expire(agent, "wiki_No Such Book_False", agent.negative_cache_ttl + 1)
+        agent.get_wikipedia_summary("No Such Book")
+        assert mock_page.call_count == 2
+
+def test_openlibrary_miss_uses_negative_ttl(agent):
+    """Test that an OpenLibrary miss is refetched after the negative TTL"""
+    response = MagicMock()
+    response.json.return_value = {"docs": []}
+    with patch("src.agents.data_source_agent.requests.get", return_value=response) as mock_get:
+        result = agent.get_openlibrary_data("No Such Book")
+        assert result == {"error": "Book not found", "exists": False}
+
+        agent.get_openlibrary_data("No Such Book")
+        assert mock_get.call_count == 1
+
+        # Misses expire well before the positive TTL
+        _expire(agent, "openlibrary_No Such Book_None", agent.negative_cache_ttl + 1)
+        agent.get_openlibrary_data("No Such Book")
+        assert mock_get.call_count == 2
+
+def test_isfdb_miss_is_cached(agent):
+    """Test that an ISFDB miss returns the not-found shape and is cached"""
+    response = MagicMock()
+    response.text = "<html><body><table></table></body></html>"
+    with patch("src.agents.data_source_agent.requests.get", return_value=response) as mock_get:
+        result = agent.get_isfdb_data("No Such Book")
+        assert result == {"error": "Book not found", "exists": False}
+
+        agent.get_isfdb_data("No Such Book")
+        assert mock_get.call_count == 1
+
+        _expire(agent, "isfdb_No Such Book_None", agent.negative_cache_ttl + 1)
+        agent.get_isfdb_data("No Such Book")
+        assert mock_get.call_count == 2
+
+def test_hit_uses_positive_ttl(agent):
+    """Test that found results outlive the negative TTL"""
+    response = MagicMock()
+    response.json.return_value = {"docs": [{"title": "Dune", "author_name": ["Frank Herbert"], "key": "/works/1"}]}
+    with patch("src.agents.data_source_agent.requests.get", return_value=response) as mock_get:
+        agent.get_openlibrary_data("Dune")
+        _expire(agent, "openlibrary_Dune_None", agent.negative_cache_ttl + 1)
+        agent.get_openlibrary_data("Dune")
+        assert mock_get.call_count == 1
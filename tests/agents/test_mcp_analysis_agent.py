@@ -0,0 +1,72 @@
+import pytest
+from datetime import timedelta
+from src.agents.analysis_agent import AnalysisAgent
+from src.agents.mcp_analysis_agent import MCPEnabledAnalysisAgent
+
+@pytest.fixture
+def agent(monkeypatch):
+    agent = MCPEnabledAnalysisAgent()
+    agent.base_calls = 0
+    base_analyze = AnalysisAgent.analyze_content
+
+    async def counting_analyze(self, **kwargs):
+        self.base_calls += 1
+        return await base_analyze(self, **kwargs)
+
+    monkeypatch.setattr(AnalysisAgent, "analyze_content", counting_analyze)
+    return agent
+
+@pytest.mark.asyncio
+async def test_cache_hit(agent):
+    """Test that repeated calls are served from the cache"""
+    first = await agent.analyze_content("Dune", title="Dune")
+    second = await agent.analyze_content("Dune", title="Dune")
+    assert agent.base_calls == 1
+    assert first == second
+
+@pytest.mark.asyncio
+async def test_cached_result_is_not_shared(agent):
+    """Test that mutating a returned result does not corrupt the cache"""
+    first = await agent.analyze_content("Dune", title="Dune")
+    first["title"] = "MUTATED"
+    first["mcp_features"]["confidence_score"] = 0.0
+
+    second = await agent.analyze_content("Dune", title="Dune")
+    assert second is not first
+    assert second["title"] == "Dune"
+    assert second["mcp_features"]["confidence_score"] == 0.95
+
+@pytest.mark.asyncio
+async def test_cache_expiry(agent):
+    """Test that expired entries are recomputed"""
+    await agent.analyze_content("Dune")
+    for key, (result, timestamp) in list(agent.analysis_cache.items()):
+        agent.analysis_cache[key] = (result, timestamp - timedelta(seconds=agent.analysis_cache_ttl + 1))
+    await agent.analyze_content("Dune")
+    assert agent.base_calls == 2
+
+@pytest.mark.asyncio
+async def test_cache_eviction(agent):
+    """Test that the least recently used entry is evicted once the cache is full"""
+    for i in range(agent.analysis_cache_size):
+        await agent.analyze_content(f"content {i}")
+    assert len(agent.analysis_cache) == 512
+
+    # Touch the oldest entry so the second oldest is evicted instead
+    await agent.analyze_content("content 0")
+    await agent.analyze_content("new content")
+    assert len(agent.analysis_cache) == 512
+
+    calls = agent.base_calls
+    await agent.analyze_content("content 0")
+    assert agent.base_calls == calls
+    await agent.analyze_content("content 1")
+    assert agent.base_calls == calls + 1
+
+@pytest.mark.asyncio
+async def test_cache_key_includes_parameters(agent):
+    """Test that model and year produce separate cache entries"""
+    await agent.analyze_content("Dune", model="model-a")
+    await agent.analyze_content("Dune", model="model-b")
+    await agent.analyze_content("Dune", model="model-a", year=1965)
+    assert len(agent.analysis_cache) == 3
@@ -0,0 +1,478 @@
+import asyncio
+import json
+import pytest
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from src.agents import monitoring_agent
+from src.agents.monitoring_agent import MonitoringAgent
+
+class StubDataSource:
+    """Data source with a mix of sync, async and failing lookups"""
+
+    def __init__(self):
+        self.calls = []
+
+    def get_isfdb_data(self, title, author=None):
+        self.calls.append(("isfdb", title))
+        if title == "missing":
+            return {"error": "Book not found", "exists": False}
+        return {"id": f"isfdb-{title}", "title": f"{title} novel"}
+
+    def search_wikipedia(self, query, limit=5):
+        self.calls.append(("wikipedia", query))
+        return [
+            {"id": f"wiki-{query}-1", "title": f"{query} article"},
+            {"id": f"wiki-{query}-2", "title": f"{query} sequel"}
+        ]
+
+    async def search_doaj(self, query):
+        self.calls.append(("doaj", query))
+        raise RuntimeError("DOAJ unavailable")
+
+    def get_goodreads_data(self, title, author=None):
+        self.calls.append(("goodreads", title))
+        return {"id": f"goodreads-{title}", "title": "Neuromancer", "author": title}
+
+@pytest.fixture
+def agent():
+    agent = MonitoringAgent()
+    agent.data_source_agent = StubDataSource()
+    return agent
+
+async def _add_profile(agent, **overrides):
+    profile = {
+        'name': 'Cyberpunk',
+        'sources': ['isfdb', 'wikipedia', 'doaj'],
+        'keywords': ['cyberpunk'],
+        'authors': [],
+        'notification_preferences': {'frequency': 'daily', 'channels': []}
+    }
+    profile.update(overrides)
+    return (await agent.add_interest_profile(profile))['profile_id']
+
+@pytest.mark.asyncio
+async def test_check_for_updates_tags_items_with_source(agent):
+    """Test that items from every source are returned tagged with their source"""
+    profile_id = await _add_profile(agent)
+    items = await agent.check_for_updates(profile_id)
+
+    assert [item['source'] for item in items] == ['isfdb', 'wikipedia', 'wikipedia']
+    assert items[0] == {'source': 'isfdb', 'id': 'isfdb-cyberpunk', 'title': 'cyberpunk novel'}
+    assert ('wikipedia', 'wiki-cyberpunk-2') in agent.notification_history
+
+@pytest.mark.asyncio
+async def test_check_for_updates_keeps_results_when_a_source_fails(agent, caplog):
+    """Test that a failing lookup is logged without dropping the other results"""
+    profile_id = await _add_profile(agent)
+    items = await agent.check_for_updates(profile_id)
+
+    assert len(items) == 3
+    assert "Error checking DOAJ: DOAJ unavailable" in caplog.text
+
+@pytest.mark.asyncio
+async def test_check_for_updates_skips_error_results(agent):
+    """Test that not-found results are not recorded as notifications"""
+    profile_id = await _add_profile(agent, sources=['isfdb'], keywords=['missing'])
+    items = await agent.check_for_updates(profile_id)
+
+    assert items == []
+    assert agent.notification_history == {}
+
+@pytest.mark.asyncio
+async def test_check_for_updates_queries_goodreads_by_author(agent):
+    """Test that Goodreads lookups use each profile author as the query"""
+    profile_id = await _add_profile(
+        agent, sources=['goodreads'], keywords=['neuromancer'], authors=['William Gibson']
+    )
+    items = await agent.check_for_updates(profile_id)
+
+    assert agent.data_source_agent.calls == [("goodreads", "William Gibson")]
+    assert items[0]['source'] == 'goodreads'
+
+class StubResponse:
+    def __init__(self, status):
+        self.status = status
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+class StubSession:
+    """Records webhook posts instead of sending them"""
+
+    def __init__(self):
+        self.posts = []
+        self.closed = False
+
+    def post(self, url, **kwargs):
+        self.posts.append((url, kwargs))
+        if "broken" in url:
+            raise ConnectionError("connection refused")
+        return StubResponse(200)
+
+    async def close(self):
+        self.closed = True
+
+@pytest.mark.asyncio
+async def test_webhooks_share_one_session(agent, caplog):
+    """Test that webhooks are posted through one shared session"""
+    session = StubSession()
+    agent._http = session
+    await agent.add_webhook('ok', {'url': 'https://example.com/ok', 'events': ['new_book'], 'secret': 's3cret'})
+    await agent.add_webhook('broken', {'url': 'https://example.com/broken', 'events': ['new_book']})
+    await agent.add_webhook('other', {'url': 'https://example.com/other', 'events': ['other']})
+    profile_id = await _add_profile(agent, notification_preferences={'channels': ['webhook']})
+
+    await agent.send_notification(profile_id, [{'title': 'Neuromancer'}])
+    await agent.send_notification(profile_id, [{'title': 'Count Zero'}])
+
+    assert [url for url, _ in session.posts] == ['https://example.com/ok', 'https://example.com/broken'] * 2
+    ok_post = session.posts[0][1]
+    assert ok_post['headers'] == {'Content-Type': 'application/json', 'X-Webhook-Secret': 's3cret'}
+    assert json.loads(ok_post['data'])['profile_id'] == profile_id
+    # Every webhook in one notification receives the same serialized body
+    assert session.posts[1][1]['data'] is ok_post['data']
+    assert "Error sending webhook broken: connection refused" in caplog.text
+
+    await agent.close()
+    assert session.closed
+    assert agent._http is None
+
+def _age_history(agent, source, days):
+    """Backdate every history entry for a source, keeping expiry order"""
+    entries = []
+    for timestamp, key in agent._history_order:
+        if key[0] == source:
+            timestamp -= timedelta(days=days)
+            agent.notification_history[key] = timestamp
+        entries.append((timestamp, key))
+    agent._history_order = deque(sorted(entries, key=lambda entry: entry[0]))
+
+@pytest.mark.asyncio
+async def test_statistics_track_source_counts(agent):
+    """Test that source stats follow notification history through cleanup"""
+    profile_id = await _add_profile(agent)
+    await agent.check_for_updates(profile_id)
+
+    stats = await agent.get_statistics()
+    assert stats['source_stats'] == {'isfdb': 1, 'goodreads': 0, 'wikipedia': 2}
+
+    _age_history(agent, 'wikipedia', days=31)
+    await agent.cleanup_old_notifications()
+
+    stats = await agent.get_statistics()
+    assert stats['total_notifications'] == 1
+    assert stats['source_stats'] == {'isfdb': 1, 'goodreads': 0, 'wikipedia': 0}
+
+@pytest.mark.asyncio
+async def test_matches_profile_uses_prepared_keywords(agent):
+    """Test that keyword matching is case-insensitive and authors match exactly"""
+    profile_id = await _add_profile(agent, keywords=['CyberPunk'], authors=['William Gibson'])
+    profile = agent.interest_profiles[profile_id]
+
+    assert profile['_keywords_lower'] == ['cyberpunk']
+    assert agent._matches_profile({'title': 'A Cyberpunk Classic'}, profile)
+    assert agent._matches_profile({'title': 'Neuromancer', 'author': 'William Gibson'}, profile)
+    assert not agent._matches_profile({'title': 'Dune', 'author': 'Frank Herbert'}, profile)
+
+@pytest.mark.asyncio
+async def test_matches_profile_without_automaton(agent, monkeypatch):
+    """Test that keyword matching falls back to substring checks without pyahocorasick"""
+    monkeypatch.setattr(monitoring_agent, 'ahocorasick', None)
+    profile_id = await _add_profile(agent, keywords=['Space Opera', 'cyberpunk'])
+    profile = agent.interest_profiles[profile_id]
+
+    assert profile['_keyword_automaton'] is None
+    assert agent._matches_profile({'title': 'A space opera epic'}, profile)
+    assert not agent._matches_profile({'title': 'Dune'}, profile)
+
+@pytest.mark.asyncio
+async def test_matches_profile_with_automaton(agent):
+    """Test that keyword matching uses the automaton when pyahocorasick is installed"""
+    pytest.importorskip('ahocorasick')
+    profile_id = await _add_profile(agent, keywords=['Space Opera', 'cyberpunk'])
+    profile = agent.interest_profiles[profile_id]
+
+    assert profile['_keyword_automaton'] is not None
+    assert agent._matches_profile({'title': 'A space opera epic'}, profile)
+    assert not agent._matches_profile({'title': 'Dune'}, profile)
+
+@pytest.mark.asyncio
+async def test_overlapping_results_are_matched_once(agent, monkeypatch):
+    """Test that an item returned by several lookups is only evaluated once per check"""
+    matched = []
+    original = agent._matches_profile
+
+    def counting_match(item, profile):
+        matched.append(item['id'])
+        return original(item, profile)
+
+    monkeypatch.setattr(agent, '_matches_profile', counting_match)
+    monkeypatch.setattr(agent.data_source_agent, 'search_wikipedia',
+                        lambda query, limit=5: [{'id': 'shared', 'title': 'Unrelated'}])
+    profile_id = await _add_profile(agent, sources=['wikipedia'], keywords=['cyberpunk', 'steampunk'])
+
+    assert await agent.check_for_updates(profile_id) == []
+    assert matched == ['shared']
+
+class StubSMTP:
+    """Records SMTP sessions instead of connecting"""
+    sessions = []
+
+    def __init__(self, host, port):
+        self.sent = []
+        self.thread = threading.current_thread()
+        StubSMTP.sessions.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def starttls(self):
+        pass
+
+    def login(self, username, password):
+        pass
+
+    def send_message(self, msg):
+        self.sent.append(msg['To'])
+
+@pytest.fixture
+def smtp(monkeypatch):
+    StubSMTP.sessions = []
+    monkeypatch.setattr(monitoring_agent.smtplib, 'SMTP', StubSMTP)
+    monkeypatch.setattr(monitoring_agent, 'aiosmtplib', None)
+    return StubSMTP
+
+@pytest.mark.asyncio
+async def test_queued_emails_share_one_connection(agent, smtp):
+    """Test that emails queued across profiles are sent over one SMTP session"""
+    await agent.configure_email({
+        'smtp_server': 'smtp.example.com', 'smtp_port': 587,
+        'username': 'user', 'password': 'pass', 'from_email': 'alerts@example.com'
+    })
+    recipients = ['a@example.com', 'b@example.com']
+    for address in recipients:
+        profile_id = await _add_profile(agent, notification_preferences={
+            'channels': ['email'], 'email_address': address
+        })
+        await agent.send_notification(profile_id, [{'title': 'Neuromancer'}], flush=False)
+    assert smtp.sessions == []
+
+    await agent.flush_email_queue()
+    assert len(smtp.sessions) == 1
+    assert smtp.sessions[0].sent == recipients
+    assert agent._pending_emails == []
+
+@pytest.mark.asyncio
+async def test_smtp_runs_off_the_event_loop(agent, smtp):
+    """Test that blocking smtplib delivery runs in a worker thread"""
+    await agent.configure_email({
+        'smtp_server': 'smtp.example.com', 'smtp_port': 587,
+        'username': 'user', 'password': 'pass', 'from_email': 'alerts@example.com'
+    })
+    profile_id = await _add_profile(agent, notification_preferences={
+        'channels': ['email'], 'email_address': 'a@example.com'
+    })
+    await agent.send_notification(profile_id, [{'title': 'Neuromancer'}])
+
+    assert smtp.sessions[0].sent == ['a@example.com']
+    assert smtp.sessions[0].thread is not threading.main_thread()
+
+@pytest.mark.asyncio
+async def test_cleanup_only_visits_expired_entries(agent):
+    """Test that cleanup stops at the first unexpired entry and skips stale order records"""
+    profile_id = await _add_profile(agent, sources=['wikipedia'])
+    await agent.check_for_updates(profile_id)
+    _age_history(agent, 'wikipedia', days=31)
+
+    # A key re-notified since its old record was queued must survive cleanup
+    key = ('wikipedia', 'wiki-cyberpunk-1')
+    now = datetime.now()
+    agent.notification_history[key] = now
+    agent._history_order.append((now, key))
+
+    await agent.cleanup_old_notifications()
+    assert agent.notification_history == {key: now}
+    assert list(agent._history_order) == [(now, key)]
+
+@pytest.mark.asyncio
+async def test_compiled_matcher_checks_optional_criteria(agent):
+    """Test that year range, genre and rating criteria are only applied when set"""
+    profile_id = await _add_profile(
+        agent, keywords=[], year_range=(1980, 1989), genres=['cyberpunk'], min_rating=4.0
+    )
+    profile = agent.interest_profiles[profile_id]
+    assert agent._matches_profile({'year': 1984}, profile)
+    assert agent._matches_profile({'genres': ['space opera', 'cyberpunk']}, profile)
+    assert agent._matches_profile({'genres': 'cyberpunk'}, profile)
+    assert not agent._matches_profile({'genres': 'punk'}, profile)
+    assert agent._matches_profile({'rating': 4.5}, profile)
+    assert not agent._matches_profile({'year': 1995, 'genres': ['fantasy'], 'rating': 3.0}, profile)
+
+    plain_id = await _add_profile(agent, keywords=[])
+    assert not agent._matches_profile({'year': 1984, 'rating': 5.0}, agent.interest_profiles[plain_id])
+
+@pytest.mark.asyncio
+async def test_keywords_only_match_search_fields(agent):
+    """Test that keywords match descriptive fields but not urls or ids"""
+    profile_id = await _add_profile(agent, keywords=['cyberpunk'])
+    profile = agent.interest_profiles[profile_id]
+
+    assert agent._matches_profile({'title': 'Dune', 'summary': 'A CYBERPUNK story'}, profile)
+    assert agent._matches_profile({'title': 'Dune', 'tags': ['cyberpunk']}, profile)
+    assert not agent._matches_profile({'title': 'Dune', 'url': 'https://example.com/cyberpunk'}, profile)
+    assert not agent._matches_profile({'id': 'cyberpunk-1'}, profile)
+
+@pytest.mark.asyncio
+async def test_check_for_updates_returns_each_item_once(agent, monkeypatch):
+    """Test that items found by several keywords are returned once and id-less items stay distinct"""
+    monkeypatch.setattr(agent.data_source_agent, 'search_wikipedia', lambda query, limit=5: [
+        {'title': 'Cyberpunk', 'url': 'https://en.wikipedia.org/wiki/Cyberpunk'},
+        {'title': 'Steampunk', 'url': 'https://en.wikipedia.org/wiki/Steampunk'}
+    ])
+    profile_id = await _add_profile(agent, sources=['wikipedia'], keywords=['cyberpunk', 'steampunk'])
+    items = await agent.check_for_updates(profile_id)
+
+    assert [item['title'] for item in items] == ['Cyberpunk', 'Steampunk']
+    assert ('wikipedia', 'https://en.wikipedia.org/wiki/Steampunk') in agent.notification_history
+
+@pytest.mark.asyncio
+async def test_lookups_respect_source_concurrency(agent, monkeypatch):
+    """Test that concurrent lookups against one source never exceed its cap"""
+    in_flight = 0
+    peak = 0
+
+    async def slow_search(query):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return [{'id': query, 'title': query}]
+
+    monkeypatch.setattr(agent.data_source_agent, 'search_doaj', slow_search, raising=False)
+    agent.source_concurrency['doaj'] = 2
+    keywords = [f'cyberpunk {i}' for i in range(6)]
+    profile_id = await _add_profile(agent, sources=['doaj'], keywords=keywords)
+
+    items = await agent.check_for_updates(profile_id)
+    assert len(items) == 6
+    assert peak == 2
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_dump_json_round_trips(monkeypatch, use_orjson):
+    """Test that webhook payloads serialize the same with and without orjson"""
+    if use_orjson:
+        pytest.importorskip('orjson')
+    else:
+        monkeypatch.setattr(monitoring_agent, 'orjson', None)
+    payload = {'profile_id': 1, 'items': [{'title': 'Neuromancer', 'year': 1984}]}
+    body = monitoring_agent._dump_json(payload)
+    assert isinstance(body, bytes)
+    assert json.loads(body) == payload
+
+@pytest.mark.asyncio
+async def test_profile_ids_are_not_reused_after_deletion(agent):
+    """Test that adding a profile after a deletion does not overwrite an existing one"""
+    first = await _add_profile(agent, name='First')
+    second = await _add_profile(agent, name='Second')
+    del agent.interest_profiles[first]
+
+    third = await _add_profile(agent, name='Third')
+    assert third not in (first, second)
+    assert agent.interest_profiles[second]['name'] == 'Second'
+    assert agent.interest_profiles[third]['name'] == 'Third'
+
+@pytest.mark.asyncio
+async def test_lookups_are_cached_across_profiles(agent):
+    """Test that profiles sharing a keyword reuse the upstream lookup until the TTL expires"""
+    first = await _add_profile(agent, sources=['wikipedia'], min_poll_interval=0)
+    second = await _add_profile(agent, sources=['wikipedia'])
+    first_items = await agent.check_for_updates(first)
+    await agent.check_for_updates(second)
+    assert agent.data_source_agent.calls == [("wikipedia", "cyberpunk")]
+
+    # Cached items are tagged afresh for every caller
+    cached_items, _ = next(iter(agent._fetch_cache.values()))
+    assert 'source' not in cached_items[0]
+    assert first_items[0] is not cached_items[0]
+
+    for key, (results, timestamp) in list(agent._fetch_cache.items()):
+        agent._fetch_cache[key] = (results, timestamp - timedelta(seconds=agent.fetch_cache_ttl))
+    await agent.check_for_updates(first)
+    assert len(agent.data_source_agent.calls) == 2
+
+@pytest.mark.asyncio
+async def test_repeat_checks_within_poll_interval_skip_lookups(agent):
+    """Test that a check inside the poll interval returns the previous result without lookups"""
+    profile_id = await _add_profile(agent, sources=['wikipedia'])
+    items = await agent.check_for_updates(profile_id)
+    again = await agent.check_for_updates(profile_id)
+    assert again == items
+    assert again is not items
+    assert len(agent.data_source_agent.calls) == 1
+
+    profile = agent.interest_profiles[profile_id]
+    profile['last_checked'] -= agent.min_poll_interval
+    agent._fetch_cache.clear()
+    await agent.check_for_updates(profile_id)
+    assert len(agent.data_source_agent.calls) == 2
+
+@pytest.mark.asyncio
+async def test_cleanup_archives_profiles_not_checked_recently(agent):
+    """Test that profiles idle past the cutoff are archived and statistics reflect it"""
+    idle = await _add_profile(agent, name='Idle')
+    active = await _add_profile(agent, name='Active')
+    agent._last_checked[idle] -= timedelta(days=31).total_seconds()
+
+    await agent.cleanup_old_notifications()
+    assert agent.interest_profiles[idle]['status'] == 'archived'
+    assert 'status' not in agent.interest_profiles[active]
+
+    stats = await agent.get_statistics()
+    assert stats['active_profiles'] == 1
+    assert datetime.now() - stats['last_check_time'] < timedelta(minutes=1)
+
+def test_last_checked_index_grows(agent):
+    """Test that the timestamp index grows to fit large profile ids"""
+    agent._mark_checked(5000, 123.0)
+    assert len(agent._last_checked) > 5000
+    assert agent._last_checked[5000] == 123.0
+
+@pytest.mark.asyncio
+async def test_matches_profile_with_multiple_item_authors(agent):
+    """Test that items listing several authors match any profile author"""
+    profile_id = await _add_profile(agent, keywords=[], authors=['Bruce Sterling'])
+    profile = agent.interest_profiles[profile_id]
+
+    assert agent._matches_profile({'author': ['William Gibson', 'Bruce Sterling']}, profile)
+    assert not agent._matches_profile({'author': ['William Gibson']}, profile)
+    assert not agent._matches_profile({'author': None}, profile)
+
+@pytest.mark.asyncio
+async def test_sqlite_history_persists_and_expires(tmp_path):
+    """Test that a SQLite-backed history survives a restart and expires by timestamp"""
+    path = tmp_path / "history.db"
+    agent = MonitoringAgent(history_path=path)
+    agent.data_source_agent = StubDataSource()
+    profile_id = await _add_profile(agent)
+    await agent.check_for_updates(profile_id)
+    assert ('wikipedia', 'wiki-cyberpunk-1') in agent.notification_history
+    agent.notification_history[('isfdb', 'isfdb-cyberpunk')] = datetime.now() - timedelta(days=31)
+
+    restarted = MonitoringAgent(history_path=path)
+    assert len(restarted.notification_history) == 3
+    assert (await restarted.get_statistics())['source_stats']['wikipedia'] == 2
+
+    await restarted.cleanup_old_notifications()
+    assert set(restarted.notification_history) == {
+        ('wikipedia', 'wiki-cyberpunk-1'), ('wikipedia', 'wiki-cyberpunk-2')
+    }
+    stats = await restarted.get_statistics()
+    assert stats['source_stats'] == {'isfdb': 0, 'goodreads': 0, 'wikipedia': 2}
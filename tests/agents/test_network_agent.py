@@ -0,0 +1,236 @@
+import copy
+import json
+import sys
+import numpy as np
+import pytest
+from src.agents import network_agent
+from src.agents.network_agent import NetworkAnalysisAgent
+
+def _character(name, *targets, role="Protagonist"):
+    return {"name": name, "role": role, "relationships": [{"target": t} for t in targets]}
+
+@pytest.fixture
+def works():
+    """Two tightly knit crews joined by a single contact, plus an isolated character"""
+    return [
+        {
+            "title": "Neuromancer",
+            "year": 1984,
+            "characters": [
+                _character("Case", "Molly", "Armitage", "Riviera"),
+                _character("Molly", "Armitage", "Riviera"),
+                _character("Armitage", "Riviera"),
+                _character("Riviera", "Finn", role="Antagonist")
+            ]
+        },
+        {
+            "title": "Count Zero",
+            "year": 1986,
+            "characters": [
+                _character("Finn", "Bobby", "Angie", "Turner"),
+                _character("Bobby", "Angie", "Turner"),
+                _character("Angie", "Turner"),
+                _character("Marly")
+            ]
+        }
+    ]
+
+@pytest.fixture
+def agent():
+    return NetworkAnalysisAgent()
+
+def test_network_metrics(agent, works):
+    """Test character and connection counts and density"""
+    network = agent._build_network(works)
+    metrics = agent._perform_algorithmic_analysis(network)["network_metrics"]
+    assert metrics["total_characters"] == 9
+    assert metrics["total_connections"] == 13
+    assert metrics["density"] == pytest.approx(13 / 36)
+
+def test_louvain_splits_bridged_groups(agent, works):
+    """Test that Louvain separates the two crews that components would merge"""
+    network = agent._build_network(works)
+    communities = agent._perform_algorithmic_analysis(network)["communities"]
+    assert sorted(map(sorted, communities)) == [
+        ["Angie", "Bobby", "Finn", "Turner"],
+        ["Armitage", "Case", "Molly", "Riviera"]
+    ]
+
+def test_component_communities(agent, works):
+    """Test that the components method groups every connected character"""
+    agent.community_method = "components"
+    network = agent._build_network(works)
+    communities = agent._perform_algorithmic_analysis(network)["communities"]
+    assert communities == [{"Case", "Molly", "Armitage", "Riviera", "Finn", "Bobby", "Angie", "Turner"}]
+
+def test_bridge_characters_are_most_central(agent, works):
+    """Test that characters bridging the crews rank highest"""
+    network = agent._build_network(works)
+    central = agent._perform_algorithmic_analysis(network)["central_characters"]
+    assert len(central) == 5
+    assert set(central[:2]) == {"Riviera", "Finn"}
+
+def test_central_characters_top_k(agent, works):
+    """Test that top_k bounds the ranking without reordering it"""
+    network = agent._build_network(works)
+    ranking = agent._perform_algorithmic_analysis(network, top_k=len(network))["central_characters"]
+    assert ranking[-1] == "Marly"
+    assert agent._perform_algorithmic_analysis(network, top_k=3)["central_characters"] == ranking[:3]
+
+def test_names_are_interned(agent):
+    """Test that names built at runtime share one object across works"""
+    suffix = "ase"
+    works = [
+        {"title": "A", "characters": [{"name": "C" + suffix, "relationships": [{"target": "M" + "olly"}]}]},
+        {"title": "B", "characters": [{"name": "M" + "olly", "relationships": [{"target": "C" + suffix}]}]}
+    ]
+    network = agent._build_network(works)
+    case = next(name for name in network if name == "Case")
+    assert case is sys.intern("Case")
+    assert next(iter(network["Molly"]["connections"])) is case
+
+def test_csr_matches_network(agent, works):
+    """Test that the CSR arrays hold the same adjacency as the dict network"""
+    network = agent._build_network(works)
+    csr = agent._build_csr(network)
+    assert sorted(csr.names) == sorted(network)
+    assert all(csr.index[name] == i for i, name in enumerate(csr.names))
+    assert csr.indptr[-1] == len(csr.indices) == 26
+    for name, data in network.items():
+        neighbors = {csr.names[i] for i in csr.neighbors(csr.index[name])}
+        assert neighbors == data["connections"]
+
+def test_community_density(agent, works):
+    """Test densities of a clique, a partial group and a single character"""
+    csr = agent._build_csr(agent._build_network(works))
+    assert agent._calculate_community_density({"Case", "Molly", "Armitage", "Riviera"}, csr) == 1.0
+    assert agent._calculate_community_density({"Case", "Riviera", "Finn"}, csr) == pytest.approx(2 / 3)
+    assert agent._calculate_community_density({"Marly"}, csr) == 0.0
+
+@pytest.mark.parametrize("compiled", [True, False])
+def test_bfs_components_labels(compiled):
+    """Test the component kernel, compiled and as plain Python, on a graph with an isolated node"""
+    kernel = network_agent._bfs_components
+    if not compiled:
+        kernel = getattr(kernel, "py_func", kernel)
+    # Edges 0-1, 1-2 and 3-4; node 5 is isolated
+    indptr = np.array([0, 1, 3, 4, 5, 6, 6])
+    indices = np.array([1, 0, 2, 1, 4, 3], dtype=np.int32)
+    labels = kernel(indptr, indices, 6)
+    assert labels.tolist() == [0, 0, 0, 1, 1, 2]
+
+@pytest.mark.parametrize("compiled", [True, False])
+def test_reverse_cuthill_mckee_reduces_bandwidth(compiled):
+    """Test that RCM renumbers a scrambled path so neighbours get adjacent ids"""
+    kernel = network_agent._reverse_cuthill_mckee
+    if not compiled:
+        kernel = getattr(kernel, "py_func", kernel)
+    # Path 0-3-1-4-2 with node 5 isolated
+    indptr = np.array([0, 1, 3, 4, 6, 8, 8])
+    indices = np.array([3, 3, 4, 4, 0, 1, 1, 2], dtype=np.int32)
+    csr = network_agent.CSRNetwork(list("abcdef"), {}, indptr, indices)
+    order = kernel(indptr, indices, 6)
+    assert sorted(order.tolist()) == list(range(6))
+
+    permuted = csr.permute(order)
+    sources, targets = permuted.edges()
+    assert (targets - sources).max() == 1
+    edges = {frozenset((permuted.names[s], permuted.names[t])) for s, t in zip(sources, targets)}
+    assert edges == {frozenset(pair) for pair in ("ad", "bd", "be", "ce")}
+
+@pytest.fixture
+def offline_agent(agent, monkeypatch):
+    """Agent whose LLM call is stubbed out"""
+    async def fake_analysis(**kwargs):
+        return {"insights": "stub"}
+    monkeypatch.setattr(agent, "_get_analysis", fake_analysis)
+    return agent
+
+@pytest.mark.asyncio
+async def test_repeated_works_reuse_structure(offline_agent, works, monkeypatch):
+    """Test that identical works skip rebuilding the network and analysis"""
+    builds = []
+    original = offline_agent._build_network
+    monkeypatch.setattr(offline_agent, "_build_network", lambda w: builds.append(1) or original(w))
+
+    first = await offline_agent.analyze_network(works)
+    first["algorithmic_analysis"]["communities"].clear()
+    second = await offline_agent.analyze_network(copy.deepcopy(works))
+    assert len(builds) == 1
+    assert len(second["algorithmic_analysis"]["communities"]) == 2
+
+    works[1]["characters"].append(_character("Wintermute", "Case"))
+    await offline_agent.analyze_network(works)
+    assert len(builds) == 2
+
+@pytest.mark.asyncio
+async def test_visualization_data_is_opt_in(offline_agent, works):
+    """Test that nodes, edges and community members are only built on request"""
+    summary = await offline_agent.analyze_network(works)
+    assert summary["visualization_data"] == {"metrics": summary["algorithmic_analysis"]["network_metrics"]}
+
+    full = await offline_agent.analyze_network(works, visualization=True)
+    data = full["visualization_data"]
+    assert len(data["nodes"]) == 9 and len(data["edges"]) == 13
+    assert all(isinstance(community["characters"], tuple) for community in data["communities"])
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+@pytest.mark.asyncio
+async def test_serialize_analysis(offline_agent, works, monkeypatch, use_orjson):
+    """Test that analyses serialize with community sets and numpy values, with and without orjson"""
+    if not use_orjson:
+        monkeypatch.setattr(network_agent, "orjson", None)
+    analysis = await offline_agent.analyze_network(works, visualization=True)
+    analysis["degrees"] = np.diff(offline_agent._build_csr(offline_agent._build_network(works)).indptr)
+
+    decoded = json.loads(offline_agent.serialize_analysis(analysis))
+    assert sorted(map(len, decoded["algorithmic_analysis"]["communities"])) == [4, 4]
+    assert decoded["degrees"] == analysis["degrees"].tolist()
+    assert decoded["visualization_data"]["metrics"]["total_connections"] == 13
+
+def test_visualization_nodes_carry_community_ids(agent, works):
+    """Test that nodes get their community ID and unclustered characters get 0"""
+    network = agent._build_network(works)
+    analysis = agent._perform_algorithmic_analysis(network)
+    nodes = {node["id"]: node for node in agent._prepare_visualization_data(network, analysis)["nodes"]}
+
+    case_community = nodes["Case"]["community"]
+    assert case_community in (1, 2)
+    assert nodes["Molly"]["community"] == case_community
+    assert nodes["Finn"]["community"] == 3 - case_community
+    assert nodes["Marly"]["community"] == 0
+    assert nodes["Case"]["connections"] == 3
+
+def test_bulk_community_densities(agent, works):
+    """Test that bulk densities match the per-community calculation"""
+    csr = agent._build_csr(agent._build_network(works))
+    communities = [{"Case", "Molly", "Armitage"}, {"Riviera", "Finn", "Bobby"}, {"Marly"}]
+    densities = agent._calculate_community_densities(communities, csr)
+    assert densities == [1.0, pytest.approx(2 / 3), 0.0]
+    assert agent._calculate_community_densities([], csr) == []
+
+def test_edges_are_emitted_once(agent, works):
+    """Test that visualization edges and relationship counts see each edge once"""
+    network = agent._build_network(works)
+    analysis = agent._perform_algorithmic_analysis(network)
+    edges = agent._prepare_visualization_data(network, analysis)["edges"]
+
+    pairs = {frozenset((edge["source"], edge["target"])) for edge in edges}
+    assert len(edges) == len(pairs) == 13
+    assert frozenset(("Riviera", "Finn")) in pairs
+    assert analysis["relationship_patterns"]["relationship_types"] == {"connection": 13}
+    assert analysis["relationship_patterns"]["common_roles"] == {"Protagonist": 7, "Antagonist": 1, "Unknown": 1}
+
+def test_analysis_prompt(agent, works):
+    """Test that the prompt lists works, metrics, communities and the requested focus"""
+    network = agent._build_network(works)
+    analysis = agent._perform_algorithmic_analysis(network)
+    prompt = agent._create_analysis_prompt(works, network, analysis, "relationships", enhanced=False)
+    lines = prompt.split("\n")
+
+    assert lines[:4] == ["Analyze the following character network:", "", "Works:", "- Neuromancer"]
+    assert "- Total Characters: 9" in lines
+    assert "- Community 2: 4 characters" in lines
+    assert lines[-4:] == list(agent.PROMPT_FOCUS)
+    enhanced = agent._create_analysis_prompt(works, network, analysis, "relationships", enhanced=True)
+    assert enhanced.endswith(agent.ENHANCED_PROMPT_FOCUS[-1])
@@ -0,0 +1,142 @@
+import asyncio
+import pytest
+from src.agents.base_agent import BaseAgent
+from src.agents.parallel_agent import ParallelAgentFactory, ParallelConfig
+
+class FastAgent(BaseAgent):
+    def __init__(self):
+        super().__init__("fast")
+        self.calls = 0
+
+    async def lookup(self, query):
+        self.calls += 1
+        return {"agent": "fast", "query": query}
+
+class SlowAgent(BaseAgent):
+    def __init__(self):
+        super().__init__("slow")
+        self.cancelled = False
+
+    async def lookup(self, query):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return {"agent": "slow", "query": query}
+
+class BrokenAgent(BaseAgent):
+    def __init__(self):
+        super().__init__("broken")
+
+    async def lookup(self, query):
+        raise RuntimeError("lookup failed")
+
+def _factory(original, mcp, timeout=30):
+    factory = ParallelAgentFactory(ParallelConfig(timeout=timeout))
+    factory.register_agent_class("test", original, mcp)
+    return factory
+
+@pytest.mark.asyncio
+async def test_execute_parallel_times_out_slow_version():
+    """Test that a slow version times out without losing the other result"""
+    factory = _factory(FastAgent, SlowAgent, timeout=0.05)
+    results = await factory.execute_parallel("test", "lookup", "Dune")
+
+    assert results == {"original": {"agent": "fast", "query": "Dune"}, "mcp": None}
+    metrics = factory.monitor.get_metrics()
+    assert metrics["success"] == {"original": 1, "mcp": 0}
+    assert metrics["errors"]["mcp"] == ["TimeoutError"]
+    assert metrics["performance"]["original"]["count"] == 1
+
+@pytest.mark.asyncio
+async def test_auto_mode_cancels_the_other_version():
+    """Test that auto mode returns the preferred result and cancels the slower version"""
+    factory = _factory(SlowAgent, FastAgent)
+    result = await factory.execute_smart("test", "lookup", "Dune", mode="auto")
+
+    assert result == {"agent": "fast", "query": "Dune"}
+    original_agent, _ = factory._get_instances("test")
+    assert original_agent.cancelled
+
+@pytest.mark.asyncio
+async def test_auto_mode_falls_back_when_preferred_fails():
+    """Test that auto mode uses the other version when the preferred one fails"""
+    factory = _factory(FastAgent, BrokenAgent)
+    result = await factory.execute_smart("test", "lookup", "Dune", mode="auto")
+    assert result == {"agent": "fast", "query": "Dune"}
+
+@pytest.mark.asyncio
+async def test_results_are_cached_per_arguments():
+    """Test that repeated calls are served from the cache until the TTL expires"""
+    factory = _factory(FastAgent, FastAgent)
+    first = await factory.execute_parallel("test", "lookup", "Dune")
+    first["original"]["query"] = "MUTATED"
+    second = await factory.execute_parallel("test", "lookup", "Dune")
+    await factory.execute_parallel("test", "lookup", "Hyperion")
+
+    original_agent, mcp_agent = factory._get_instances("test")
+    assert original_agent.calls == mcp_agent.calls == 2
+    assert second["original"]["query"] == "Dune"
+
+    factory.config.cache_ttl = 0
+    await factory.execute_parallel("test", "lookup", "Dune")
+    assert original_agent.calls == 3
+
+@pytest.mark.asyncio
+async def test_cache_evicts_least_recently_used():
+    """Test that the cache stays within its size by evicting the oldest entry"""
+    factory = _factory(FastAgent, FastAgent)
+    factory.config.cache_size = 2
+    for query in ("Dune", "Hyperion", "Dune", "Solaris"):
+        await factory.execute_smart("test", "lookup", query, mode="original")
+
+    original_agent, _ = factory._get_instances("test")
+    assert original_agent.calls == 3
+    assert len(factory.cache) == 2
+    await factory.execute_smart("test", "lookup", "Hyperion", mode="original")
+    assert original_agent.calls == 4
+
+@pytest.mark.asyncio
+async def test_failed_runs_are_not_cached():
+    """Test that a run with a failed version is retried on the next call"""
+    factory = _factory(FastAgent, BrokenAgent)
+    await factory.execute_parallel("test", "lookup", "Dune")
+    await factory.execute_parallel("test", "lookup", "Dune")
+    original_agent, _ = factory._get_instances("test")
+    assert original_agent.calls == 2
+    assert not factory.cache
+
+def test_instances_are_lazy_and_bounded():
+    """Test that instance pairs are created on first use and least recently used pairs are dropped"""
+    factory = ParallelAgentFactory(ParallelConfig(max_instances=2))
+    for name in ("a", "b", "c"):
+        factory.register_agent_class(name, FastAgent, FastAgent)
+    assert not factory.instances
+
+    first = factory._get_instances("a")
+    factory._get_instances("b")
+    assert factory._get_instances("a") is first
+    factory._get_instances("c")
+    assert list(factory.instances) == ["a", "c"]
+
+def test_config_uses_slots():
+    """Test that configs reject unknown attributes"""
+    with pytest.raises(AttributeError):
+        ParallelConfig().retries = 5
+
+def test_mcp_decision_is_reused_between_intervals():
+    """Test that the MCP decision is only recomputed every decision_interval calls or after a reset"""
+    factory = ParallelAgentFactory(ParallelConfig(decision_interval=3))
+    track = factory.monitor.track_call
+    assert factory._should_use_mcp("test") is True
+
+    # MCP starts failing, but the decision holds until three more calls are tracked
+    track("original", True, execution_time=1.0)
+    track("mcp", False, "boom", 1.0)
+    assert factory._should_use_mcp("test") is True
+    track("mcp", False, "boom", 1.0)
+    assert factory._should_use_mcp("test") is False
+
+    factory.monitor.reset_metrics()
+    assert factory._should_use_mcp("test") is True
@@ -0,0 +1,104 @@
+import asyncio
+import pytest
+from src.config.settings import settings
+from src.agents.sf_agent import ScienceFictionAgent, MCPEnabledScienceFictionAgent
+
+def _capture(agent, monkeypatch):
+    """Stub the API client and record the messages of each request"""
+    requests = []
+
+    async def fake_completion(messages, model=None, **kwargs):
+        requests.append(messages)
+        return {"choices": [{"message": {"content": "analysis"}}]}
+
+    monkeypatch.setattr(agent.client, "chat_completion", fake_completion)
+    return requests
+
+@pytest.mark.asyncio
+async def test_system_prompt_is_a_cacheable_block(monkeypatch):
+    """Test that the static system prompt is sent as one block marked for caching"""
+    agent = ScienceFictionAgent()
+    requests = _capture(agent, monkeypatch)
+    await agent.analyze_content("A desert planet", title="Dune")
+
+    system = requests[0][0]
+    assert system["role"] == "system"
+    assert system["content"] == [
+        {"type": "text", "text": agent.system_prompt, "cache_control": {"type": "ephemeral"}}
+    ]
+
+@pytest.mark.asyncio
+async def test_mcp_context_follows_cached_prefix(monkeypatch):
+    """Test that per-call metadata goes in a trailing uncached block"""
+    agent = MCPEnabledScienceFictionAgent()
+    requests = _capture(agent, monkeypatch)
+    await agent.analyze_content("A desert planet", title="Dune", year=1965)
+    await agent.analyze_content("A red planet")
+
+    with_context, without_context = (messages[0]["content"] for messages in requests)
+    assert with_context[0] == without_context[0] == agent._system_blocks[0]
+    assert with_context[1] == {"type": "text", "text": "Title: Dune\nYear: 1965"}
+    assert len(without_context) == 1
+
+@pytest.mark.asyncio
+async def test_repeated_requests_are_served_from_disk(monkeypatch):
+    """Test that identical requests skip the API, across agent instances, until the TTL passes"""
+    agent = ScienceFictionAgent()
+    requests = _capture(agent, monkeypatch)
+    first = await agent.get_recommendations("Dune", limit=3)
+    await agent.get_recommendations("Dune", limit=3)
+    assert len(requests) == 1
+
+    other = ScienceFictionAgent()
+    other_requests = _capture(other, monkeypatch)
+    assert await other.get_recommendations("Dune", limit=3) == first
+    assert not other_requests
+
+    # Any change to the request is a different entry
+    await agent.get_recommendations("Dune", limit=4)
+    await agent.analyze_content("Dune", model="other/model")
+    await agent.analyze_content("Dune")
+    assert len(requests) == 4
+
+    monkeypatch.setattr(settings, "CACHE_TTL", 0)
+    await agent.get_recommendations("Dune", limit=3)
+    assert len(requests) == 5
+
+@pytest.mark.asyncio
+async def test_analyze_batch_bounds_concurrency(monkeypatch):
+    """Test that a batch keeps input order and never exceeds batch_size requests in flight"""
+    agent = ScienceFictionAgent()
+    in_flight = peak = 0
+
+    async def fake_completion(messages, model=None, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return {"content": messages[1]["content"]}
+
+    monkeypatch.setattr(agent.client, "chat_completion", fake_completion)
+    items = [{"content": f"work {i}", "title": f"Title {i}"} for i in range(10)]
+    results = await agent.analyze_batch(items, batch_size=3)
+
+    assert [result["title"] for result in results] == [item["title"] for item in items]
+    assert [result["content"] for result in results] == [item["content"] for item in items]
+    assert peak == 3
+
+@pytest.mark.asyncio
+async def test_stream_content_uses_cached_prefix(monkeypatch):
+    """Test that streamed analyses send the same system blocks and pass text through"""
+    agent = ScienceFictionAgent()
+    requests = []
+
+    async def fake_stream(messages, model=None, **kwargs):
+        requests.append(messages)
+        for text in ("Spice ", "must flow"):
+            yield text
+
+    monkeypatch.setattr(agent.client, "chat_completion_stream", fake_stream)
+    chunks = [text async for text in agent.stream_content("A desert planet")]
+    assert chunks == ["Spice ", "must flow"]
+    assert requests[0][0]["content"] == agent._system_blocks
+    assert requests[0][1] == {"role": "user", "content": "A desert planet"}
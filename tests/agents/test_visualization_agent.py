@@ -0,0 +1,123 @@
+import asyncio
+import subprocess
+import sys
+from pathlib import Path
+import base64
+import pytest
+import matplotlib.artist
+import matplotlib.pyplot as plt
+import networkx as nx
+from src.agents import visualization_agent
+from src.agents.visualization_agent import VisualizationAgent
+
+@pytest.fixture
+def agent(tmp_path, monkeypatch):
+    # The agent creates its output directory in the working directory
+    monkeypatch.chdir(tmp_path)
+    return VisualizationAgent()
+
+@pytest.fixture
+def network_data():
+    nodes = [
+        {"id": name, "connections": connections, "role": "Protagonist", "work": "Neuromancer", "community": community}
+        for name, connections, community in [("Case", 2, 1), ("Molly", 2, 1), ("Armitage", 2, 1), ("Marly", 0, 0)]
+    ]
+    edges = [
+        {"source": "Case", "target": "Molly"},
+        {"source": "Molly", "target": "Armitage"},
+        {"source": "Armitage", "target": "Case"}
+    ]
+    return {"nodes": nodes, "edges": edges, "communities": [{"id": 1, "size": 3}]}
+
+@pytest.mark.asyncio
+async def test_network_layout_is_reused(agent, network_data, monkeypatch):
+    """Test that the same graph is only laid out once, whatever the edge order"""
+    layouts = []
+    spring_layout = nx.spring_layout
+    monkeypatch.setattr(
+        nx, "spring_layout",
+        lambda *args, **kwargs: layouts.append(1) or spring_layout(*args, **kwargs)
+    )
+
+    result = await agent.generate_visualization(network_data, "network")
+    assert base64.b64decode(result["image"]).startswith(b"\x89PNG")
+    assert result["metadata"] == {"type": "network", "nodes": 4, "edges": 3, "communities": 1}
+
+    network_data["edges"].reverse()
+    await agent.generate_visualization(network_data, "network", enhanced=True)
+    assert len(layouts) == 1
+
+    network_data["edges"].append({"source": "Case", "target": "Marly"})
+    await agent.generate_visualization(network_data, "network")
+    assert len(layouts) == 2
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("enhanced", [False, True])
+async def test_charts_leave_no_pyplot_figures(agent, enhanced):
+    """Test that temporal and comparative charts leave no pyplot figures behind"""
+    plt.close("all")
+    timeline = {"timeline": [
+        {"year": 1960, "metrics": {"works": 2}, "themes": {"space": 1}},
+        {"year": 1970, "metrics": {"works": 3}, "themes": {"space": 2, "ecology": 1}}
+    ]}
+    comparison = {"works": ["Dune", "Solaris"], "metrics": {"length": [412, 204]}, "similarity_matrix": [[1, 0.4], [0.4, 1]]}
+
+    temporal = await agent.generate_visualization(timeline, "temporal", enhanced=enhanced)
+    comparative = await agent.generate_visualization(comparison, "comparative", enhanced=enhanced)
+    assert temporal["metadata"]["time_range"] == "1960-1970"
+    assert comparative["metadata"]["metrics"] == ["length"]
+    assert plt.get_fignums() == []
+
+def test_headless_backend():
+    """Test that rendering does not depend on a GUI backend"""
+    assert visualization_agent._load_matplotlib().get_backend().lower() == "agg"
+
+@pytest.mark.asyncio
+async def test_large_networks_are_rasterized(agent, network_data, monkeypatch):
+    """Test that node and edge artists are rasterized above the threshold"""
+    rasterized = []
+    monkeypatch.setattr(
+        matplotlib.artist.Artist, "set_rasterized",
+        lambda artist, value: rasterized.append(value)
+    )
+    await agent.generate_visualization(network_data, "network")
+    assert rasterized == []
+
+    agent.rasterize_threshold = 3
+    await agent.generate_visualization(network_data, "network", format="svg")
+    assert rasterized == [True, True]
+
+@pytest.mark.asyncio
+async def test_enhanced_network_labels_central_nodes(agent, network_data, monkeypatch):
+    """Test that only characters with above-average degree are labelled"""
+    drawn = []
+    monkeypatch.setattr(nx, "draw_networkx_labels", lambda G, pos, labels, **kwargs: drawn.append(labels))
+    await agent.generate_visualization(network_data, "network", enhanced=True)
+    assert drawn == [{"Case": "Case", "Molly": "Molly", "Armitage": "Armitage"}]
+
+@pytest.mark.asyncio
+async def test_concurrent_renders(agent, network_data):
+    """Test that visualizations rendered concurrently in threads all succeed"""
+    timeline = {"timeline": [{"year": 1960, "metrics": {"works": 2}, "themes": {}}]}
+    results = await asyncio.gather(
+        *(agent.generate_visualization(network_data, "network", enhanced=True) for _ in range(3)),
+        agent.generate_visualization(timeline, "temporal")
+    )
+    assert [result["metadata"]["type"] for result in results] == ["network"] * 3 + ["temporal"]
+    assert len(agent.layout_cache) == 1
+
+@pytest.mark.asyncio
+async def test_unsupported_type(agent):
+    """Test that unknown visualization types are rejected"""
+    with pytest.raises(ValueError):
+        await agent.generate_visualization({}, "histogram")
+
+def test_plotting_libraries_load_lazily():
+    """Test that importing the agent module leaves matplotlib, seaborn and networkx unloaded"""
+    code = (
+        "import sys; import src.agents.visualization_agent; "
+        "print(sorted({'matplotlib', 'seaborn', 'networkx'} & set(sys.modules)))"
+    )
+    root = Path(__file__).resolve().parents[2]
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=root)
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,152 @@
+import pytest
+from src.analysis import character_network as character_network_module
+from src.analysis.character_network import CharacterNetwork
+
+def _character(name, *targets):
+    return {"name": name, "relationships": [{"target": target} for target in targets]}
+
+def _cast(*characters):
+    """Characters plus a bare entry for every relationship target they do not name"""
+    named = {char["name"] for char in characters}
+    targets = dict.fromkeys(
+        rel["target"] for char in characters for rel in char.get("relationships", [])
+        if rel["target"] not in named
+    )
+    return [*characters, *({"name": target} for target in targets)]
+
+@pytest.fixture
+def works():
+    return [
+        {"characters": _cast(_character("Paul", "Jessica", "Stilgar"), _character("Jessica", "Leto"))},
+        {"characters": _cast(_character("Ender", "Valentine"), _character("Bean", "Ender"))},
+        {"characters": [_character("Hari")]}
+    ]
+
+def _communities(analysis):
+    return [(c["size"], set(c["characters"])) for c in analysis["communities"]]
+
+def test_communities_are_connected_components(works):
+    """Test that communities group connected characters and drop isolated ones"""
+    analysis = CharacterNetwork().analyze_network(works)
+    assert _communities(analysis) == [
+        (4, {"Paul", "Jessica", "Stilgar", "Leto"}),
+        (3, {"Ender", "Valentine", "Bean"})
+    ]
+
+def test_kernel_matches_fallback(works, monkeypatch):
+    """Test that the union-find kernel and the set-based search find the same communities"""
+    compiled = CharacterNetwork().analyze_network(works)
+    monkeypatch.setattr(character_network_module, "HAS_NUMBA", False)
+    fallback = CharacterNetwork().analyze_network(works)
+    assert _communities(compiled) == _communities(fallback)
+    assert [c["density"] for c in compiled["communities"]] == [c["density"] for c in fallback["communities"]]
+
+def test_csr_matches_network(works):
+    """Test that the CSR arrays hold each character's connections"""
+    network = CharacterNetwork()
+    network.analyze_network(works)
+    for node, data in network.network.items():
+        neighbors = network._indices[network._indptr[node]:network._indptr[node + 1]]
+        assert set(neighbors.tolist()) == data["connections"]
+    assert network._names[network._name_to_id["Leto"]] == "Leto"
+
+def test_fallback_stops_once_every_character_is_visited(monkeypatch):
+    """Test that the set-based search stops scanning once one component covers the network"""
+    monkeypatch.setattr(character_network_module, "HAS_NUMBA", False)
+    network = CharacterNetwork()
+    calls = []
+    find_community = network._find_community
+
+    def counting_find(start, visited, remaining=None):
+        calls.append(start)
+        return find_community(start, visited, remaining)
+
+    monkeypatch.setattr(network, "_find_community", counting_find)
+    analysis = network.analyze_network([{"characters": _cast(_character("Paul", "Jessica", "Stilgar", "Leto"))}])
+    assert calls == [network._name_to_id["Paul"]]
+    assert _communities(analysis) == [(4, {"Paul", "Jessica", "Stilgar", "Leto"})]
+
+@pytest.mark.parametrize("divisor", [1, 20, 10**6])
+def test_fallback_search_directions_agree(works, monkeypatch, divisor):
+    """Test that top-down and bottom-up expansion find the same communities"""
+    monkeypatch.setattr(character_network_module, "HAS_NUMBA", False)
+    network = CharacterNetwork()
+    network.bottom_up_divisor = divisor
+    hub = _character("Paul", *[f"Fremen {i}" for i in range(30)])
+    chain = [_character(f"Fremen {i}", f"Fremen {i + 1}") for i in range(30)]
+    analysis = network.analyze_network(works + [{"characters": _cast(hub, *chain)}])
+    assert _communities(analysis) == [
+        (35, {"Paul", "Jessica", "Stilgar", "Leto", *[f"Fremen {i}" for i in range(31)]}),
+        (3, {"Ender", "Valentine", "Bean"})
+    ]
+
+def test_density_counts_only_member_edges(monkeypatch):
+    """Test that density ignores edges leaving the community, across bitmap words"""
+    ring = [_character(f"Clone {i}", f"Clone {(i + 1) % 100}") for i in range(100)]
+    network = CharacterNetwork()
+    network.analyze_network([{"characters": ring}])
+    members = {network._name_to_id[f"Clone {i}"] for i in range(60, 70)}
+    compiled = network._calculate_community_density(members)
+    monkeypatch.setattr(character_network_module, "HAS_NUMBA", False)
+    assert compiled == network._calculate_community_density(members) == 18 / 90
+
+def test_relationship_patterns_count_roles():
+    """Test that character roles are counted across the network"""
+    characters = [
+        {"name": "Paul", "role": "protagonist", "relationships": [{"target": "Feyd", "type": "rival"}]},
+        {"name": "Feyd", "role": "antagonist"},
+        {"name": "Ender", "role": "protagonist"}
+    ]
+    patterns = CharacterNetwork().analyze_network([{"characters": characters}])["relationship_patterns"]
+    assert patterns["common_roles"] == [
+        {"role": "protagonist", "count": 2},
+        {"role": "antagonist", "count": 1}
+    ]
+    assert list(patterns) == ["relationship_types", "common_roles", "interaction_patterns"]
+
+def test_central_characters_are_top_ten_by_degree():
+    """Test that the ten best-connected characters are returned in degree order, ties first-seen"""
+    characters = _cast(*[_character(f"Hub {i}", *[f"Minor {i}-{j}" for j in range(i)]) for i in range(15)])
+    central = CharacterNetwork().analyze_network([{"characters": characters}])["central_characters"]
+    assert [c["character"] for c in central] == [f"Hub {i}" for i in range(14, 4, -1)]
+    assert [c["centrality_score"] for c in central] == list(range(14, 4, -1))
+
+def test_network_metrics_for_a_star():
+    """Test degree, density and centralization metrics on a star network"""
+    star = _cast(_character("Paul", "Jessica", "Stilgar", "Chani"))
+    metrics = CharacterNetwork().analyze_network([{"characters": star}])["network_metrics"]
+    assert metrics == {
+        "total_characters": 4,
+        "average_connections": 1.5,
+        "density": 0.5,
+        "centralization": 1.0
+    }
+
+def test_network_metrics_for_a_pair():
+    """Test that a two-character network has no centralization instead of dividing by zero"""
+    metrics = CharacterNetwork().analyze_network([{"characters": _cast(_character("Paul", "Chani"))}])["network_metrics"]
+    assert metrics["density"] == 1.0
+    assert metrics["centralization"] == 0
+
+def test_relationships_wait_for_their_target():
+    """Test that unnamed relationship targets are not added as characters until they appear"""
+    network = CharacterNetwork()
+    analysis = network.analyze_network([{"characters": [_character("Paul", "Chani", "Alia")]}])
+    assert network._names == ["Paul"]
+    assert analysis["network_metrics"]["total_characters"] == 1
+    assert analysis["communities"] == []
+
+    network.analyze_network([{"characters": [{"name": "Chani", "role": "fremen"}]}])
+    assert network.network[0]["connections"] == {1}
+    assert network.network[1]["connections"] == {0}
+    assert network._pending_connections == {"Alia": {0}}
+
+def test_metrics_come_from_shared_degrees(works):
+    """Test that metrics and central characters agree with the network's connection sets"""
+    network = CharacterNetwork()
+    analysis = network.analyze_network(works)
+    degrees = {network._names[node]: len(data["connections"]) for node, data in network.network.items()}
+    assert analysis["network_metrics"]["average_connections"] == sum(degrees.values()) / len(degrees)
+    central = analysis["central_characters"]
+    assert [c["character"] for c in central] == sorted(degrees, key=degrees.get, reverse=True)
+    assert all(type(c["centrality_score"]) is int for c in central)
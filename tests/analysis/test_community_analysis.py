@@ -0,0 +1,133 @@
+import numpy as np
+import pytest
+from src.analysis import community_analysis as community_analysis_module
+from src.analysis.community_analysis import CommunityAnalysis
+
+@pytest.fixture
+def works():
+    return [
+        {"title": "Dune", "author": "Frank Herbert", "year": 1965, "genres": ["space opera"], "themes": ["ecology", "religion"], "rating": 4.5},
+        {"title": "Dune Messiah", "author": "Frank Herbert", "year": 1969, "genres": ["space opera"], "themes": ["religion", "power"], "rating": 4.0},
+        {"title": "Foundation", "author": "Isaac Asimov", "year": 1951, "genres": ["space opera"], "themes": ["history", "power"], "rating": 4.2},
+        {"title": "Neuromancer", "author": "William Gibson", "year": 1984, "genres": ["cyberpunk"], "themes": ["technology"]}
+    ]
+
+@pytest.fixture
+def analyzer(works):
+    analyzer = CommunityAnalysis()
+    for work in works:
+        analyzer._add_work(work)
+    return analyzer
+
+def _pairwise_overlaps(analyzer):
+    """Reference Jaccard scores over every community pair"""
+    communities = list(analyzer.works_by_community)
+    overlaps = {}
+    for i, comm1 in enumerate(communities):
+        for comm2 in communities[i + 1:]:
+            score = analyzer._calculate_community_overlap(comm1, comm2)
+            if score > 0.3:
+                shared = set(analyzer.works_by_community[comm1]) & set(analyzer.works_by_community[comm2])
+                overlaps[frozenset((comm1, comm2))] = (score, len(shared))
+    return overlaps
+
+def test_overlapping_communities_match_pairwise_scan(analyzer):
+    """Test that the inverted index finds the same overlaps as comparing every pair"""
+    overlaps = analyzer._find_overlapping_communities()
+    assert {
+        frozenset(o["communities"]): (o["overlap_score"], o["shared_works"]) for o in overlaps
+    } == _pairwise_overlaps(analyzer)
+    assert frozenset(("author:Frank Herbert", "religion")) in {frozenset(o["communities"]) for o in overlaps}
+    scores = [o["overlap_score"] for o in overlaps]
+    assert scores == sorted(scores, reverse=True)
+
+def test_overlaps_are_computed_once_per_analysis(analyzer, works, monkeypatch):
+    """Test that patterns and recommendations share one overlap scan, reset by each analysis"""
+    first = analyzer._find_overlapping_communities()
+    assert analyzer._generate_recommendations() is not None
+    assert analyzer._find_overlapping_communities() is first
+
+    monkeypatch.setattr(analyzer, "_analyze_trends", lambda: [], raising=False)
+    analysis = analyzer.analyze_communities(works)
+    assert analysis["cross_community_patterns"]["overlapping_communities"] is not first
+
+def test_all_community_metrics(analyzer):
+    """Test that every community is analyzed, in insertion order"""
+    metrics = analyzer._analyze_all_communities()
+    assert list(metrics) == list(analyzer.works_by_community)
+    for community, community_metrics in metrics.items():
+        expected = CommunityAnalysis._analyze_community(analyzer._community_works(community))
+        assert community_metrics == expected
+
+def test_community_metrics(works):
+    """Test ratings, themes and innovation from the single pass over a community"""
+    metrics = CommunityAnalysis._analyze_community(works[:3])
+    assert metrics["work_count"] == 3
+    assert metrics["average_rating"] == pytest.approx((4.5 + 4.0 + 4.2) / 3)
+    assert metrics["common_themes"][:2] == [("religion", 2), ("power", 2)]
+    # Four unique themes over three works, and a 1951-1969 spread
+    assert metrics["innovation_score"] == pytest.approx((4 / 3 + 18 / 100) / 2)
+
+def test_single_undated_work_scores_zero():
+    """Test that a lone undated work has no innovation signal"""
+    assert CommunityAnalysis._analyze_community([{"themes": ["ecology"]}])["innovation_score"] == 0.0
+
+def test_extract_communities(works):
+    """Test genre, theme, author and decade communities for a work"""
+    assert CommunityAnalysis()._extract_communities(works[0]) == {
+        "space opera", "ecology", "religion", "author:Frank Herbert", "decade:1960s"
+    }
+    assert CommunityAnalysis()._extract_communities({"title": "Untitled"}) == set()
+
+def test_community_evolution_walks_decades_in_order(analyzer):
+    """Test that decade communities are compared between consecutive decades"""
+    evolution = analyzer._analyze_community_evolution()
+    assert [step["period"] for step in evolution] == ["1950s-1960s", "1960s-1980s"]
+    assert evolution[0]["emerging_communities"] == ["decade:1960s"]
+    assert evolution[0]["declining_communities"] == ["decade:1950s"]
+
+def test_community_overlap_of_work_dicts(analyzer):
+    """Test that overlap is computed for dict works, which cannot be put in a set themselves"""
+    assert analyzer.works_by_community["space opera"] == [0, 1, 2]
+    assert analyzer._calculate_community_overlap("author:Frank Herbert", "space opera") == pytest.approx(2 / 3)
+    assert analyzer._calculate_community_overlap("cyberpunk", "space opera") == 0.0
+    assert [w["title"] for w in analyzer._community_works("power")] == ["Dune Messiah", "Foundation"]
+
+def test_repeated_analyses_accumulate_works(works, monkeypatch):
+    """Test that works from earlier analyses keep their ids and communities"""
+    analyzer = CommunityAnalysis()
+    monkeypatch.setattr(analyzer, "_analyze_trends", lambda: [], raising=False)
+    analyzer.analyze_communities(works[:2])
+    analysis = analyzer.analyze_communities(works[2:])
+    assert analyzer.works_by_community["power"] == [1, 2]
+    assert analysis["community_metrics"]["space opera"]["work_count"] == 3
+    assert analysis["cross_community_patterns"]["influence_patterns"][0]["source"] == "author:Frank Herbert"
+
+def test_thematic_evolution_over_interned_themes():
+    """Test emerging and persistent themes across an author's years"""
+    analyzer = CommunityAnalysis()
+    for year, themes in [(1965, ["ecology", "religion"]), (1969, ["religion", "power"]), (1976, ["religion", "power", "memory"])]:
+        analyzer._add_work({"author": "Frank Herbert", "year": year, "themes": themes})
+    analyzer._add_work({"author": "Frank Herbert", "year": 1981})
+
+    influences = analyzer._identify_influence_patterns()
+    assert len(influences) == 1
+    pattern = influences[0]["pattern"]
+    assert pattern["period"] == "1965-1976"
+    assert pattern["emerging_themes"] == ["power", "memory"]
+    assert pattern["persistent_themes"] == ["religion"]
+    assert analyzer._theme_names == ["ecology", "religion", "power", "memory"]
+
+def test_thematic_evolution_kernel_matches_fallback(monkeypatch):
+    """Test that the compiled evolution walk agrees with the numpy set routines"""
+    rng = np.random.default_rng(7)
+    analyzer = CommunityAnalysis()
+    analyzer._theme_names = [f"theme {i}" for i in range(40)]
+    themes_by_year = {
+        year: np.unique(rng.integers(0, 40, size=rng.integers(0, 25))).astype(np.int32)
+        for year in range(1950, 1990, 3)
+    }
+    themes_by_year[1953] = np.arange(0, 40, 2, dtype=np.int32)
+    compiled = analyzer._analyze_thematic_evolution(themes_by_year)
+    monkeypatch.setattr(community_analysis_module, "HAS_NUMBA", False)
+    assert compiled == analyzer._analyze_thematic_evolution(themes_by_year)
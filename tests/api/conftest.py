@@ -0,0 +1,4 @@
+import os
+
+# The client loads settings at import time, which requires an API key
+os.environ.setdefault("OPENROUTER_API_KEY", "test-key")
@@ -0,0 +1,78 @@
+import pytest
+from typing import Optional
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+from src.api import cache as cache_module
+from src.api.cache import cached, response_cache
+from src.config.settings import settings
+
+class Request(BaseModel):
+    content: str
+    model: Optional[str] = None
+    force_refresh: Optional[bool] = False
+
+@pytest.fixture
+def calls():
+    return []
+
+@pytest.fixture
+def client(calls):
+    app = FastAPI()
+
+    @app.post("/analyze")
+    @cached("analyze")
+    async def analyze(request: Request):
+        calls.append(request.content)
+        return {"content": request.content, "model": request.model, "call": len(calls)}
+
+    response_cache.clear()
+    yield TestClient(app)
+    response_cache.clear()
+
+def test_repeated_request_is_a_hit(client, calls):
+    """Test that an identical request is served from the cache"""
+    first = client.post("/analyze", json={"content": "Dune"})
+    second = client.post("/analyze", json={"content": "Dune"})
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert first.json() == second.json() == {"content": "Dune", "model": None, "call": 1}
+    assert calls == ["Dune"]
+
+def test_key_includes_payload_and_model(client, calls):
+    """Test that a different content or model is a miss"""
+    client.post("/analyze", json={"content": "Dune"})
+    assert client.post("/analyze", json={"content": "Dune", "model": "model-a"}).headers["X-Cache"] == "MISS"
+    assert client.post("/analyze", json={"content": "Dune Messiah"}).headers["X-Cache"] == "MISS"
+    assert len(calls) == 3
+
+def test_force_refresh_replaces_entry(client, calls):
+    """Test that force_refresh recomputes and later requests see the fresh result"""
+    client.post("/analyze", json={"content": "Dune"})
+    refreshed = client.post("/analyze", json={"content": "Dune", "force_refresh": True})
+    assert refreshed.headers["X-Cache"] == "MISS"
+    assert client.post("/analyze", json={"content": "Dune"}).json()["call"] == 2
+
+def test_expired_entry_is_recomputed(client, calls, monkeypatch):
+    """Test that entries older than the TTL are not served"""
+    client.post("/analyze", json={"content": "Dune"})
+    monkeypatch.setattr(settings, "CACHE_TTL", 0)
+    assert client.post("/analyze", json={"content": "Dune"}).headers["X-Cache"] == "MISS"
+
+def test_cache_disabled(client, calls, monkeypatch):
+    """Test that handlers run every time when caching is disabled"""
+    monkeypatch.setattr(settings, "CACHE_ENABLED", False)
+    client.post("/analyze", json={"content": "Dune"})
+    response = client.post("/analyze", json={"content": "Dune"})
+    assert "X-Cache" not in response.headers
+    assert len(calls) == 2
+
+def test_eviction(monkeypatch):
+    """Test that the least recently used entry is evicted once the cache is full"""
+    cache = cache_module.ResponseCache(max_size=2)
+    cache.set("a", b"1")
+    cache.set("b", b"2")
+    assert cache.get("a", 60) == b"1"
+    cache.set("c", b"3")
+    assert cache.get("b", 60) is None
+    assert cache.get("a", 60) == b"1"
@@ -0,0 +1,69 @@
+import asyncio
+import pytest
+from src.api.openrouter_client import OpenRouterClient
+
+@pytest.fixture(autouse=True)
+def reset_session():
+    OpenRouterClient._session = None
+    OpenRouterClient._session_loop = None
+    yield
+    OpenRouterClient._session = None
+    OpenRouterClient._session_loop = None
+
+@pytest.mark.asyncio
+async def test_clients_share_one_session():
+    """Test that every client reuses one pooled session until it is closed"""
+    session = OpenRouterClient()._get_session()
+    assert OpenRouterClient()._get_session() is session
+    assert session.connector.limit == OpenRouterClient.max_connections
+
+    await OpenRouterClient.close()
+    assert session.closed
+    replacement = OpenRouterClient()._get_session()
+    assert replacement is not session
+    await OpenRouterClient.close()
+
+def test_new_event_loop_gets_a_new_session():
+    """Test that a session is never reused from another event loop"""
+    async def get_session():
+        return OpenRouterClient()._get_session()
+
+    first = asyncio.run(get_session())
+    second = asyncio.run(get_session())
+    assert first is not second
+
+@pytest.mark.asyncio
+async def test_stream_yields_text_deltas():
+    """Test that streamed chunks are parsed into text, skipping keep-alives and stopping at [DONE]"""
+    from aiohttp import web
+    from aiohttp.test_utils import TestServer
+
+    requests = []
+
+    async def completions(request):
+        requests.append(await request.json())
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for line in [
+            b": OPENROUTER PROCESSING\n\n",
+            b'data: {"choices": [{"delta": {"role": "assistant"}}]}\n\n',
+            b'data: {"choices": [{"delta": {"content": "Spice "}}]}\n\n',
+            b'data: {"choices": [{"delta": {"content": "must flow"}}]}\n\n',
+            b"data: [DONE]\n\n",
+            b'data: {"choices": [{"delta": {"content": "ignored"}}]}\n\n',
+        ]:
+            await response.write(line)
+        return response
+
+    app = web.Application()
+    app.router.add_post("/chat/completions", completions)
+    async with TestServer(app) as server:
+        client = OpenRouterClient()
+        client.base_url = str(server.make_url("")).rstrip("/")
+        messages = [{"role": "user", "content": "Dune"}]
+        chunks = [text async for text in client.chat_completion_stream(messages)]
+        await OpenRouterClient.close()
+
+    assert chunks == ["Spice ", "must flow"]
+    assert requests[0]["stream"] is True
+    assert requests[0]["messages"] == messages